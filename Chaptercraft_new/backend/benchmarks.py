@@ -0,0 +1,269 @@
+import os
+import sys
+import time
+import zipfile
+import tempfile
+import argparse
+import tracemalloc
+from xml.sax.saxutils import escape
+
+# Manual performance benchmarks for the backend services.
+#
+#   python benchmarks.py docx [path.docx]
+#   python benchmarks.py validation [manuscript.txt]
+#   python benchmarks.py segmenter [novel.txt]
+
+SAMPLE_PARAGRAPH = (
+    "Emma pressed her nose against the window, watching the green fields roll by. "
+    "\"Look!\" she exclaimed, pointing to a red barn in the distance. \"That must be it!\" "
+    "Dr. Martin waved from the porch while the goats wandered across the yard."
+)
+
+
+def measure(label: str, func, *args):
+    """Run func once, reporting wall-clock time and peak traced Python memory"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = func(*args)
+    except ImportError as e:
+        tracemalloc.stop()
+        print(f"{label:<28} skipped ({e})")
+        return None
+
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed * 1000:10.1f} ms  peak {peak / (1024 * 1024):8.1f} MB")
+    return result
+
+
+def build_sample_docx(path: str, paragraphs: int = 20000, media_mb: int = 20):
+    """Write a DOCX with many paragraphs, headings and an embedded media blob"""
+    body = []
+    for i in range(paragraphs):
+        if i % 200 == 0:
+            body.append(
+                '<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr>'
+                f'<w:r><w:t>Chapter {i // 200 + 1}</w:t></w:r></w:p>'
+            )
+        body.append(f'<w:p><w:r><w:t xml:space="preserve">{escape(SAMPLE_PARAGRAPH)}</w:t></w:r></w:p>')
+
+    document_xml = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{"".join(body)}</w:body></w:document>'
+    )
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Default Extension="png" ContentType="image/png"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ))
+        archive.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="word/document.xml"/></Relationships>'
+        ))
+        archive.writestr('word/document.xml', document_xml)
+        archive.writestr('word/media/image1.png', os.urandom(media_mb * 1024 * 1024), zipfile.ZIP_STORED)
+
+
+def bench_docx(path: str = None):
+    """Compare the streaming DOCX parser against mammoth"""
+    from services import extraction_worker
+
+    cleanup = False
+    if not path:
+        fd, path = tempfile.mkstemp(suffix='.docx')
+        os.close(fd)
+        build_sample_docx(path)
+        cleanup = True
+
+    try:
+        print(f"DOCX: {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB)")
+        streamed = measure("streaming iterparse", extraction_worker.extract_docx_text_streaming, path)
+        mammoth_text = measure("mammoth extract_raw_text", extraction_worker.extract_docx_text_mammoth, path)
+
+        if streamed is not None:
+            print(f"streaming output: {len(streamed):,} chars")
+        if streamed is not None and mammoth_text is not None:
+            print(f"outputs match: {streamed.strip() == mammoth_text.strip()}")
+    finally:
+        if cleanup:
+            os.remove(path)
+
+
+def build_sample_text(size_mb: int = 5) -> str:
+    """Build a manuscript of roughly `size_mb` MB with chapters, dialogue and a few accents"""
+    paragraph = SAMPLE_PARAGRAPH + " Café déjà vu — “quiet” evenings…"
+    chapter = "\n\n".join([paragraph] * 200)
+    chapters = []
+    while sum(len(c) for c in chapters) < size_mb * 1024 * 1024:
+        chapters.append(f"Chapter {len(chapters) + 1}\n\n{chapter}")
+    return "\n\n".join(chapters)
+
+
+def legacy_text_stats(content: str) -> dict:
+    """The previous multi-pass validation stats, kept for comparison"""
+    return {
+        'character_count': len(content),
+        'word_count': len(content.split()),
+        'paragraph_count': len(content.split('\n\n')),
+        'line_count': len(content.split('\n')),
+        'alpha_chars': sum(1 for c in content if c.isalpha()),
+    }
+
+
+def bench_validation(path: str = None):
+    """Compare single-pass manuscript analytics against the old split()/isalpha() loop"""
+    from services import text_analytics
+
+    if path:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            content = f.read()
+    else:
+        content = build_sample_text()
+
+    print(f"Manuscript: {len(content.encode('utf-8')) / (1024 * 1024):.1f} MB, numpy={text_analytics.NUMPY_AVAILABLE}")
+    legacy = measure("legacy multi-pass", legacy_text_stats, content)
+    stats = measure("analyze_text", text_analytics.analyze_text, content)
+
+    if text_analytics.NUMPY_AVAILABLE:
+        measure("byte-scan fallback", text_analytics._analyze_bytes, content)
+
+    print(f"stats: {stats}")
+    for key in ('character_count', 'word_count', 'paragraph_count', 'line_count'):
+        print(f"{key} matches: {legacy[key] == stats[key]}")
+
+
+def legacy_chunk_text(text: str, max_chunk_size: int = 5000) -> list:
+    """The previous '. '-splitting TTS chunker, kept for comparison"""
+    sentences = text.split('. ')
+    chunks = []
+    current_chunk = ""
+
+    for sentence in sentences:
+        if len(current_chunk) + len(sentence) + 2 <= max_chunk_size:
+            current_chunk = current_chunk + ". " + sentence if current_chunk else sentence
+        else:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = sentence
+
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+
+    return chunks
+
+
+def describe_chunks(label: str, chunks: list, limit: int):
+    lengths = [len(chunk) for chunk in chunks]
+    unterminated = sum(1 for chunk in chunks if not chunk.rstrip('"\')”’').endswith(('.', '!', '?', '…')))
+    print(f"{label:<28} {len(chunks):6d} chunks  max {max(lengths, default=0):6d} chars  "
+          f"over limit {sum(1 for n in lengths if n > limit)}  mid-sentence ends {unterminated}")
+
+
+def bench_segmenter(path: str = None):
+    """Compare structure-index sentence chunking against the old '. ' splitter on a full novel"""
+    from services.structure_index import StructureIndex
+    from services.sentence_segmenter import audio_seconds_measure
+
+    if path:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            content = f.read()
+    else:
+        # ~100k words, about the length of a full novel
+        content = build_sample_text(1)[:600_000]
+
+    print(f"Novel: {len(content.split()):,} words, {len(content):,} chars")
+    limit = 5000
+
+    legacy = measure("legacy '. ' chunker", legacy_chunk_text, content, limit)
+    structure = measure("segment + index", StructureIndex.build, content)
+    chunks = measure("pack sentences (chars)", structure.chunk_text, content, 'sentence', limit)
+    timed = measure("pack sentences (30s)", structure.chunk_text, content, 'sentence', 30,
+                    audio_seconds_measure(0.06))
+
+    print(f"sentences: {len(structure.sentence_starts):,}")
+    describe_chunks("legacy '. ' chunker", legacy, limit)
+    describe_chunks("sentence chunks (chars)", chunks, limit)
+    describe_chunks("sentence chunks (30s)", timed, 500)
+
+
+def legacy_mock_translation(text: str, glossary: dict) -> str:
+    """The old mock path: lowercase the book, then one full-text str.replace per entry"""
+    translated = text.lower()
+    for source, target in glossary.items():
+        translated = translated.replace(source, target)
+    return translated
+
+
+def build_lexicon_text(size_mb: int = 5, vocabulary: int = 30000, seed: int = 7):
+    """Text with a novel-sized vocabulary and Zipf-like word frequencies; returns (text, lexicon)"""
+    import random
+
+    rng = random.Random(seed)
+    letters = 'etaoinshrdlucmfwypvbgkjqxz'
+    lexicon = list(dict.fromkeys(
+        ''.join(rng.choice(letters[:20 if i % 4 else 26]) for _ in range(rng.randint(2, 11)))
+        for i in range(vocabulary * 2)
+    ))[:vocabulary]
+    weights = [1 / (rank + 1) for rank in range(len(lexicon))]
+
+    sentences = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        words = rng.choices(lexicon, weights, k=rng.randint(6, 24))
+        sentence = ' '.join(words).capitalize() + '.'
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return ' '.join(sentences), lexicon
+
+
+def bench_translation(path: str = None):
+    """Compare the compiled glossary translator against per-entry str.replace on a large book"""
+    import random
+    from services.glossary_translator import GlossaryTranslator
+
+    if path:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            content = f.read()
+        lexicon = sorted(set(content.lower().split()))
+    else:
+        content, lexicon = build_lexicon_text(5)
+
+    # A glossary size typical of a local DeepL stand-in
+    glossary = {word: word[::-1] for word in random.Random(7).sample(lexicon, min(5000, len(lexicon)))}
+
+    print(f"Book: {len(content):,} chars, glossary: {len(glossary):,} entries")
+    measure("legacy str.replace per entry", legacy_mock_translation, content, glossary)
+    translator = measure("compile glossary", GlossaryTranslator, glossary)
+    measure("compiled single pass", translator.translate, content)
+
+
+BENCHMARKS = {
+    'docx': bench_docx,
+    'validation': bench_validation,
+    'segmenter': bench_segmenter,
+    'translation': bench_translation,
+}
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    parser = argparse.ArgumentParser(description="Backend performance benchmarks")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('path', nargs='?', help="Input file (a sample is generated when omitted)")
+    args = parser.parse_args()
+
+    BENCHMARKS[args.benchmark](args.path)
@@ -1,8 +1,12 @@
-from fastapi import FastAPI, APIRouter, HTTPException, File, UploadFile, Depends, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks, Header, Request
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
+import json
+import time
+import asyncio
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -10,8 +14,10 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import uuid
 import asyncpg
+import aiofiles
 from contextlib import asynccontextmanager
 import stripe
+import base64
 import hashlib
 import secrets
 from jose import JWTError, jwt
@@ -45,6 +51,24 @@ class ProjectCreate(BaseModel):
     target_language: Optional[str] = "en"
     voice_style: Optional[str] = "neutral"
 
+class CoverArtCreate(BaseModel):
+    title: str
+    genre: str = "ebook"
+    description: Optional[str] = ""
+    style: Optional[str] = "professional"
+    num_variants: Optional[int] = 4
+    draft: Optional[bool] = False
+
+class TranslationJobCreate(BaseModel):
+    target_languages: List[str]
+    source_language: Optional[str] = None
+
+class AudiobookCreate(BaseModel):
+    voice_style: Optional[str] = "narrator"
+    speed: Optional[float] = 1.0
+    language: Optional[str] = None
+    output_format: Optional[str] = None
+
 # Professional AI services now handled by dedicated AI service module
 
 class SimplifiedFileService:
@@ -64,6 +88,14 @@ load_dotenv(ROOT_DIR / '.env')
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY", secrets.token_urlsafe(32))
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
+AUDIO_STREAM_TOKEN_EXPIRE_MINUTES = 720  # Signed <audio src> URLs
+
+# Authenticated users are cached briefly so each request doesn't spend a pool checkout on identity
+USER_CACHE_TTL_SECONDS = float(os.environ.get("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get("USER_CACHE_MAX_ENTRIES", "10000"))
+
+# Book bodies are stored outside the projects row, split into chunks of this many characters
+PROJECT_CONTENT_CHUNK_CHARS = int(os.environ.get("PROJECT_CONTENT_CHUNK_CHARS", "65536"))
 
 # Initialize Stripe
 stripe.api_key = os.environ.get("STRIPE_SECRET_KEY")
@@ -86,8 +118,11 @@ async def lifespan(app: FastAPI):
         min_size=1,
         max_size=10
     )
+    file_service.start_retention_sweeper()
     yield
     # Shutdown
+    await file_service.stop_retention_sweeper()
+    file_service.shutdown()
     await db_pool.close()
 
 # Create FastAPI app with lifespan
@@ -134,9 +169,17 @@ logger = logging.getLogger(__name__)
 
 # Initialize services
 from services.ai_service import AIService
-from services.file_service import FileService
+from services.file_service import FileService, EXTRACTOR_VERSION
+from services.image_service import ImageService
+from services.audio_service import AudioService
+from services.translation_service import TranslationService
+from services.structure_index import StructureIndex, STRUCTURE_INDEX_VERSION
+from services.language_id import identify_language
 ai_service = AIService()
 file_service = FileService()
+image_service = ImageService()
+audio_service = AudioService()
+translation_service = TranslationService()
 
 # Security
 security = HTTPBearer(auto_error=False)
@@ -168,6 +211,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# user_id -> (expires_at, user row); explicitly invalidated when a user row changes
+_user_cache: Dict[str, tuple] = {}
+
+def invalidate_cached_user(user_id) -> None:
+    """Drop a user from the identity cache after their row changed"""
+    _user_cache.pop(str(user_id), None)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user from verified JWT token"""
     if not credentials:
@@ -179,6 +229,10 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         user_id: str = payload.get("sub")
         if user_id is None:
             return None
+        
+        cached = _user_cache.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
             
         # Get user from database
         async with db_pool.acquire() as conn:
@@ -186,7 +240,14 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 "SELECT * FROM users WHERE id = $1",
                 user_id
             )
-            return user
+        
+        if user:
+            if len(_user_cache) >= USER_CACHE_MAX_ENTRIES:
+                # Oldest insertions first
+                for stale_id in list(_user_cache)[:len(_user_cache) // 10 + 1]:
+                    _user_cache.pop(stale_id, None)
+            _user_cache[user_id] = (time.monotonic() + USER_CACHE_TTL_SECONDS, user)
+        return user
             
     except JWTError as e:
         logger.error(f"JWT verification failed: {e}")
@@ -195,6 +256,26 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         logger.error(f"Error getting current user: {e}")
         return None
 
+async def get_token_identity(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Identity from the signed token alone, without loading the user row
+    
+    For read-only endpoints whose queries are scoped by user id anyway (progress
+    polling). The tier claim reflects login time; use get_current_user where the
+    current subscription matters.
+    """
+    if not credentials:
+        return None
+    
+    try:
+        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError as e:
+        logger.error(f"JWT verification failed: {e}")
+        return None
+    
+    if payload.get("sub") is None:
+        return None
+    return {"id": payload["sub"], "subscription_tier": payload.get("tier")}
+
 # ============================================================================
 # AUTHENTICATION ENDPOINTS
 # ============================================================================
@@ -220,7 +301,7 @@ async def register_user(user_data: UserCreate):
             )
             
             # Create JWT token
-            access_token = create_access_token(data={"sub": user_id})
+            access_token = create_access_token(data={"sub": user_id, "tier": "free"})
             
             return TokenResponse(
                 access_token=access_token,
@@ -251,7 +332,7 @@ async def login_user(login_data: UserLogin):
                 raise HTTPException(status_code=401, detail="Invalid credentials")
             
             # Create JWT token
-            access_token = create_access_token(data={"sub": str(user["id"])})
+            access_token = create_access_token(data={"sub": str(user["id"]), "tier": user["subscription_tier"]})
             
             return TokenResponse(
                 access_token=access_token,
@@ -273,27 +354,93 @@ async def login_user(login_data: UserLogin):
 # ============================================================================
 
 @api_router.post("/files/upload")
-async def upload_file(file: UploadFile = File(...), current_user = Depends(get_current_user)):
-    """Upload and process document file with proper validation"""
+async def upload_file(request: Request, background_tasks: BackgroundTasks, current_user = Depends(get_current_user)):
+    """Upload and process document file with proper validation
+    
+    Expects multipart/form-data with a `file` field. The body is read here rather
+    than through UploadFile so oversized uploads are rejected before they are received.
+    """
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
     
     try:
-        # Read file content
-        content = await file.read()
+        content_length = request.headers.get("content-length")
+        content_length = int(content_length) if content_length and content_length.isdigit() else None
+        
+        # Stream the body to disk in chunks; FileService hashes it and enforces the size limit
+        try:
+            spooled = await file_service.spool_multipart_upload(
+                request.stream(), request.headers.get("content-type", ""), content_length
+            )
+        except Exception as e:
+            logger.error(f"File upload failed: {e}")
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Use FileService to handle upload and text extraction
-        result = await file_service.save_uploaded_file(content, file.filename, file.content_type)
+        filename, content_type = spooled['filename'], spooled['content_type']
+        
+        # Repeat uploads of the same manuscript return the stored extraction without re-parsing
+        cached = await find_cached_upload(spooled['sha256'])
+        if cached:
+            logger.info(f"Upload {spooled['sha256'][:12]} matched a previous extraction, skipping re-parse")
+            
+            stored_filename = cached['filename']
+            same_owner = str(cached["user_id"]) == str(current_user["id"])
+            if same_owner and await file_service.retain_upload(cached['upload_path'], spooled['sha256']):
+                file_service.discard_spooled_upload(spooled['temp_path'])
+            else:
+                # Another user's file expires on their schedule; keep this upload as the new owner's own copy
+                stored_filename, stored_path = await file_service.store_spooled_upload(spooled, filename)
+                await file_service.retain_upload(stored_path, spooled['sha256'])
+                await record_file_upload(current_user["id"], filename, content_type, {
+                    'filename': stored_filename,
+                    'file_size': spooled['file_size'],
+                    'file_path': stored_path,
+                    'sha256': spooled['sha256'],
+                    'extracted_text': cached['extracted_text'],
+                    'word_count': cached['word_count'],
+                    'paragraph_count': cached['paragraph_count'],
+                    'stats': cached['stats']
+                })
+            
+            return {
+                "filename": stored_filename,
+                "file_size": cached['file_size'],
+                "content_type": cached['content_type'],
+                "extracted_text": cached['extracted_text'],
+                "word_count": cached['word_count'],
+                "paragraph_count": cached['paragraph_count'],
+                "language": identify_language(cached['extracted_text'] or '')['language'],
+                "sha256": spooled['sha256'],
+                "deduplicated": True
+            }
+        
+        result = await file_service.save_spooled_upload(spooled, filename, content_type)
         
         if not result['success']:
             raise HTTPException(status_code=400, detail=result['error'])
         
+        if result['extraction_complete'] and not result['extraction_failed']:
+            await record_file_upload(current_user["id"], filename, content_type, result)
+        elif not result['extraction_failed']:
+            # Large PDF: only the first pages were returned. Record the upload now so its owner can
+            # page through it while indexing runs, and cache the full text once indexing finishes
+            upload_id = await record_file_upload(current_user["id"], filename, content_type,
+                                                 {**result, 'extracted_text': None})
+            if upload_id:
+                background_tasks.add_task(record_file_upload_when_indexed, upload_id, result)
+        
         return {
             "filename": result['filename'],
             "file_size": result['file_size'],
             "content_type": result['content_type'],
             "extracted_text": result['extracted_text'],
-            "word_count": result['word_count']
+            "word_count": result['word_count'],
+            "paragraph_count": result['paragraph_count'],
+            "language": result['stats'].get('language'),
+            "sha256": result['sha256'],
+            "page_count": result['page_count'],
+            "extraction_complete": result['extraction_complete'],
+            "deduplicated": False
         }
         
     except HTTPException:
@@ -302,6 +449,93 @@ async def upload_file(file: UploadFile = File(...), current_user = Depends(get_c
         logger.error(f"File upload failed: {e}")
         raise HTTPException(status_code=500, detail="File upload failed")
 
+async def find_cached_upload(sha256: str):
+    """Look up a previous extraction of the same file content"""
+    try:
+        async with db_pool.acquire() as conn:
+            return await conn.fetchrow(
+                """SELECT user_id, filename, file_size, content_type, extracted_text, word_count,
+                   paragraph_count, stats, upload_path
+                   FROM file_uploads WHERE sha256 = $1 AND extractor_version = $2 AND extracted_text IS NOT NULL
+                   ORDER BY created_at DESC LIMIT 1""",
+                sha256, EXTRACTOR_VERSION
+            )
+    except Exception as e:
+        logger.error(f"Upload cache lookup failed: {e}")
+        return None
+
+async def record_file_upload(user_id, original_filename: str, content_type: str, result: Dict[str, Any]):
+    """Store an extraction result against the file's content hash, returning the new row's id"""
+    stats = result.get('stats') or {}
+    if not isinstance(stats, str):
+        stats = json.dumps(stats)
+    
+    try:
+        async with db_pool.acquire() as conn:
+            return await conn.fetchval(
+                """INSERT INTO file_uploads (user_id, filename, original_filename, file_size, content_type,
+                   extracted_text, word_count, paragraph_count, stats, sha256, upload_path, extractor_version)
+                   VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9::jsonb, $10, $11, $12) RETURNING id""",
+                user_id, result['filename'], original_filename, result['file_size'], content_type,
+                result['extracted_text'], result['word_count'], result['paragraph_count'],
+                stats, result['sha256'], result['file_path'], EXTRACTOR_VERSION
+            )
+    except Exception as e:
+        logger.error(f"Failed to record file upload: {e}")
+        return None
+
+async def record_file_upload_when_indexed(upload_id, result: Dict[str, Any]):
+    """Wait for a large PDF's page index to finish, then cache its full extraction on the upload row"""
+    try:
+        full_range = await file_service.get_page_range(result['sha256'], 1, result['page_count'], wait=True)
+        if not full_range or not full_range['complete']:
+            logger.error(f"Page index for {result['sha256'][:12]} did not complete, not caching extraction")
+            return
+        
+        extracted_text = '\n\n'.join(full_range['pages'])
+        validation = await file_service.validate_text_content(extracted_text)
+        async with db_pool.acquire() as conn:
+            await conn.execute(
+                """UPDATE file_uploads SET extracted_text = $1, word_count = $2, paragraph_count = $3,
+                   stats = $4::jsonb WHERE id = $5""",
+                extracted_text, validation['stats']['word_count'], validation['stats']['paragraph_count'],
+                json.dumps(validation['stats']), upload_id
+            )
+    except Exception as e:
+        logger.error(f"Failed to cache indexed extraction: {e}")
+
+@api_router.get("/files/{sha256}/pages")
+async def get_file_pages(sha256: str, start: int = 1, end: int = 10, wait: bool = False,
+                         current_user = Depends(get_current_user)):
+    """Get text for a page range of an uploaded PDF from its page index"""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    if start < 1 or end < start:
+        raise HTTPException(status_code=400, detail="Invalid page range")
+    
+    try:
+        # Page indexes are shared by content hash; only users who uploaded the file may read them
+        async with db_pool.acquire() as conn:
+            owned = await conn.fetchval(
+                "SELECT 1 FROM file_uploads WHERE sha256 = $1 AND user_id = $2 LIMIT 1",
+                sha256, current_user["id"]
+            )
+        if not owned:
+            raise HTTPException(status_code=404, detail="Page index not found")
+        
+        page_range = await file_service.get_page_range(sha256, start, end, wait=wait)
+        if not page_range:
+            raise HTTPException(status_code=404, detail="Page index not found")
+        
+        return page_range
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get file pages: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve pages")
+
 @api_router.get("/files/supported-types")
 async def get_supported_file_types():
     """Get supported file types"""
@@ -340,18 +574,19 @@ async def create_project(project_data: ProjectCreate, current_user = Depends(get
         if not constraints:
             raise HTTPException(status_code=400, detail="Invalid genre")
         
-        async with db_pool.acquire() as conn:
+        async with db_pool.acquire() as conn, conn.transaction():
             await conn.execute(
-                """INSERT INTO projects (id, user_id, title, author, description, genre, content, 
+                """INSERT INTO projects (id, user_id, title, author, description, genre, 
                    page_size, min_pages, max_pages, target_language, include_images, voice_style)
-                   VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)""",
+                   VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)""",
                 project_id, current_user["id"], project_data.title,
                 project_data.author, project_data.description,
-                project_data.genre, project_data.content, constraints["page_size"],
+                project_data.genre, constraints["page_size"],
                 constraints["min_pages"], constraints["max_pages"],
                 project_data.target_language, constraints["include_images"],
                 project_data.voice_style
             )
+            await store_project_content(conn, project_id, "content", project_data.content or "")
             
         return {"project_id": project_id, "status": "created"}
         
@@ -368,7 +603,7 @@ async def get_user_projects(current_user = Depends(get_current_user)):
     try:
         async with db_pool.acquire() as conn:
             projects = await conn.fetch(
-                "SELECT * FROM projects WHERE user_id = $1 ORDER BY created_at DESC",
+                f"SELECT {PROJECT_SUMMARY_COLUMNS} FROM projects WHERE user_id = $1 ORDER BY created_at DESC",
                 current_user["id"]
             )
             
@@ -378,6 +613,81 @@ async def get_user_projects(current_user = Depends(get_current_user)):
         logger.error(f"Failed to get projects: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve projects")
 
+PROJECT_SUMMARY_COLUMNS = """id, title, author, description, genre, status, progress, target_language, cover_image_url,
+                              audio_file_url, pdf_url, word_count, created_at, updated_at"""
+PROJECT_SUMMARY_MAX_LIMIT = 100
+
+def encode_project_cursor(created_at: datetime, project_id) -> str:
+    """Opaque keyset cursor for the (created_at, id) position of a project"""
+    raw = json.dumps([created_at.isoformat(), str(project_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_project_cursor(cursor: str):
+    try:
+        created_at, project_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(uuid.UUID(project_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@api_router.get("/projects/summary")
+async def get_user_project_summaries(limit: int = 20, cursor: Optional[str] = None, status: Optional[str] = None,
+                                     current_user = Depends(get_current_user)):
+    """Dashboard listing: summary columns only, newest first, keyset-paginated on (created_at, id)
+    
+    Pass `next_cursor` back as `cursor` for the following page. Per-status
+    counts are returned with the first page.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    limit = max(1, min(limit, PROJECT_SUMMARY_MAX_LIMIT))
+    conditions = ["user_id = $1"]
+    params: List[Any] = [current_user["id"]]
+    
+    if status:
+        params.append(status)
+        conditions.append(f"status = ${len(params)}")
+    if cursor:
+        created_at, project_id = decode_project_cursor(cursor)
+        params.extend([created_at, project_id])
+        conditions.append(f"(created_at, id) < (${len(params) - 1}, ${len(params)}::uuid)")
+    
+    try:
+        async with db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""SELECT {PROJECT_SUMMARY_COLUMNS} FROM projects
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY created_at DESC, id DESC LIMIT {limit + 1}""",
+                *params
+            )
+            
+            status_counts = None
+            if not cursor:
+                counts = await conn.fetch(
+                    "SELECT status, COUNT(*) AS count FROM projects WHERE user_id = $1 GROUP BY status",
+                    current_user["id"]
+                )
+                status_counts = {row["status"]: row["count"] for row in counts}
+        
+        projects = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = projects[-1]
+            next_cursor = encode_project_cursor(last["created_at"], last["id"])
+        
+        return {
+            "projects": projects,
+            "next_cursor": next_cursor,
+            "status_counts": status_counts,
+            "total": sum(status_counts.values()) if status_counts is not None else None
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get project summaries: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve projects")
+
 @api_router.get("/projects/detail/{project_id}")
 async def get_project_detail(project_id: str, current_user = Depends(get_current_user)):
     """Get detailed project information including generated content"""
@@ -394,7 +704,17 @@ async def get_project_detail(project_id: str, current_user = Depends(get_current
             if not project:
                 raise HTTPException(status_code=404, detail="Project not found")
             
-            return dict(project)
+            project = dict(project)
+            project["content"] = await load_project_content(conn, project, "content")
+            project["generated_content"] = await load_project_content(conn, project, "generated")
+            # <audio> elements can't send the bearer token, so the stream URL carries a scoped one
+            if (project.get("audio_file_url") or "").startswith("/api/audio/stream/"):
+                project["audio_file_url"] = f"{project['audio_file_url']}?token={create_audio_stream_token(project_id)}"
+            # HLS playlist that grows while an audiobook is still being synthesized
+            if audio_service.has_playlist(project_id):
+                project["audio_playlist_url"] = (f"/api/audio/stream/{project_id}/playlist.m3u8"
+                                                 f"?token={create_audio_stream_token(project_id)}")
+            return project
             
     except HTTPException:
         raise
@@ -402,6 +722,39 @@ async def get_project_detail(project_id: str, current_user = Depends(get_current
         logger.error(f"Failed to get project detail: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve project details")
 
+async def get_structure_index(project_id: str, text: str) -> StructureIndex:
+    """Load the project's structure index for this exact text, building and storing it on a miss"""
+    content_sha256 = StructureIndex.content_hash(text)
+    
+    try:
+        async with db_pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """SELECT index_data FROM project_structure_index
+                   WHERE project_id = $1 AND content_sha256 = $2 AND version = $3""",
+                project_id, content_sha256, STRUCTURE_INDEX_VERSION
+            )
+        if row:
+            index_data = row['index_data']
+            return StructureIndex.from_dict(json.loads(index_data) if isinstance(index_data, str) else index_data)
+    except Exception as e:
+        logger.error(f"Structure index lookup failed for project {project_id}: {e}")
+    
+    structure = await asyncio.to_thread(StructureIndex.build, text)
+    
+    try:
+        async with db_pool.acquire() as conn:
+            await conn.execute(
+                """INSERT INTO project_structure_index (project_id, content_sha256, version, index_data)
+                   VALUES ($1, $2, $3, $4::jsonb)
+                   ON CONFLICT (project_id) DO UPDATE SET content_sha256 = EXCLUDED.content_sha256,
+                   version = EXCLUDED.version, index_data = EXCLUDED.index_data, created_at = NOW()""",
+                project_id, content_sha256, STRUCTURE_INDEX_VERSION, json.dumps(structure.to_dict())
+            )
+    except Exception as e:
+        logger.error(f"Failed to store structure index for project {project_id}: {e}")
+    
+    return structure
+
 # ============================================================================
 # AI GENERATION ENDPOINTS
 # ============================================================================
@@ -420,34 +773,37 @@ async def generate_book_from_prompt(request: Dict[str, Any], background_tasks: B
         length = request.get("length", "medium")
         uploaded_content = request.get("uploaded_content")  # For audiobooks with uploaded manuscripts
         
-        async with db_pool.acquire() as conn:
+        async with db_pool.acquire() as conn, conn.transaction():
             if project_id:
                 # Update existing project to processing status
                 content_to_store = uploaded_content if uploaded_content else prompt
                 result = await conn.execute(
-                    """UPDATE projects SET status = $1, content = $2 
-                       WHERE id = $3 AND user_id = $4""",
-                    "processing", content_to_store, project_id, current_user["id"]
+                    """UPDATE projects SET status = $1 
+                       WHERE id = $2 AND user_id = $3""",
+                    "processing", project_id, current_user["id"]
                 )
                 if result == "UPDATE 0":
                     raise HTTPException(status_code=404, detail="Project not found or access denied")
+                await store_project_content(conn, project_id, "content", content_to_store)
             else:
                 # Create new project if no project_id provided
                 project_id = str(uuid.uuid4())
                 constraints = get_genre_constraints(genre)
                 content_to_store = uploaded_content if uploaded_content else prompt
                 await conn.execute(
-                    """INSERT INTO projects (id, user_id, title, genre, content, status, 
+                    """INSERT INTO projects (id, user_id, title, genre, status, 
                        page_size, min_pages, max_pages, target_language)
-                       VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)""",
+                       VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)""",
                     project_id, current_user["id"], f"Generated {genre.title()}", genre,
-                    content_to_store, "processing", constraints["page_size"], constraints["min_pages"],
+                    "processing", constraints["page_size"], constraints["min_pages"],
                     constraints["max_pages"], request.get("target_language", "en")
                 )
+                await store_project_content(conn, project_id, "content", content_to_store)
         
         # Start background generation with appropriate content
         content_for_generation = uploaded_content if uploaded_content else prompt
-        background_tasks.add_task(generate_book_background, project_id, content_for_generation, genre, length)
+        background_tasks.add_task(generate_book_background, project_id, content_for_generation, genre, length,
+                                  bool(request.get("illustrate", False)))
         
         return {"project_id": project_id, "status": "processing", "message": "Book generation started"}
         
@@ -455,7 +811,7 @@ async def generate_book_from_prompt(request: Dict[str, Any], background_tasks: B
         logger.error(f"Book generation failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to start book generation")
 
-async def generate_book_background(project_id: str, prompt: str, genre: str, length: str):
+async def generate_book_background(project_id: str, prompt: str, genre: str, length: str, illustrate: bool = False):
     """Background task for book generation"""
     logger.info(f"🚀 BACKGROUND TASK STARTED: project_id={project_id}, genre={genre}, length={length}")
     
@@ -467,7 +823,7 @@ async def generate_book_background(project_id: str, prompt: str, genre: str, len
         # Generate content using AI service with guaranteed fallback
         try:
             logger.info(f"🤖 Calling AI service for project {project_id}")
-            content = await ai_service.generate_book_from_prompt(prompt, genre, length)
+            content = await ai_service.generate_book_from_prompt(prompt, genre, length, illustrate=illustrate)
             logger.info(f"✅ AI service returned {len(content.split()) if content else 0} words for project {project_id}")
         except Exception as ai_error:
             logger.error(f"AI service failed for project {project_id}: {ai_error}. Using guaranteed fallback...")
@@ -582,13 +938,17 @@ Their wonderful adventure taught them that the world is full of beauty and magic
 Their adventure showed them that the greatest treasures in life are the friendships we make and the kindness we share with others.'''
         
         # Update project with generated content
-        async with db_pool.acquire() as conn:
+        async with db_pool.acquire() as conn, conn.transaction():
+            await store_project_content(conn, project_id, "generated", content)
             await conn.execute(
-                """UPDATE projects SET generated_content = $1, status = $2, progress = $3,
-                   word_count = $4, updated_at = $5 WHERE id = $6""",
-                content, "completed", 100, len(content.split()),
+                """UPDATE projects SET status = $1, progress = $2,
+                   word_count = $3, updated_at = $4 WHERE id = $5""",
+                "completed", 100, len(content.split()),
                 datetime.utcnow(), project_id
             )
+        
+        # Index chapters, pages, paragraphs and sentences once so later stages don't rescan the book
+        await get_structure_index(project_id, content)
             
         await update_project_progress(project_id, 100, "Book generation completed", "completed")
         
@@ -596,6 +956,423 @@ Their adventure showed them that the greatest treasures in life are the friendsh
         logger.error(f"Background book generation failed: {e}")
         await update_project_progress(project_id, 0, f"Generation failed: {str(e)}", "failed")
 
+# ============================================================================
+# IMAGE GENERATION ENDPOINTS
+# ============================================================================
+
+@api_router.post("/images/generate-cover")
+async def generate_cover_art(request: CoverArtCreate, current_user = Depends(get_current_user)):
+    """Generate book cover art, paging through cached variants on regenerate"""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    try:
+        return await image_service.generate_cover_art(
+            title=request.title,
+            genre=request.genre,
+            description=request.description or "A compelling book cover",
+            style=request.style or "professional",
+            num_variants=request.num_variants,
+            draft=bool(request.draft),
+            user_id=current_user["id"]
+        )
+        
+    except Exception as e:
+        logger.error(f"Cover art generation failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to generate cover art")
+
+# ============================================================================
+# AUDIO ENDPOINTS
+# ============================================================================
+
+AUDIO_MEDIA_TYPES = {'.mp3': 'audio/mpeg', '.m4b': 'audio/mp4'}
+
+@api_router.post("/audio/generate-audiobook/{project_id}")
+async def generate_audiobook(project_id: str, background_tasks: BackgroundTasks,
+                             request: Optional[AudiobookCreate] = None, current_user = Depends(get_current_user)):
+    """Start audiobook generation for a project"""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    request = request or AudiobookCreate()
+    
+    try:
+        async with db_pool.acquire() as conn:
+            project = await conn.fetchrow(
+                f"""SELECT id, {PROJECT_CONTENT_POINTER_COLUMNS}, target_language, voice_style
+                    FROM projects WHERE id = $1 AND user_id = $2""",
+                project_id, current_user["id"]
+            )
+            
+            if not project:
+                raise HTTPException(status_code=404, detail="Project not found")
+            
+            content = await load_book_text(conn, project)
+        
+        if not content or not content.strip():
+            raise HTTPException(status_code=400, detail="Project has no content to narrate")
+        
+        # Audiobook progress lives on its own job row so the book's status is left alone
+        job_id = await create_processing_job(project_id, "audio_generation")
+        
+        background_tasks.add_task(
+            generate_audiobook_background,
+            job_id,
+            project_id,
+            content,
+            request.language or project["target_language"] or "en",
+            request.voice_style or project["voice_style"] or "narrator",
+            request.speed or 1.0,
+            request.output_format
+        )
+        
+        return {
+            "message": "Audiobook generation started",
+            "project_id": project_id,
+            "job_id": job_id,
+            "status": "processing"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Audiobook generation failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to start audiobook generation")
+
+async def generate_audiobook_background(job_id: str, project_id: str, content: str, language: str, voice_style: str,
+                                        speed: float, output_format: Optional[str]):
+    """Background task for audiobook generation, reporting progress on its processing_jobs row"""
+    try:
+        async def progress_callback(message: str, progress: int):
+            await update_job_progress(job_id, progress, "processing")
+        
+        structure = await get_structure_index(project_id, content)
+        result = await audio_service.generate_audiobook(
+            project_id=project_id,
+            content=content,
+            language=language,
+            voice_style=voice_style,
+            speed=speed,
+            progress_callback=progress_callback,
+            structure_index=structure,
+            output_format=output_format
+        )
+        
+        async with db_pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE projects SET audio_file_url = $1, updated_at = $2 WHERE id = $3",
+                result['audiobook_url'], datetime.utcnow(), project_id
+            )
+        
+        await update_job_progress(job_id, 100, "completed", result_data={
+            key: result.get(key) for key in ('audiobook_url', 'playlist_url', 'format', 'total_duration',
+                                             'chunks_count', 'reused_chunks', 'synthesized_chunks')
+        })
+        
+    except Exception as e:
+        logger.error(f"Background audiobook generation failed: {e}")
+        await update_job_progress(job_id, 0, "failed", error_message=f"Audiobook generation failed: {str(e)}")
+
+def create_audio_stream_token(project_id: str) -> str:
+    """Short-lived token that only grants streaming one project's audio"""
+    return create_access_token(
+        {"scope": "audio_stream", "project_id": str(project_id)},
+        expires_delta=timedelta(minutes=AUDIO_STREAM_TOKEN_EXPIRE_MINUTES)
+    )
+
+async def authorize_audio_stream(project_id: str, current_user, token: Optional[str]) -> bool:
+    """Allow the project's owner (bearer auth) or a matching stream token"""
+    if current_user:
+        async with db_pool.acquire() as conn:
+            owner = await conn.fetchval("SELECT user_id FROM projects WHERE id = $1", project_id)
+        return owner is not None and str(owner) == str(current_user["id"])
+    
+    if token:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return False
+        return payload.get("scope") == "audio_stream" and payload.get("project_id") == project_id
+    
+    return False
+
+def parse_byte_range(range_header: str, file_size: int):
+    """Parse a single 'bytes=start-end' range into inclusive offsets"""
+    try:
+        unit, _, spec = range_header.partition("=")
+        if unit.strip() != "bytes" or "," in spec:
+            raise ValueError
+        
+        start_text, _, end_text = spec.strip().partition("-")
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else file_size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(file_size - int(end_text), 0)
+            end = file_size - 1
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Invalid Range header",
+                            headers={"Content-Range": f"bytes */{file_size}"})
+    
+    end = min(end, file_size - 1)
+    if start > end or start >= file_size:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={"Content-Range": f"bytes */{file_size}"})
+    return start, end
+
+async def iter_file_range(path: str, start: int, end: int, block_size: int = 256 * 1024):
+    """Yield bytes start..end (inclusive) of a file without reading it all into memory"""
+    async with aiofiles.open(path, 'rb') as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = await f.read(min(block_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+def audio_file_response(path: str, range_header: Optional[str]):
+    """Stream an audio file, honouring a Range header so players can seek"""
+    file_size = os.path.getsize(path)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'inline; filename="{os.path.basename(path)}"'
+    }
+    media_type = AUDIO_MEDIA_TYPES.get(Path(path).suffix, "application/octet-stream")
+    
+    if not range_header or not file_size:
+        headers["Content-Length"] = str(file_size)
+        return StreamingResponse(iter_file_range(path, 0, file_size - 1), media_type=media_type, headers=headers)
+    
+    start, end = parse_byte_range(range_header, file_size)
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(iter_file_range(path, start, end), status_code=206,
+                             media_type=media_type, headers=headers)
+
+@api_router.get("/audio/stream/{project_id}")
+async def stream_audiobook(project_id: str, token: Optional[str] = None,
+                           range_header: Optional[str] = Header(None, alias="Range"),
+                           current_user = Depends(get_current_user)):
+    """Stream the assembled audiobook"""
+    if not await authorize_audio_stream(project_id, current_user, token):
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    path = audio_service.get_audiobook_path(project_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Audiobook not found")
+    
+    return audio_file_response(path, range_header)
+
+@api_router.get("/audio/stream/{project_id}/playlist.m3u8")
+async def stream_audiobook_playlist(project_id: str, token: Optional[str] = None,
+                                    current_user = Depends(get_current_user)):
+    """HLS playlist of the chunks synthesized so far, in book order; ends once the book is done"""
+    if not await authorize_audio_stream(project_id, current_user, token):
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    playlist = await audio_service.get_playlist(project_id)
+    if playlist is None:
+        raise HTTPException(status_code=404, detail="Audiobook playlist not found")
+    
+    # Segment requests from the player carry the same stream token
+    if token:
+        playlist = "".join(
+            f"{line}?token={token}\n" if line.startswith("segment/") else f"{line}\n"
+            for line in playlist.splitlines()
+        )
+    
+    return Response(content=playlist, media_type="application/vnd.apple.mpegurl",
+                    headers={"Cache-Control": "no-cache"})
+
+@api_router.get("/audio/stream/{project_id}/segment/{cache_key}.mp3")
+async def stream_audiobook_segment(project_id: str, cache_key: str, token: Optional[str] = None,
+                                   range_header: Optional[str] = Header(None, alias="Range"),
+                                   current_user = Depends(get_current_user)):
+    """One synthesized chunk listed in the project's playlist"""
+    if not await authorize_audio_stream(project_id, current_user, token):
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    playlist = await audio_service.get_playlist(project_id)
+    path = audio_service.get_segment_path(cache_key)
+    if not playlist or f"segment/{cache_key}.mp3" not in playlist or not path:
+        raise HTTPException(status_code=404, detail="Audio segment not found")
+    
+    return audio_file_response(path, range_header)
+
+# ============================================================================
+# TRANSLATION ENDPOINTS
+# ============================================================================
+
+@api_router.post("/projects/{project_id}/translations")
+async def create_project_translations(project_id: str, request: TranslationJobCreate, background_tasks: BackgroundTasks,
+                                      current_user = Depends(get_current_user)):
+    """Translate a project into several languages in one job"""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    target_languages = list(dict.fromkeys(request.target_languages))
+    if not target_languages:
+        raise HTTPException(status_code=400, detail="At least one target language is required")
+    unsupported = [language for language in target_languages if not translation_service.is_language_supported(language)]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported languages: {', '.join(unsupported)}")
+    
+    try:
+        async with db_pool.acquire() as conn:
+            project = await conn.fetchrow(
+                f"SELECT id, {PROJECT_CONTENT_POINTER_COLUMNS} FROM projects WHERE id = $1 AND user_id = $2",
+                project_id, current_user["id"]
+            )
+            
+            if not project:
+                raise HTTPException(status_code=404, detail="Project not found")
+            
+            content = await load_book_text(conn, project)
+        
+        if not content or not content.strip():
+            raise HTTPException(status_code=400, detail="Project has no content to translate")
+        
+        # Each language's job status lives on its own translation row; the project's status is left alone.
+        # A previous translation stays readable until the new one replaces it
+        async with db_pool.acquire() as conn:
+            await conn.executemany(
+                """INSERT INTO project_translations (project_id, language, status, progress, error_message, updated_at)
+                   VALUES ($1, $2, 'processing', 0, NULL, $3)
+                   ON CONFLICT (project_id, language) DO UPDATE SET
+                   status = 'processing', progress = 0, error_message = NULL, updated_at = EXCLUDED.updated_at""",
+                [(project_id, language, datetime.utcnow()) for language in target_languages]
+            )
+        
+        background_tasks.add_task(
+            translate_project_background, project_id, content, target_languages, request.source_language
+        )
+        
+        return {
+            "message": "Translation started",
+            "project_id": project_id,
+            "target_languages": target_languages,
+            "status": "processing"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Translation job failed to start: {e}")
+        raise HTTPException(status_code=500, detail="Failed to start translation")
+
+async def translate_project_background(project_id: str, content: str, target_languages: List[str],
+                                       source_language: Optional[str]):
+    """Background task: segment once, translate all languages concurrently, store each variant as it lands
+    
+    Status and progress are kept on each language's project_translations row.
+    """
+    async def fail_pending(error_message: str, languages: List[str]):
+        async with db_pool.acquire() as conn:
+            await conn.execute(
+                """UPDATE project_translations SET status = 'failed', error_message = $1, updated_at = $2
+                   WHERE project_id = $3 AND language = ANY($4::text[]) AND status = 'processing'""",
+                error_message, datetime.utcnow(), project_id, languages
+            )
+    
+    try:
+        async def progress_callback(language: str, message: str, progress: int):
+            async with db_pool.acquire() as conn:
+                await conn.execute(
+                    """UPDATE project_translations SET progress = $1, updated_at = $2
+                       WHERE project_id = $3 AND language = $4 AND status = 'processing'""",
+                    progress, datetime.utcnow(), project_id, language
+                )
+        
+        async def store_variant(language: str, result: Dict[str, Any]):
+            if not result.get('success'):
+                logger.error(f"Translation of {project_id} to {language} failed: {result.get('error')}")
+                await fail_pending(f"Translation failed: {result.get('error')}", [language])
+                return
+            
+            async with db_pool.acquire() as conn:
+                await conn.execute(
+                    """INSERT INTO project_translations
+                       (project_id, language, source_language, translated_content, service, stats,
+                        status, progress, error_message, updated_at)
+                       VALUES ($1, $2, $3, $4, $5, $6::jsonb, 'completed', 100, NULL, $7)
+                       ON CONFLICT (project_id, language) DO UPDATE SET
+                       source_language = EXCLUDED.source_language, translated_content = EXCLUDED.translated_content,
+                       service = EXCLUDED.service, stats = EXCLUDED.stats, status = EXCLUDED.status,
+                       progress = EXCLUDED.progress, error_message = NULL, updated_at = EXCLUDED.updated_at""",
+                    project_id, language, result.get('source_language'), result['translated_content'],
+                    result.get('service'), json.dumps(result.get('translation_memory') or {}), datetime.utcnow()
+                )
+        
+        structure = await get_structure_index(project_id, content)
+        results = await translation_service.translate_book_variants(
+            content,
+            target_languages,
+            source_language=source_language,
+            progress_callback=progress_callback,
+            structure_index=structure,
+            variant_callback=store_variant
+        )
+        
+        failed = [language for language, result in results.items() if not result.get('success')]
+        if failed:
+            logger.error(f"Translation of {project_id} failed for: {', '.join(failed)}")
+        
+    except Exception as e:
+        logger.error(f"Background translation failed: {e}")
+        try:
+            await fail_pending(f"Translation failed: {str(e)}", target_languages)
+        except Exception as db_error:
+            logger.error(f"Failed to record translation failure for {project_id}: {db_error}")
+
+@api_router.get("/projects/{project_id}/translations")
+async def list_project_translations(project_id: str, current_user = Depends(get_current_user)):
+    """Translated variants of a project (without their text)"""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    try:
+        async with db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """SELECT t.language, t.source_language, t.service, t.stats, t.status, t.progress,
+                          t.error_message, t.updated_at, length(t.translated_content) AS character_count
+                   FROM project_translations t JOIN projects p ON p.id = t.project_id
+                   WHERE t.project_id = $1 AND p.user_id = $2
+                   ORDER BY t.language""",
+                project_id, current_user["id"]
+            )
+            return [dict(row) for row in rows]
+            
+    except Exception as e:
+        logger.error(f"Failed to list translations: {e}")
+        raise HTTPException(status_code=500, detail="Failed to list translations")
+
+@api_router.get("/projects/{project_id}/translations/{language}")
+async def get_project_translation(project_id: str, language: str, current_user = Depends(get_current_user)):
+    """One translated variant of a project"""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    try:
+        async with db_pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """SELECT t.* FROM project_translations t JOIN projects p ON p.id = t.project_id
+                   WHERE t.project_id = $1 AND t.language = $2 AND p.user_id = $3""",
+                project_id, language, current_user["id"]
+            )
+        
+        if not row:
+            raise HTTPException(status_code=404, detail="Translation not found")
+        return dict(row)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get translation: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get translation")
+
 # ============================================================================
 # STRIPE PAYMENT ENDPOINTS
 # ============================================================================
@@ -637,6 +1414,7 @@ async def create_subscription(plan_data: Dict[str, Any], current_user = Depends(
                     "UPDATE users SET stripe_customer_id = $1 WHERE id = $2",
                     customer_id, current_user["id"]
                 )
+                invalidate_cached_user(current_user["id"])
             
             # Get frontend URL for success/cancel redirects - Replit domains don't use port in production
             replit_domain = os.environ.get('REPLIT_DEV_DOMAIN', 'localhost')
@@ -770,6 +1548,7 @@ async def handle_payment_success(session):
                    updated_at = $3 WHERE id = $4""",
                 plan['name'], session.customer, datetime.utcnow(), user_id
             )
+            invalidate_cached_user(user_id)
             
             # Create subscription record
             if plan_type == 'monthly':
@@ -829,11 +1608,13 @@ async def handle_subscription_payment(invoice):
         
         async with db_pool.acquire() as conn:
             # Update subscription status
-            await conn.execute(
+            subscribers = await conn.fetch(
                 """UPDATE user_subscriptions SET status = $1, updated_at = $2 
-                   WHERE stripe_subscription_id = $3""",
+                   WHERE stripe_subscription_id = $3 RETURNING user_id""",
                 'active', datetime.utcnow(), subscription_id
             )
+            for subscriber in subscribers:
+                invalidate_cached_user(subscriber["user_id"])
             
         logger.info(f"Subscription payment processed for subscription {subscription_id}")
         
@@ -874,14 +1655,46 @@ def get_genre_constraints(genre: str) -> Optional[Dict[str, Any]]:
     }
     return constraints.get(genre)
 
+JOB_STEP_LABELS = {
+    "audio_generation": "Generating audiobook",
+    "translation": "Translating",
+    "content_generation": "Generating content",
+    "cover_generation": "Generating cover art"
+}
+
 @api_router.get("/progress/{project_id}")
-async def get_project_progress(project_id: str, current_user = Depends(get_current_user)):
-    """Get project progress and processing status"""
+async def get_project_progress(project_id: str, job_id: Optional[str] = None,
+                               current_user = Depends(get_token_identity)):
+    """Get project progress and processing status, or that of one of its jobs when `job_id` is given"""
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
     
     try:
         async with db_pool.acquire() as conn:
+            if job_id:
+                job = await conn.fetchrow(
+                    """SELECT j.job_type, j.status, j.progress, j.error_message, j.created_at,
+                              COALESCE(j.completed_at, j.started_at, j.created_at) AS updated_at, p.title
+                       FROM processing_jobs j JOIN projects p ON p.id = j.project_id
+                       WHERE j.id = $1 AND j.project_id = $2 AND p.user_id = $3""",
+                    job_id, project_id, current_user["id"]
+                )
+                if not job:
+                    raise HTTPException(status_code=404, detail="Job not found")
+                
+                return {
+                    "project_id": project_id,
+                    "job_id": job_id,
+                    "title": job["title"],
+                    "overall_progress": job["progress"],
+                    "current_step": job["error_message"] or f"{JOB_STEP_LABELS.get(job['job_type'], 'Processing')} ({job['status']})",
+                    "status": job["status"],
+                    "steps": [],
+                    "estimated_completion": None,
+                    "created_at": job["created_at"].isoformat(),
+                    "updated_at": job["updated_at"].isoformat()
+                }
+            
             project = await conn.fetchrow(
                 """SELECT id, title, status, progress, processing_logs, created_at, updated_at
                    FROM projects WHERE id = $1 AND user_id = $2""",
@@ -933,25 +1746,143 @@ async def get_project_progress(project_id: str, current_user = Depends(get_curre
                 "updated_at": project["updated_at"].isoformat()
             }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get progress: {e}")
         raise HTTPException(status_code=500, detail="Failed to get progress")
 
-async def update_project_progress(project_id: str, progress: int, message: str, status: str):
-    """Update project progress"""
+PROJECT_CONTENT_COLUMNS = {"content": "content", "generated": "generated_content"}
+# Inline columns are only non-empty on rows written before chunked storage
+PROJECT_CONTENT_POINTER_COLUMNS = ("content, generated_content, content_version, generated_content_version, "
+                                   "content_length, generated_content_length")
+
+async def store_project_content(conn, project_id: str, kind: str, text: str) -> int:
+    """Write a new version of a project's manuscript ("content") or generated book ("generated")
+
+    The text is split into PROJECT_CONTENT_CHUNK_CHARS pieces and COPYed into
+    project_content_chunks; the projects row only keeps the version pointer and
+    length. Call inside a transaction so readers never see a pointer without its chunks.
+    The previous version is kept until the next write, so a reader that fetched the
+    old pointer just before this commit can still reassemble it.
+    """
+    column = PROJECT_CONTENT_COLUMNS[kind]
+    # Bumping the pointer row-locks the project, so concurrent writers of one project queue here
+    version = await conn.fetchval(
+        f"""UPDATE projects SET {column}_version = COALESCE({column}_version, 0) + 1,
+            {column}_length = $2, {column} = '' WHERE id = $1 RETURNING {column}_version""",
+        project_id, len(text)
+    )
+    if version is None:
+        raise ValueError(f"Project {project_id} not found")
+    
+    project_uuid = uuid.UUID(str(project_id))
+    records = [
+        (project_uuid, kind, version, chunk_index, text[start:start + PROJECT_CONTENT_CHUNK_CHARS])
+        for chunk_index, start in enumerate(range(0, len(text), PROJECT_CONTENT_CHUNK_CHARS))
+    ]
+    if records:
+        await conn.copy_records_to_table(
+            "project_content_chunks", records=records,
+            columns=["project_id", "kind", "version", "chunk_index", "body"]
+        )
+    
+    await conn.execute(
+        "DELETE FROM project_content_chunks WHERE project_id = $1 AND kind = $2 AND version < $3 - 1",
+        project_id, kind, version
+    )
+    return version
+
+async def load_project_content(conn, project: Dict[str, Any], kind: str) -> str:
+    """Reassemble the current version of a project's text from its row's pointer columns"""
+    column = PROJECT_CONTENT_COLUMNS[kind]
+    version = project.get(f"{column}_version")
+    if version is None:
+        return project.get(column) or ""
+    
+    chunks = await conn.fetch(
+        """SELECT body FROM project_content_chunks
+           WHERE project_id = $1 AND kind = $2 AND version = $3 ORDER BY chunk_index""",
+        project["id"], kind, version
+    )
+    text = "".join(chunk["body"] for chunk in chunks)
+    if not text and project.get(f"{column}_length"):
+        # The pointer was read before two newer versions replaced it; don't pass this off as empty
+        raise RuntimeError(f"Project {project['id']} {kind} version {version} is no longer stored")
+    return text
+
+async def load_book_text(conn, project: Dict[str, Any]) -> str:
+    """The generated book if there is one, otherwise the uploaded manuscript"""
+    return (await load_project_content(conn, project, "generated")
+            or await load_project_content(conn, project, "content"))
+
+@api_router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, current_user = Depends(get_current_user)):
+    """Status of a background job (audiobook generation, ...) on one of the user's projects"""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    try:
+        async with db_pool.acquire() as conn:
+            job = await conn.fetchrow(
+                """SELECT j.id, j.project_id, j.job_type, j.status, j.progress, j.result_data,
+                          j.error_message, j.started_at, j.completed_at, j.created_at
+                   FROM processing_jobs j JOIN projects p ON p.id = j.project_id
+                   WHERE j.id = $1 AND p.user_id = $2""",
+                job_id, current_user["id"]
+            )
+        
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        job = dict(job)
+        if isinstance(job["result_data"], str):
+            job["result_data"] = json.loads(job["result_data"])
+        return job
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get job status: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get job status")
+
+async def create_processing_job(project_id: str, job_type: str) -> str:
+    """Record a pending background job for a project and return its id"""
+    async with db_pool.acquire() as conn:
+        job_id = await conn.fetchval(
+            "INSERT INTO processing_jobs (project_id, job_type, status) VALUES ($1, $2, $3) RETURNING id",
+            project_id, job_type, "pending"
+        )
+    return str(job_id)
+
+async def update_job_progress(job_id: str, progress: int, status: str, error_message: Optional[str] = None,
+                              result_data: Optional[Dict[str, Any]] = None):
+    """Update a background job's own row; the project's status and progress are not touched"""
     try:
         async with db_pool.acquire() as conn:
             await conn.execute(
-                """UPDATE projects SET progress = $1, status = $2, updated_at = $3
-                   WHERE id = $4""",
-                progress, status, datetime.utcnow(), project_id
+                """UPDATE processing_jobs SET progress = $1, status = $2,
+                   error_message = COALESCE($3, error_message),
+                   result_data = COALESCE($4::jsonb, result_data),
+                   started_at = COALESCE(started_at, NOW()),
+                   completed_at = CASE WHEN $2 IN ('completed', 'failed') THEN NOW() ELSE completed_at END
+                   WHERE id = $5""",
+                progress, status, error_message,
+                json.dumps(result_data) if result_data is not None else None, job_id
             )
-            
-            # Add to processing logs
+    except Exception as e:
+        logger.error(f"Failed to update job {job_id}: {e}")
+
+async def update_project_progress(project_id: str, progress: int, message: str, status: str):
+    """Update project progress and append to the processing log in one row write"""
+    try:
+        async with db_pool.acquire() as conn:
             await conn.execute(
-                """UPDATE projects SET processing_logs = processing_logs || $1::jsonb
-                   WHERE id = $2""",
-                f'[{{"timestamp": "{datetime.utcnow().isoformat()}", "message": "{message}", "progress": {progress}}}]',
+                """UPDATE projects SET progress = $1, status = $2, updated_at = $3,
+                   processing_logs = processing_logs || $4::jsonb
+                   WHERE id = $5""",
+                progress, status, datetime.utcnow(),
+                json.dumps([{"timestamp": datetime.utcnow().isoformat(), "message": message, "progress": progress}]),
                 project_id
             )
     except Exception as e:
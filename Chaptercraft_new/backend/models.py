@@ -104,6 +104,8 @@ class CoverArtRequest(BaseModel):
     genre: BookGenre
     description: str
     style: str = "professional"  # professional, artistic, children, minimalist
+    num_variants: int = 4  # variants requested per paid call
+    draft: bool = False  # low-step preview mode
 
 # Audio Generation Models
 class AudioGenerationRequest(BaseModel):
@@ -453,7 +453,9 @@ async def generate_cover_art(request: CoverArtRequest):
             title=request.title,
             genre=request.genre.value,
             description=request.description,
-            style=request.style
+            style=request.style,
+            num_variants=request.num_variants,
+            draft=request.draft
         )
         
         return result
@@ -1,7 +1,11 @@
 import os
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
 import asyncio
+import threading
+
+from .illustration_prefetcher import PageIllustrationPrefetcher, PAGE_HEADER_PATTERN
+from .structure_index import StructureIndex
 
 # Import both services
 try:
@@ -71,7 +75,9 @@ The illustration should capture the emotion and action described in the page con
             
             # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
             # do not change this unless explicitly requested by the user
-            response = self.openai_client.images.generate(
+            # Run the blocking SDK call off the event loop so page jobs can overlap
+            response = await asyncio.to_thread(
+                self.openai_client.images.generate,
                 model="dall-e-3",
                 prompt=image_prompt,
                 n=1,
@@ -279,22 +285,7 @@ This illustration captures the essence of page {page_number} with professional P
         """Generate Pixar-style images for each page of the story"""
         try:
             # Extract pages from the story
-            pages = []
-            page_sections = story_text.split('Page ')
-            
-            for i, section in enumerate(page_sections):
-                if i == 0:  # Skip the title section
-                    continue
-                    
-                # Extract page number and content
-                lines = section.strip().split('\n')
-                if lines:
-                    page_num = i
-                    page_content = '\n'.join(lines[1:]) if len(lines) > 1 else lines[0]
-                    pages.append({
-                        'page_number': page_num,
-                        'content': page_content.strip()
-                    })
+            pages = StructureIndex.build(story_text).page_sections(story_text)
             
             # Generate images for each page
             illustrated_pages = []
@@ -330,8 +321,13 @@ This illustration captures the essence of page {page_number} with professional P
                 'images_generated': 0
             }
 
-    async def generate_book_from_prompt(self, prompt: str, genre: str, length: str = "medium", style: str = "engaging") -> str:
-        """Generate a complete book from a user prompt"""
+    async def generate_book_from_prompt(self, prompt: str, genre: str, length: str = "medium", style: str = "engaging",
+                                        illustrate: bool = False) -> str:
+        """Generate a complete book from a user prompt
+        
+        `illustrate` adds DALL-E page illustrations to OpenAI kids stories; it is
+        off by default because each story then costs up to 8 HD images.
+        """
         try:
             # Try Qwen first for ALL content types if available
             # UNICODE QUARANTINE: Architect recommendation - bypass DashScope entirely for kids_story
@@ -453,6 +449,11 @@ Please generate the complete content with proper formatting."""
             # Try OpenAI if available (for all genres)
             if self.openai_available:
                 logger.info(f"Using OpenAI for {genre} generation")
+                if genre == "kids_story" and illustrate:
+                    # Stream the story and start each page's illustration as soon as it is written
+                    return await self._generate_illustrated_kids_story(
+                        prompt, self._stream_with_openai(prompt, genre, length, style)
+                    )
                 return await self._generate_with_openai(prompt, genre, length, style)
             
             else:
@@ -478,35 +479,10 @@ Please generate the complete content with proper formatting."""
                 if genre == "kids_story":
                     logger.info("🛡️ COMPLETE IMAGE QUARANTINE: Using Pollination.ai for kids_story images, bypassing DashScope entirely")
                     
-                    # Split story into lines to find page headers and embed images
-                    story_lines = story_text.split('\n')
-                    enhanced_lines = []
-                    
-                    for line in story_lines:
-                        enhanced_lines.append(line)
-                        
-                        # Check if this line contains a page header
-                        if line.strip().startswith('Page '):
-                            try:
-                                page_num = int(line.strip().split()[1].rstrip(':'))
-                                if page_num <= 8:  # Generate images for first 8 pages
-                                    # Get page content for context
-                                    page_content = line
-                                    
-                                    # Generate Pollination.ai image URL for this page
-                                    image_url = await self.generate_pixar_image(page_content, page_num, prompt)
-                                    if image_url and image_url.startswith('http'):
-                                        # Embed the image URL directly after the page header
-                                        enhanced_lines.append(image_url)
-                                        logger.info(f"🖼️ Embedded Pollination.ai image for Page {page_num}: {image_url[:80]}...")
-                                    
-                            except (ValueError, IndexError):
-                                pass  # Skip if page number can't be parsed
-                    
-                    # Return the enhanced story with embedded image URLs
-                    enhanced_story = '\n'.join(enhanced_lines)
-                    logger.info(f"✅ Enhanced kids story with embedded Pollination.ai images: {len(enhanced_story)} characters")
-                    return enhanced_story
+                    # Feed the story page by page so illustration jobs are queued as pages are finalized
+                    return await self._generate_illustrated_kids_story(
+                        prompt, self._iter_story_pages(story_text)
+                    )
                         
                 # For non-kids stories, try Qwen + Wan2.5 image generation with UTF-8 encoding fix
                 elif self.qwen_available and qwen_service:
@@ -539,26 +515,120 @@ Please generate the complete content with proper formatting."""
                 logger.info("Returning story text without images")
                 return story_text
     
+    async def _generate_illustrated_kids_story(self, prompt: str, text_chunks: AsyncIterator[str]) -> str:
+        """Build a kids story from streamed text, illustrating pages while later pages are still being written"""
+        prefetcher = PageIllustrationPrefetcher(
+            lambda page_content, page_num: self.generate_pixar_image(page_content, page_num, prompt),
+            max_pages=8  # Generate images for first 8 pages
+        )
+        
+        try:
+            async for chunk in text_chunks:
+                prefetcher.feed(chunk)
+            prefetcher.finish()
+            
+            story_text = prefetcher.text
+            logger.info(f"Story text complete ({len(story_text.split())} words), awaiting prefetched illustrations")
+            image_map = await prefetcher.results()
+        finally:
+            prefetcher.cancel()
+        
+        # Return the enhanced story with embedded image URLs
+        enhanced_story = self._embed_page_images(story_text, image_map)
+        logger.info(f"✅ Enhanced kids story with {len(image_map)} embedded images: {len(enhanced_story)} characters")
+        return enhanced_story
+    
+    async def _iter_story_pages(self, story_text: str) -> AsyncIterator[str]:
+        """Yield an already generated story one page block at a time"""
+        page_starts = [match.start() for match in PAGE_HEADER_PATTERN.finditer(story_text)]
+        boundaries = [0] + page_starts + [len(story_text)]
+        
+        for start, end in zip(boundaries, boundaries[1:]):
+            if end > start:
+                yield story_text[start:end]
+                # Let queued illustration jobs start before the next page is fed
+                await asyncio.sleep(0)
+    
+    async def _stream_with_openai(self, prompt: str, genre: str, length: str = "medium", style: str = "engaging") -> AsyncIterator[str]:
+        """Stream story text from OpenAI, yielding deltas as they arrive"""
+        system_prompt, user_prompt, _ = self._build_openai_prompts(prompt, genre, length, style)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        stop = threading.Event()
+        
+        def produce():
+            # The OpenAI client is synchronous; iterate the stream in a worker thread
+            try:
+                stream = self.openai_client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    max_tokens=4000,
+                    temperature=0.7,
+                    stream=True
+                )
+                try:
+                    for event in stream:
+                        if stop.is_set():
+                            return
+                        if event.choices and event.choices[0].delta.content:
+                            loop.call_soon_threadsafe(queue.put_nowait, event.choices[0].delta.content)
+                finally:
+                    stream.close()
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+        
+        producer = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    logger.error(f"OpenAI streaming failed: {item}")
+                    raise Exception(f"OpenAI fallback failed: {str(item)}")
+                yield item
+        finally:
+            # The consumer may stop early (cancelled or failed): stop the worker at its next event
+            # and close the stream instead of waiting for the whole response
+            stop.set()
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                if not producer.cancelled():
+                    raise
+    
+    def _embed_page_images(self, story_text: str, image_map: Dict[int, str]) -> str:
+        """Insert each page's image URL on the line after its page header"""
+        if not image_map:
+            return story_text
+        
+        story_lines = story_text.split('\n')
+        enhanced_lines = []
+        
+        for line in story_lines:
+            enhanced_lines.append(line)
+            
+            # Check if this line contains a page header
+            match = PAGE_HEADER_PATTERN.match(line)
+            if match:
+                image_url = image_map.get(int(match.group(1)))
+                if image_url and image_url.startswith('http'):
+                    # Embed the image URL directly after the page header
+                    enhanced_lines.append(image_url)
+        
+        return '\n'.join(enhanced_lines)
+    
     async def _generate_qwen_illustrated_book(self, story_text: str, story_theme: str) -> Dict[str, Any]:
         """Generate illustrations using Qwen + Wan2.5 system"""
         try:
             # Extract pages from the story
-            pages = []
-            page_sections = story_text.split('Page ')
-            
-            for i, section in enumerate(page_sections):
-                if i == 0:  # Skip the title section
-                    continue
-                    
-                # Extract page number and content
-                lines = section.strip().split('\n')
-                if lines:
-                    page_num = i
-                    page_content = '\n'.join(lines[1:]) if len(lines) > 1 else lines[0]
-                    pages.append({
-                        'page_number': page_num,
-                        'content': page_content.strip()
-                    })
+            pages = StructureIndex.build(story_text).page_sections(story_text)
             
             # Generate images using Qwen + Wan2.5 for each page
             illustrated_pages = []
@@ -625,24 +695,23 @@ Please generate the complete content with proper formatting."""
                 'images_generated': 0
             }
     
-    async def _generate_with_openai(self, prompt: str, genre: str, length: str = "medium", style: str = "engaging") -> str:
-        """Generate story using OpenAI as fallback"""
-        try:
-            # Determine word count based on length and genre
-            word_counts = {
-                "ebook": {"short": 2000, "medium": 5000, "long": 10000},
-                "novel": {"short": 15000, "medium": 40000, "long": 80000},
-                "kids_story": {"short": 1000, "medium": 1500, "long": 2000},
-                "coloring_book": {"short": 50, "medium": 100, "long": 200}
-            }
-            
-            target_words = word_counts.get(genre, word_counts["ebook"])[length]
+    def _build_openai_prompts(self, prompt: str, genre: str, length: str = "medium", style: str = "engaging") -> tuple:
+        """Build the system and user prompts for OpenAI story generation"""
+        # Determine word count based on length and genre
+        word_counts = {
+            "ebook": {"short": 2000, "medium": 5000, "long": 10000},
+            "novel": {"short": 15000, "medium": 40000, "long": 80000},
+            "kids_story": {"short": 1000, "medium": 1500, "long": 2000},
+            "coloring_book": {"short": 50, "medium": 100, "long": 200}
+        }
+        
+        target_words = word_counts.get(genre, word_counts["ebook"])[length]
+        
+        # Create comprehensive prompt for kids stories
+        if genre == "kids_story":
+            system_prompt = """You are an expert children's book author who writes complete, professional-quality stories for ages 4-8. Your stories are published-quality like those from major publishers."""
             
-            # Create comprehensive prompt for kids stories
-            if genre == "kids_story":
-                system_prompt = """You are an expert children's book author who writes complete, professional-quality stories for ages 4-8. Your stories are published-quality like those from major publishers."""
-                
-                user_prompt = f"""Write a COMPLETE professional children's story based on this prompt: "{prompt}"
+            user_prompt = f"""Write a COMPLETE professional children's story based on this prompt: "{prompt}"
 
 CRITICAL REQUIREMENTS:
 - Write the ENTIRE STORY with full narrative text (NOT just an outline)
@@ -662,9 +731,9 @@ FORMAT REQUIREMENTS:
 - End with a meaningful conclusion
 
 Write the complete story now, page by page:"""
-            else:
-                system_prompt = "You are an expert writer who creates engaging, well-structured content across different genres."
-                user_prompt = f"""Create a complete {genre} based on this prompt: "{prompt}"
+        else:
+            system_prompt = "You are an expert writer who creates engaging, well-structured content across different genres."
+            user_prompt = f"""Create a complete {genre} based on this prompt: "{prompt}"
 
 Requirements:
 - Target length: approximately {target_words} words
@@ -674,6 +743,13 @@ Requirements:
 - Make it engaging and professional quality
 
 Generate the complete content:"""
+        
+        return system_prompt, user_prompt, target_words
+    
+    async def _generate_with_openai(self, prompt: str, genre: str, length: str = "medium", style: str = "engaging") -> str:
+        """Generate story using OpenAI as fallback"""
+        try:
+            system_prompt, user_prompt, _ = self._build_openai_prompts(prompt, genre, length, style)
 
             response = self.openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
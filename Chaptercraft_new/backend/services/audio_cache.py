@@ -0,0 +1,165 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+from contextlib import closing
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def audio_cache_key(text: str, voice_model: str, language: str, speed: float, provider: str) -> str:
+    """Content address for a synthesized chunk: identical inputs give the identical file"""
+    digest = hashlib.sha256()
+    digest.update(f"{provider}\0{voice_model}\0{language}\0{speed:.3f}\0".encode('utf-8'))
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AudioChunkCache:
+    """SQLite index of synthesized audio chunks, evicted by age and total size.
+
+    Lookups happen before any TTS call so unchanged chunks are never
+    re-synthesized. Chunks referenced by a stored audiobook manifest are pinned
+    and never evicted, since its playlist serves them directly. Calls are
+    blocking; run them in a thread.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int, max_age_seconds: float):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS audio_chunks (
+                    cache_key TEXT PRIMARY KEY,
+                    file_path TEXT NOT NULL,
+                    file_size INTEGER NOT NULL,
+                    duration REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audio_chunks_last_used ON audio_chunks(last_used_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS audio_chunk_pins (
+                    owner TEXT NOT NULL,
+                    cache_key TEXT NOT NULL,
+                    PRIMARY KEY (owner, cache_key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_audio_chunk_pins_key ON audio_chunk_pins(cache_key)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached chunk and mark it used, or None on a miss"""
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT file_path, file_size, duration FROM audio_chunks WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+            if not row:
+                return None
+
+            if not os.path.exists(row[0]):
+                conn.execute("DELETE FROM audio_chunks WHERE cache_key = ?", (cache_key,))
+                return None
+
+            conn.execute("UPDATE audio_chunks SET last_used_at = ? WHERE cache_key = ?", (time.time(), cache_key))
+        return {'file_path': row[0], 'file_size': row[1], 'duration': row[2]}
+
+    def put(self, cache_key: str, file_path: str, file_size: int, duration: float):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO audio_chunks
+                   (cache_key, file_path, file_size, duration, created_at, last_used_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (cache_key, file_path, file_size, duration, now, now)
+            )
+
+    def touch(self, cache_keys):
+        """Mark chunks used without reading them, e.g. ones reused from a previous manifest"""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "UPDATE audio_chunks SET last_used_at = ? WHERE cache_key = ?",
+                [(now, cache_key) for cache_key in cache_keys]
+            )
+
+    def pin(self, owner: str, cache_keys):
+        """Replace the set of chunks `owner` (e.g. a project's audiobook) keeps from eviction"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM audio_chunk_pins WHERE owner = ?", (owner,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO audio_chunk_pins (owner, cache_key) VALUES (?, ?)",
+                [(owner, cache_key) for cache_key in cache_keys]
+            )
+
+    def unpin(self, owner: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM audio_chunk_pins WHERE owner = ?", (owner,))
+
+    def evict(self, batch_size: int = 500) -> int:
+        """Drop unpinned chunks unused for max_age_seconds, then least recently used ones over max_bytes
+
+        Pinned chunks count towards max_bytes but are never removed, so the cache
+        can stay above the limit while audiobooks reference more than it holds.
+        """
+        removed = 0
+        unpinned = "cache_key NOT IN (SELECT cache_key FROM audio_chunk_pins)"
+        with closing(self._connect()) as conn:
+            cutoff = time.time() - self.max_age_seconds
+            while True:
+                rows = conn.execute(
+                    f"SELECT cache_key, file_path, file_size FROM audio_chunks WHERE last_used_at < ? AND {unpinned} "
+                    "ORDER BY last_used_at LIMIT ?",
+                    (cutoff, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                removed += self._remove(conn, rows)
+
+            total_bytes = conn.execute("SELECT COALESCE(SUM(file_size), 0) FROM audio_chunks").fetchone()[0]
+            while total_bytes > self.max_bytes:
+                rows = conn.execute(
+                    f"SELECT cache_key, file_path, file_size FROM audio_chunks WHERE {unpinned} "
+                    "ORDER BY last_used_at LIMIT ?",
+                    (batch_size,)
+                ).fetchall()
+                if not rows:
+                    break
+
+                victims = []
+                for row in rows:
+                    victims.append(row)
+                    total_bytes -= row[2]
+                    if total_bytes <= self.max_bytes:
+                        break
+                removed += self._remove(conn, victims)
+
+        if removed:
+            logger.info(f"Evicted {removed} cached audio chunks")
+        return removed
+
+    @staticmethod
+    def _remove(conn: sqlite3.Connection, rows) -> int:
+        for _, file_path, _ in rows:
+            # Mock synthesis writes a _mock.txt sidecar next to the chunk
+            for path in (file_path, os.path.splitext(file_path)[0] + '_mock.txt'):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not remove cached audio {path}: {e}")
+
+        with conn:
+            conn.executemany("DELETE FROM audio_chunks WHERE cache_key = ?", [(row[0],) for row in rows])
+        return len(rows)
@@ -1,13 +1,25 @@
 import os
+import json
+import math
+import time
+import shutil
 import logging
 import aiofiles
 import asyncio
 from typing import Optional, Dict, Any
 import tempfile
-import hashlib
+import random
+
+from .structure_index import StructureIndex
+from .rate_limiter import AsyncRateLimiter
+from .audio_cache import AudioChunkCache, audio_cache_key
+from .sentence_segmenter import audio_seconds_measure, char_measure, pack_spans, token_measure
 
 logger = logging.getLogger(__name__)
 
+# Rough narration rate: ~60ms per character at normal speed
+AUDIO_SECONDS_PER_CHAR = 0.06
+
 class AudioService:
     def __init__(self):
         # Note: Fish Audio API integration would go here
@@ -16,6 +28,34 @@ class AudioService:
         self.output_dir = os.environ.get('AUDIO_OUTPUT_DIR', '/app/audio_output')
         os.makedirs(self.output_dir, exist_ok=True)
         
+        # Chunk synthesis runs concurrently, bounded by the provider's rate limit
+        self.tts_concurrency = int(os.environ.get('AUDIO_TTS_CONCURRENCY', '4'))
+        self.tts_max_retries = int(os.environ.get('AUDIO_TTS_MAX_RETRIES', '3'))
+        self.tts_retry_base_delay = float(os.environ.get('AUDIO_TTS_RETRY_BASE_DELAY', '1.0'))
+        self.tts_rate_limiter = AsyncRateLimiter(
+            rate=float(os.environ.get('AUDIO_TTS_REQUESTS_PER_SECOND', '5')),
+            burst=self.tts_concurrency
+        )
+        
+        # Chunk size limit, in characters, estimated audio seconds or provider tokens
+        self.chunk_limit_unit = os.environ.get('AUDIO_CHUNK_LIMIT_UNIT', 'chars')
+        self.chunk_limit = float(os.environ.get('AUDIO_CHUNK_LIMIT', '5000'))
+        
+        # Synthesized chunks are content-addressed and reused across runs and projects
+        self.provider = 'fish_audio' if self.api_key else 'mock'
+        self.chunk_dir = os.path.join(self.output_dir, 'chunks')
+        self.audio_cache = AudioChunkCache(
+            os.environ.get('AUDIO_CACHE_INDEX_PATH', os.path.join(self.output_dir, 'audio_cache.db')),
+            max_bytes=int(os.environ.get('AUDIO_CACHE_MAX_MB', '5120')) * 1024 * 1024,
+            max_age_seconds=float(os.environ.get('AUDIO_CACHE_MAX_AGE_DAYS', '30')) * 86400
+        )
+        # cache_key -> [lock, number of callers using it], so identical chunks are synthesized once
+        self._chunk_locks: Dict[str, list] = {}
+        
+        # Assembled audiobooks: 'mp3' (streamed frame concatenation) or 'm4b' (chapters, needs ffmpeg)
+        self.audiobook_format = os.environ.get('AUDIOBOOK_FORMAT', 'mp3')
+        self.assembly_block_size = 1024 * 1024
+        
         # Supported voices by language
         self.voice_models = {
             'en': ['english_narrator_1', 'english_narrator_2', 'english_female_1', 'english_male_1'],
@@ -43,51 +83,86 @@ class AudioService:
             return available_voices[voice_index]
         return available_voices[0]
     
-    def _chunk_text(self, text: str, max_chunk_size: int = 5000) -> list:
-        """Chunk text into smaller pieces for audio generation"""
-        sentences = text.split('. ')
-        chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) + 2 <= max_chunk_size:
-                if current_chunk:
-                    current_chunk += ". " + sentence
-                else:
-                    current_chunk = sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
+    def _chunk_text(self, text: str, max_chunk_size: Optional[float] = None,
+                    structure: Optional[StructureIndex] = None, limit_unit: Optional[str] = None,
+                    speed: float = 1.0, token_counter=None) -> list:
+        """Chunk text into whole sentences for audio generation
+        
+        `limit_unit` is 'chars', 'seconds' (estimated narration time at `speed`) or
+        'tokens' (provider tokens, via `token_counter` when given).
+        """
+        if structure is None or not structure.matches(text):
+            structure = StructureIndex.build(text)
+        
+        return [text[start:end] for start, end in
+                self._chunk_spans(text, structure, max_chunk_size, limit_unit, speed, token_counter)]
+    
+    def _chunk_spans(self, text: str, structure: StructureIndex, max_chunk_size: Optional[float] = None,
+                     limit_unit: Optional[str] = None, speed: float = 1.0, token_counter=None) -> list:
+        """(start, end) offsets of the audio chunks, trimmed of surrounding whitespace"""
+        limit_unit = limit_unit or self.chunk_limit_unit
+        if limit_unit == 'seconds':
+            measure = audio_seconds_measure(AUDIO_SECONDS_PER_CHAR, speed)
+        elif limit_unit == 'tokens':
+            measure = token_measure(text, token_counter)
+        elif limit_unit == 'chars':
+            measure = char_measure
+        else:
+            raise ValueError(f"Unknown audio chunk limit unit: {limit_unit}")
         
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        # Chunks never cross a chapter heading, so chapter markers fall on chunk boundaries
+        limit = max_chunk_size or self.chunk_limit
+        chapter_groups = {}
+        for sentence in structure.spans('sentence'):
+            chapter_groups.setdefault(structure.chapter_at(sentence[0]), []).append(sentence)
         
-        return chunks
+        spans = []
+        for start, end in (span for group in chapter_groups.values() for span in pack_spans(group, limit, measure, text)):
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if end > start:
+                spans.append((start, end))
+        return spans
     
     async def generate_audio(self, text: str, language: str = 'en', voice_style: str = 'neutral', 
                            speed: float = 1.0, project_id: str = None) -> Dict[str, Any]:
-        """Generate audio from text using Fish Audio API"""
+        """Generate audio from text using Fish Audio API, reusing a cached chunk when one exists"""
         try:
-            # Get appropriate voice model
-            voice_model = self._get_voice_model(language, voice_style)
+            cache_key = self._chunk_cache_key(text, language, voice_style, speed)
+            filename = f"{cache_key[:2]}/{cache_key}.mp3"
+            output_path = os.path.join(self.chunk_dir, cache_key[:2], f"{cache_key}.mp3")
             
-            # Create output filename
-            text_hash = hashlib.md5(text.encode()).hexdigest()[:8]
-            filename = f"{project_id}_{text_hash}_{language}_{voice_style}.mp3"
-            output_path = os.path.join(self.output_dir, filename)
-            
-            # For MVP - create a mock audio file
-            # In production, this would use the actual Fish Audio API
-            await self._create_mock_audio(text, output_path, language, voice_style, speed)
-            
-            # Get file stats
-            file_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
-            duration = len(text) * 0.06 / speed  # Rough estimate: ~60ms per character
+            lock_entry = self._chunk_locks.setdefault(cache_key, [asyncio.Lock(), 0])
+            lock_entry[1] += 1
+            try:
+                async with lock_entry[0]:
+                    cached = await asyncio.to_thread(self.audio_cache.get, cache_key)
+                    if cached:
+                        file_size, duration = cached['file_size'], cached['duration']
+                    else:
+                        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                        
+                        # For MVP - create a mock audio file
+                        # In production, this would use the actual Fish Audio API
+                        await self.tts_rate_limiter.acquire()
+                        await self._create_mock_audio(text, output_path, language, voice_style, speed)
+                        
+                        # Get file stats
+                        file_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+                        duration = len(text) * AUDIO_SECONDS_PER_CHAR / speed
+                        await asyncio.to_thread(self.audio_cache.put, cache_key, output_path, file_size, duration)
+            finally:
+                lock_entry[1] -= 1
+                if not lock_entry[1]:
+                    self._chunk_locks.pop(cache_key, None)
             
             return {
-                'audio_url': f'/audio/{filename}',
+                'audio_url': f'/audio/chunks/{filename}',
                 'file_path': output_path,
+                'cache_key': cache_key,
+                'cached': bool(cached),
                 'duration': duration,
                 'file_size': file_size,
                 'language': language,
@@ -99,6 +174,31 @@ class AudioService:
             logger.error(f"Audio generation failed: {e}")
             raise Exception(f"Failed to generate audio: {str(e)}")
     
+    def _chunk_cache_key(self, text: str, language: str, voice_style: str, speed: float) -> str:
+        """Chunks are keyed on the full text and every setting that changes the audio"""
+        voice_model = self._get_voice_model(language, voice_style)
+        return audio_cache_key(text, voice_model, language, speed, self.provider)
+    
+    async def _synthesize_chunk(self, text: str, language: str, voice_style: str,
+                                speed: float, chunk_id: str) -> Dict[str, Any]:
+        """Synthesize one chunk, retried with exponential backoff (provider calls are rate limited)"""
+        for attempt in range(self.tts_max_retries + 1):
+            try:
+                return await self.generate_audio(
+                    text=text,
+                    language=language,
+                    voice_style=voice_style,
+                    speed=speed,
+                    project_id=chunk_id
+                )
+            except Exception as e:
+                if attempt >= self.tts_max_retries:
+                    raise
+                
+                delay = self.tts_retry_base_delay * (2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"Audio chunk {chunk_id} failed (attempt {attempt + 1}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+    
     async def _create_mock_audio(self, text: str, output_path: str, language: str, 
                                voice_style: str, speed: float):
         """Create a mock audio file for development/testing"""
@@ -123,43 +223,113 @@ class AudioService:
     
     async def generate_audiobook(self, project_id: str, content: str, language: str = 'en',
                                 voice_style: str = 'narrator', speed: float = 1.0,
-                                progress_callback=None) -> Dict[str, Any]:
-        """Generate complete audiobook from content"""
+                                progress_callback=None,
+                                structure_index: Optional[StructureIndex] = None,
+                                chunk_callback=None, output_format: Optional[str] = None) -> Dict[str, Any]:
+        """Generate complete audiobook from content
+        
+        Chunks are synthesized concurrently; `chunk_callback(index, audio_result)` is
+        awaited for each chunk in book order as soon as it and all earlier chunks are done.
+        The chunks are then assembled into one file with chapter markers. Meanwhile
+        an HLS playlist grows by one segment per released chunk, so playback can
+        start long before the book is finished (see `get_playlist`).
+        
+        Regeneration is incremental: chunks whose text and voice settings match a
+        chunk of the previous manifest are reused without a TTS call, and an MP3
+        audiobook is only rewritten from the first changed chunk onwards.
+        If generation fails or is cancelled, the unfinished playlist is removed.
+        """
+        playlist_open = False
         try:
+            started_at = time.monotonic()
+            time_to_first_audio = None
+            
             # Chunk the content for processing
-            chunks = self._chunk_text(content)
+            structure = structure_index
+            if structure is None or not structure.matches(content):
+                structure = await asyncio.to_thread(StructureIndex.build, content)
+            
+            spans = self._chunk_spans(content, structure, speed=speed)
+            chunks = [content[start:end] for start, end in spans]
             total_chunks = len(chunks)
             
+            # Diff against the previous audiobook by chunk hash
+            previous = await asyncio.to_thread(self._load_manifest, project_id)
+            previous_chunks = {
+                audio_file['cache_key']: audio_file
+                for audio_file in (previous or {}).get('audio_files', []) if audio_file.get('cache_key')
+            }
+            
             audio_files = []
             total_duration = 0
             total_size = 0
             
-            for i, chunk in enumerate(chunks):
-                if progress_callback:
-                    await progress_callback(f"Generating audio chunk {i+1}/{total_chunks}", 
-                                          int((i / total_chunks) * 100))
-                
-                # Generate audio for this chunk
-                audio_result = await self.generate_audio(
-                    text=chunk,
-                    language=language,
-                    voice_style=voice_style,
-                    speed=speed,
-                    project_id=f"{project_id}_chunk_{i}"
-                )
-                
-                audio_files.append(audio_result)
-                total_duration += audio_result['duration']
-                total_size += audio_result['file_size']
+            # Durations are estimated from the text, so the longest segment is known up front
+            longest = max((len(chunk) for chunk in chunks), default=0)
+            await self._start_playlist(project_id, longest * AUDIO_SECONDS_PER_CHAR / speed)
+            playlist_open = True
+            
+            semaphore = asyncio.Semaphore(self.tts_concurrency)
+            
+            async def synthesize(i: int, chunk: str):
+                unchanged = previous_chunks.get(self._chunk_cache_key(chunk, language, voice_style, speed))
+                if unchanged and os.path.exists(unchanged['file_path']):
+                    return i, dict(unchanged, cached=True, reused=True)
                 
-                # Small delay to prevent overwhelming the API
-                await asyncio.sleep(0.1)
+                async with semaphore:
+                    return i, await self._synthesize_chunk(
+                        chunk, language, voice_style, speed, f"{project_id}_chunk_{i}"
+                    )
+            
+            tasks = [asyncio.create_task(synthesize(i, chunk)) for i, chunk in enumerate(chunks)]
+            completed = {}
+            completed_count = 0
+            
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    i, audio_result = await next_done
+                    audio_result['start_offset'], audio_result['end_offset'] = spans[i]
+                    completed[i] = audio_result
+                    completed_count += 1
+                    
+                    # Release finished chunks in book order
+                    while len(audio_files) in completed:
+                        index = len(audio_files)
+                        ready = completed.pop(index)
+                        audio_files.append(ready)
+                        total_duration += ready['duration']
+                        total_size += ready['file_size']
+                        await self._append_playlist(project_id, ready)
+                        if time_to_first_audio is None:
+                            time_to_first_audio = round(time.monotonic() - started_at, 3)
+                            logger.info(f"Audiobook {project_id}: first audio ready after {time_to_first_audio}s")
+                        if chunk_callback:
+                            await chunk_callback(index, ready)
+                    
+                    if progress_callback:
+                        await progress_callback(f"Generated audio chunk {completed_count}/{total_chunks}",
+                                              int((completed_count / total_chunks) * 100))
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
             
-            # In production, you might want to combine all chunks into a single file
-            combined_filename = f"{project_id}_audiobook.mp3"
-            combined_path = os.path.join(self.output_dir, combined_filename)
+            # Combine all chunks into a single file with chapter markers
+            if progress_callback:
+                await progress_callback("Assembling audiobook", 99)
+            
+            chapters = self._build_chapters(structure, audio_files)
+            combined_path, audiobook_format = await self.assemble_audiobook(
+                project_id, audio_files, chapters, output_format or self.audiobook_format, previous
+            )
+            reused_keys = [audio_file['cache_key'] for audio_file in audio_files if audio_file.get('reused')]
+            reused_chunks = len(reused_keys)
+            # Reused chunks skip audio_cache.get, so refresh their LRU position here
+            if reused_keys:
+                await asyncio.to_thread(self.audio_cache.touch, reused_keys)
+            await self._end_playlist(project_id)
+            playlist_open = False
             
-            # For now, just create a manifest file
             manifest = {
                 'project_id': project_id,
                 'total_chunks': total_chunks,
@@ -168,22 +338,44 @@ class AudioService:
                 'language': language,
                 'voice_style': voice_style,
                 'speed': speed,
+                'format': audiobook_format,
+                'audiobook_path': combined_path,
+                'assembled_size': os.path.getsize(combined_path),
+                'chapters': chapters,
+                'time_to_first_audio': time_to_first_audio,
+                'generation_seconds': round(time.monotonic() - started_at, 3),
                 'audio_files': audio_files
             }
             
-            async with aiofiles.open(combined_path.replace('.mp3', '_manifest.json'), 'w') as f:
-                import json
+            # The new manifest and its playlist serve these chunks directly; keep them out of eviction
+            await asyncio.to_thread(self.audio_cache.pin, project_id,
+                                    [audio_file['cache_key'] for audio_file in audio_files])
+            
+            manifest_path = self._manifest_path(project_id)
+            async with aiofiles.open(manifest_path + '.part', 'w') as f:
                 await f.write(json.dumps(manifest, indent=2))
+            os.replace(manifest_path + '.part', manifest_path)
+            
+            # Keep the chunk cache within its size and age limits
+            await asyncio.to_thread(self.audio_cache.evict)
             
             if progress_callback:
                 await progress_callback("Audiobook generation completed", 100)
             
             return {
-                'audiobook_url': f'/audio/{combined_filename}',
-                'manifest_path': combined_path.replace('.mp3', '_manifest.json'),
+                'audiobook_url': f'/api/audio/stream/{project_id}',
+                'audiobook_path': combined_path,
+                'playlist_url': f'/api/audio/stream/{project_id}/playlist.m3u8',
+                'format': audiobook_format,
+                'chapters': chapters,
+                'manifest_path': manifest_path,
+                'time_to_first_audio': time_to_first_audio,
                 'total_duration': total_duration,
                 'total_size': total_size,
                 'chunks_count': total_chunks,
+                'cached_chunks': sum(1 for audio_file in audio_files if audio_file.get('cached')),
+                'reused_chunks': reused_chunks,
+                'synthesized_chunks': total_chunks - sum(1 for audio_file in audio_files if audio_file.get('cached')),
                 'language': language,
                 'voice_style': voice_style
             }
@@ -191,6 +383,251 @@ class AudioService:
         except Exception as e:
             logger.error(f"Audiobook generation failed: {e}")
             raise Exception(f"Failed to generate audiobook: {str(e)}")
+        finally:
+            # An EVENT playlist without #EXT-X-ENDLIST would keep players polling forever
+            if playlist_open:
+                self._discard_playlist(project_id)
+    
+    def _manifest_path(self, project_id: str) -> str:
+        return os.path.join(self.output_dir, f"{project_id}_audiobook_manifest.json")
+    
+    def _load_manifest(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """The previous audiobook manifest, or None if missing or unreadable"""
+        try:
+            with open(self._manifest_path(project_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable audiobook manifest for {project_id}: {e}")
+            return None
+    
+    # ------------------------------------------------------------------
+    # Progressive playback: an HLS EVENT playlist of the chunks released so far
+    # ------------------------------------------------------------------
+    
+    def _playlist_path(self, project_id: str) -> str:
+        return os.path.join(self.output_dir, f"{project_id}_audiobook.m3u8")
+    
+    async def _start_playlist(self, project_id: str, longest_segment: float):
+        playlist_path = self._playlist_path(project_id)
+        async with aiofiles.open(playlist_path + '.part', 'w') as f:
+            await f.write(
+                "#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-PLAYLIST-TYPE:EVENT\n"
+                f"#EXT-X-TARGETDURATION:{max(1, math.ceil(longest_segment))}\n#EXT-X-MEDIA-SEQUENCE:0\n"
+            )
+        os.replace(playlist_path + '.part', playlist_path)
+    
+    async def _append_playlist(self, project_id: str, audio_file: Dict[str, Any]):
+        # Segment URIs are relative to the playlist URL
+        async with aiofiles.open(self._playlist_path(project_id), 'a') as f:
+            await f.write(f"#EXTINF:{audio_file['duration']:.3f},\nsegment/{audio_file['cache_key']}.mp3\n")
+    
+    async def _end_playlist(self, project_id: str):
+        async with aiofiles.open(self._playlist_path(project_id), 'a') as f:
+            await f.write("#EXT-X-ENDLIST\n")
+    
+    def _discard_playlist(self, project_id: str):
+        try:
+            os.remove(self._playlist_path(project_id))
+        except FileNotFoundError:
+            pass
+    
+    def has_playlist(self, project_id: str) -> bool:
+        return os.path.exists(self._playlist_path(project_id))
+    
+    async def get_playlist(self, project_id: str) -> Optional[str]:
+        """The project's playlist as far as it is written, or None if there is none"""
+        try:
+            async with aiofiles.open(self._playlist_path(project_id), 'r') as f:
+                playlist = await f.read()
+        except FileNotFoundError:
+            return None
+        
+        # Drop an entry that is still being appended
+        complete_lines = playlist[:playlist.rfind('\n') + 1].splitlines(keepends=True)
+        if complete_lines and complete_lines[-1].startswith('#EXTINF'):
+            complete_lines.pop()
+        return ''.join(complete_lines)
+    
+    def get_segment_path(self, cache_key: str) -> Optional[str]:
+        """File of a synthesized chunk, by cache key"""
+        if len(cache_key) != 64 or any(c not in '0123456789abcdef' for c in cache_key):
+            return None
+        path = os.path.join(self.chunk_dir, cache_key[:2], f"{cache_key}.mp3")
+        return path if os.path.exists(path) else None
+    
+    def get_audiobook_path(self, project_id: str) -> Optional[str]:
+        """Path of the project's assembled audiobook, if there is one"""
+        for ext in ('m4b', 'mp3'):
+            path = os.path.join(self.output_dir, f"{project_id}_audiobook.{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+    
+    def _build_chapters(self, structure: StructureIndex, audio_files: list) -> list:
+        """Chapter start times from the manuscript's chapter headings and the chunk durations"""
+        chapters = []
+        elapsed = 0.0
+        current = None
+        
+        for chunk_index, audio_file in enumerate(audio_files):
+            # None is the front matter before the first heading (structure.front_matter())
+            chapter_index = structure.chapter_at(audio_file['start_offset'])
+            
+            if chapter_index != current or not chapters:
+                current = chapter_index
+                title = structure.chapter_titles[chapter_index] if chapter_index is not None else 'Opening'
+                chapters.append({'title': title, 'start_time': round(elapsed, 3), 'chunk_index': chunk_index})
+            elapsed += audio_file['duration']
+        
+        for chapter, next_chapter in zip(chapters, chapters[1:] + [None]):
+            chapter['end_time'] = round(next_chapter['start_time'] if next_chapter else elapsed, 3)
+        return chapters
+    
+    async def assemble_audiobook(self, project_id: str, audio_files: list, chapters: list,
+                                 output_format: str = 'mp3', previous: Optional[Dict[str, Any]] = None):
+        """Stream the chunk files into one audiobook file; returns (path, format)
+        
+        M4B output carries chapter markers and needs ffmpeg; without it (or if it
+        fails) the book is assembled as MP3 and chapters live in the manifest.
+        Given the `previous` manifest, an MP3 keeps its unchanged leading chunks
+        and only the chunks from the first changed one are re-appended. Each audio file gets
+        its `byte_offset` in the MP3.
+        """
+        if output_format == 'm4b':
+            if shutil.which('ffmpeg'):
+                for audio_file in audio_files:
+                    audio_file.pop('byte_offset', None)
+                m4b_path = os.path.join(self.output_dir, f"{project_id}_audiobook.m4b")
+                try:
+                    await self._assemble_m4b(m4b_path, audio_files, chapters)
+                    self._remove_stale_audiobook(project_id, keep='m4b')
+                    return m4b_path, 'm4b'
+                except Exception as e:
+                    logger.error(f"M4B assembly failed for {project_id}, falling back to MP3: {e}")
+            else:
+                logger.warning("ffmpeg not found, assembling audiobook as MP3")
+        
+        mp3_path = os.path.join(self.output_dir, f"{project_id}_audiobook.mp3")
+        resume_from, resume_offset = self._unchanged_prefix(mp3_path, audio_files, previous)
+        
+        offsets = [audio_file['byte_offset'] for audio_file in previous['audio_files'][:resume_from]] if resume_from else []
+        if not resume_from or resume_from < max(len(audio_files), len(previous['audio_files'])):
+            offsets += await asyncio.to_thread(
+                self._concatenate_mp3, mp3_path, [f['file_path'] for f in audio_files], resume_from, resume_offset
+            )
+        for audio_file, offset in zip(audio_files, offsets):
+            audio_file['byte_offset'] = offset
+        
+        self._remove_stale_audiobook(project_id, keep='mp3')
+        return mp3_path, 'mp3'
+    
+    @staticmethod
+    def _unchanged_prefix(mp3_path: str, audio_files: list, previous: Optional[Dict[str, Any]]):
+        """(chunk count, byte length) of the existing MP3 that the new chunk list leaves unchanged"""
+        if (not previous or previous.get('format') != 'mp3' or previous.get('audiobook_path') != mp3_path
+                or not os.path.exists(mp3_path) or os.path.getsize(mp3_path) != previous.get('assembled_size')):
+            return 0, 0
+        
+        old_files = previous.get('audio_files', [])
+        count = 0
+        while (count < min(len(old_files), len(audio_files)) and 'byte_offset' in old_files[count]
+               and old_files[count].get('cache_key') == audio_files[count]['cache_key']):
+            count += 1
+        
+        if not count:
+            return 0, 0
+        if count < len(old_files):
+            return count, old_files[count]['byte_offset']
+        return count, previous['assembled_size']
+    
+    def _remove_stale_audiobook(self, project_id: str, keep: str):
+        stale = os.path.join(self.output_dir, f"{project_id}_audiobook.{'mp3' if keep == 'm4b' else 'm4b'}")
+        if os.path.exists(stale):
+            os.remove(stale)
+    
+    def _concatenate_mp3(self, output_path: str, chunk_paths: list,
+                         resume_from: int = 0, resume_offset: int = 0) -> list:
+        """Append MP3 chunks block by block, dropping every ID3v2 tag after the first file's
+        
+        With `resume_from`, the first `resume_offset` bytes of the existing file are
+        copied over and only chunks from that index on are appended. The result is
+        always written to a new file and swapped in, so a listener streaming the old
+        file keeps reading the bytes it was promised. Returns the written chunks' byte offsets.
+        """
+        offsets = []
+        target_path = output_path + '.part'
+        with open(target_path, 'wb') as output:
+            if resume_from:
+                with open(output_path, 'rb') as existing:
+                    remaining = resume_offset
+                    while remaining > 0:
+                        block = existing.read(min(self.assembly_block_size, remaining))
+                        if not block:
+                            raise Exception(f"{output_path} is shorter than the {resume_offset} bytes to keep")
+                        output.write(block)
+                        remaining -= len(block)
+            for i in range(resume_from, len(chunk_paths)):
+                with open(chunk_paths[i], 'rb') as chunk:
+                    if i > 0:
+                        chunk.seek(self._id3v2_size(chunk))
+                    offsets.append(output.tell())
+                    shutil.copyfileobj(chunk, output, self.assembly_block_size)
+        
+        os.replace(target_path, output_path)
+        return offsets
+    
+    @staticmethod
+    def _id3v2_size(chunk) -> int:
+        """Length of a leading ID3v2 tag (0 if none); leaves the file positioned at 0"""
+        header = chunk.read(10)
+        chunk.seek(0)
+        if len(header) < 10 or header[:3] != b'ID3':
+            return 0
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        footer = 10 if header[5] & 0x10 else 0
+        return 10 + size + footer
+    
+    async def _assemble_m4b(self, output_path: str, audio_files: list, chapters: list):
+        """Transcode the chunks into an M4B with chapter markers via ffmpeg (streams from disk)"""
+        temp_dir = tempfile.mkdtemp(dir=self.output_dir)
+        try:
+            list_path = os.path.join(temp_dir, 'chunks.txt')
+            with open(list_path, 'w', encoding='utf-8') as f:
+                for audio_file in audio_files:
+                    escaped = audio_file['file_path'].replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            
+            metadata_path = os.path.join(temp_dir, 'chapters.txt')
+            with open(metadata_path, 'w', encoding='utf-8') as f:
+                f.write(";FFMETADATA1\n")
+                for chapter in chapters:
+                    f.write("[CHAPTER]\nTIMEBASE=1/1000\n")
+                    f.write(f"START={int(chapter['start_time'] * 1000)}\nEND={int(chapter['end_time'] * 1000)}\n")
+                    f.write(f"title={self._escape_ffmetadata(chapter['title'])}\n")
+            
+            temp_output = output_path + '.part'
+            process = await asyncio.create_subprocess_exec(
+                'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+                '-f', 'concat', '-safe', '0', '-i', list_path,
+                '-i', metadata_path, '-map', '0:a', '-map_metadata', '1', '-map_chapters', '1',
+                '-c:a', 'aac', '-b:a', '64k', '-f', 'mp4', temp_output,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise Exception(stderr.decode('utf-8', errors='replace').strip() or f"ffmpeg exited {process.returncode}")
+            
+            os.replace(temp_output, output_path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    @staticmethod
+    def _escape_ffmetadata(value: str) -> str:
+        for char in ('\\', '=', ';', '#', '\n'):
+            value = value.replace(char, '\\' + char)
+        return value
     
     async def get_available_voices(self, language: str = None) -> Dict[str, list]:
         """Get list of available voices"""
@@ -0,0 +1,175 @@
+import logging
+import signal
+import zipfile
+from xml.etree import ElementTree
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Text extraction jobs run in FileService's process pool. Everything here is a
+# module-level function so it can be pickled to the worker processes.
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def init_worker(memory_limit_mb: int):
+    """Process pool initializer: let a worker allocate at most `memory_limit_mb` more memory
+
+    Workers are forked from the server and inherit its mappings (often close to
+    1 GB of address space once the SDKs are loaded), so an absolute RLIMIT_AS
+    would fail every job. Instead RLIMIT_DATA (heap and private mappings) is set
+    to what the worker already holds plus the limit (EXTRACTION_MEMORY_LIMIT_MB,
+    default 1024).
+    """
+    if not memory_limit_mb:
+        return
+
+    try:
+        import resource
+
+        limit = _data_segment_bytes() + memory_limit_mb * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_DATA)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, hard))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Could not apply extraction memory limit: {e}")
+
+
+def _data_segment_bytes() -> int:
+    """Current VmData of this process, or 0 where /proc is unavailable"""
+    try:
+        with open('/proc/self/status', 'r') as status:
+            for line in status:
+                if line.startswith('VmData:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+@contextmanager
+def job_timeout(seconds: int):
+    """Abort the current job with TimeoutError after `seconds` of wall-clock time"""
+    if not seconds or not hasattr(signal, 'SIGALRM'):
+        yield
+        return
+
+    def _raise_timeout(signum, frame):
+        raise TimeoutError(f"Extraction job exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.alarm(seconds)
+    try:
+        yield
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def count_pdf_pages(file_path: str, timeout: int = 0) -> int:
+    """Return the number of pages in a PDF"""
+    import PyPDF2
+
+    with job_timeout(timeout):
+        with open(file_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+
+
+def extract_pdf_pages(file_path: str, start: int, end: int, timeout: int = 0) -> List[str]:
+    """Extract text for pages [start, end) of a PDF"""
+    import PyPDF2
+
+    with job_timeout(timeout):
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            end = min(end, len(pdf_reader.pages))
+            return [pdf_reader.pages[page_num].extract_text() or '' for page_num in range(start, end)]
+
+
+def iter_docx_paragraphs(file_path: str) -> Iterator[Tuple[str, str]]:
+    """Stream ('heading' | 'paragraph', text) pairs from a DOCX without building a document model
+
+    Only word/document.xml is read, straight from the zip, so embedded media is
+    never loaded. Parsed elements are discarded as soon as each paragraph is yielded.
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as document_xml:
+        depth = 0
+        body = None
+
+        for event, elem in ElementTree.iterparse(document_xml, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if elem.tag == WORD_NS + 'body':
+                    body = elem
+                continue
+
+            depth -= 1
+
+            if elem.tag == WORD_NS + 'p':
+                parts = []
+                for node in elem.iter():
+                    if node.tag == WORD_NS + 't':
+                        parts.append(node.text or '')
+                    elif node.tag == WORD_NS + 'tab':
+                        parts.append('\t')
+                    elif node.tag in (WORD_NS + 'br', WORD_NS + 'cr'):
+                        parts.append('\n')
+
+                style = elem.find(f'{WORD_NS}pPr/{WORD_NS}pStyle')
+                style_name = style.get(WORD_NS + 'val', '') if style is not None else ''
+                kind = 'heading' if style_name.startswith('Heading') or style_name == 'Title' else 'paragraph'
+
+                yield kind, ''.join(parts)
+                elem.clear()
+
+            # Drop finished top-level blocks (document > body > block) to keep memory flat
+            if depth == 2 and body is not None:
+                body.clear()
+
+
+def extract_docx_text_streaming(file_path: str) -> str:
+    """Extract DOCX text with the streaming parser, in mammoth's raw-text layout"""
+    return '\n\n'.join(text for _, text in iter_docx_paragraphs(file_path))
+
+
+def extract_docx_text(file_path: str, timeout: int = 0) -> str:
+    """Extract text from a DOCX file
+
+    Uses the low-memory streaming parser first, then mammoth, then python-docx.
+    """
+    with job_timeout(timeout):
+        try:
+            return extract_docx_text_streaming(file_path)
+        except (TimeoutError, MemoryError):
+            raise
+        except Exception as e:
+            logger.warning(f"Streaming DOCX extraction failed, falling back to mammoth: {e}")
+
+        try:
+            return extract_docx_text_mammoth(file_path)
+        except (TimeoutError, MemoryError):
+            raise
+        except Exception as e:
+            logger.error(f"DOCX extraction failed: {e}")
+
+            # Fallback to python-docx
+            from docx import Document
+
+            doc = Document(file_path)
+            return '\n\n'.join(paragraph.text for paragraph in doc.paragraphs)
+
+
+def extract_docx_text_mammoth(file_path: str) -> str:
+    """Extract DOCX text with mammoth (builds the full document model)"""
+    import mammoth
+
+    # Use mammoth for better formatting preservation
+    with open(file_path, "rb") as docx_file:
+        result = mammoth.extract_raw_text(docx_file)
+
+    if result.messages:
+        logger.warning(f"DOCX extraction warnings: {result.messages}")
+
+    return result.value
@@ -1,27 +1,169 @@
 import os
+import json
+import time
+import codecs
 import logging
+import hashlib
+import asyncio
 import aiofiles
 from typing import Optional, Dict, Any
 import tempfile
 import shutil
 from pathlib import Path
 import mimetypes
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-# Document processing libraries
-import PyPDF2
-from docx import Document
-import mammoth
+from . import extraction_worker
+from .text_analytics import analyze_text
+from .language_id import identify_language
+from .retention_index import RetentionIndex
+
+try:
+    from charset_normalizer import from_bytes as detect_charset
+    CHARSET_NORMALIZER_AVAILABLE = True
+except ImportError:
+    CHARSET_NORMALIZER_AVAILABLE = False
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+    MULTIPART_AVAILABLE = True
+except ImportError:
+    MULTIPART_AVAILABLE = False
+
+# Stored extractions are only reused when produced by this version; bump it whenever
+# extraction output changes (page joining, DOCX structure, TXT decoding, ...)
+EXTRACTOR_VERSION = 1
+
+# Headers, boundaries and small form fields around the file in a multipart body
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Byte order marks, longest first (the UTF-32 LE BOM starts with the UTF-16 LE BOM)
+TEXT_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# Canonical codec names (charset_normalizer reports Python aliases such as 'utf_8')
+UTF8_ENCODINGS = frozenset({'utf-8', 'utf-8-sig'})
+
+
+def canonical_encoding(name: str) -> str:
+    """Normalize an encoding alias ('utf_8', 'UTF8', 'windows-1252') to its codec name"""
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return name.lower()
 
 logger = logging.getLogger(__name__)
 
+
+class _MultipartFileCollector:
+    """Parser callbacks that keep the bytes of one named file field of a multipart body"""
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b''
+        self._header_value = b''
+        self._in_file = False
+        self._done = False
+        # Set once the file part and the closing boundary have both been parsed
+        self.complete = False
+        self._chunks = []
+
+        self.callbacks = {
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+            'on_end': self._on_end,
+        }
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b''
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b'content-disposition', b''))
+        if self._done or options.get(b'name', b'').decode('utf-8', 'replace') != self.field_name:
+            return
+        self._in_file = True
+        self.filename = options.get(b'filename', b'').decode('utf-8', 'replace')
+        self.content_type = self._headers.get(b'content-type', b'application/octet-stream').decode('latin-1')
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._chunks.append(data[start:end])
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._done = True
+
+    def _on_end(self):
+        self.complete = self._done
+
+    def drain(self):
+        """File bytes parsed since the last call"""
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
 class FileService:
     def __init__(self):
         self.upload_dir = os.environ.get('UPLOAD_DIR', '/tmp/uploads')
         self.max_file_size = int(os.environ.get('MAX_FILE_SIZE_MB', '25')) * 1024 * 1024  # Convert to bytes
+        self.upload_chunk_size = int(os.environ.get('UPLOAD_CHUNK_SIZE_KB', '1024')) * 1024
+        
+        # Text extraction runs in a process pool so large documents don't block the event loop
+        self.extraction_workers = int(os.environ.get('EXTRACTION_WORKERS', str(os.cpu_count() or 2)))
+        self.extraction_timeout = int(os.environ.get('EXTRACTION_TIMEOUT_SECONDS', '120'))
+        # Memory a worker may allocate on top of what it inherits from the server (see init_worker)
+        self.extraction_memory_limit_mb = int(os.environ.get('EXTRACTION_MEMORY_LIMIT_MB', '1024'))
+        self.pdf_pages_per_job = int(os.environ.get('PDF_PAGES_PER_JOB', '25'))
+        self.txt_streaming_threshold = int(os.environ.get('TXT_STREAMING_THRESHOLD_MB', '8')) * 1024 * 1024
+        self.charset_sample_size = 64 * 1024
+        self._executor: Optional[ProcessPoolExecutor] = None
+        
+        # Per-page PDF text cache: large PDFs return their first pages at upload time
+        # and extract the rest in the background
+        self.page_index_dir = os.environ.get('PAGE_INDEX_DIR', os.path.join(self.upload_dir, 'page_index'))
+        self.lazy_pdf_page_threshold = int(os.environ.get('PDF_LAZY_PAGE_THRESHOLD', '500'))
+        self.lazy_pdf_preview_pages = int(os.environ.get('PDF_PREVIEW_PAGES', '50'))
+        self._index_builds: Dict[str, Dict[str, Any]] = {}
+        os.makedirs(self.page_index_dir, exist_ok=True)
         
         # Create upload directory if it doesn't exist
         os.makedirs(self.upload_dir, exist_ok=True)
         
+        # Uploads are sharded into upload_dir/ab/cd/ by filename hash; a retention index
+        # records each file's expiry so the sweeper never walks the tree
+        self.retention_days = float(os.environ.get('UPLOAD_RETENTION_DAYS', '7'))
+        self.retention_sweep_interval = int(os.environ.get('RETENTION_SWEEP_INTERVAL_SECONDS', '3600'))
+        self.retention_sweep_batch = int(os.environ.get('RETENTION_SWEEP_BATCH_SIZE', '500'))
+        self.retention_index = RetentionIndex(
+            os.environ.get('RETENTION_INDEX_PATH', os.path.join(self.upload_dir, 'retention.db'))
+        )
+        self._sweeper_task: Optional[asyncio.Task] = None
+        
         # Supported file types
         self.supported_types = {
             'text/plain': ['.txt'],
@@ -43,11 +185,13 @@ class FileService:
             
             # Generate safe filename
             safe_filename = self._generate_safe_filename(filename)
-            file_path = os.path.join(self.upload_dir, safe_filename)
+            file_path = self._sharded_path(safe_filename)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
             
             # Save file
             async with aiofiles.open(file_path, 'wb') as f:
                 await f.write(file_content)
+            await self._register_retention(file_path)
             
             # Extract text content
             extracted_text = await self.extract_text_from_file(file_path, content_type)
@@ -70,6 +214,206 @@ class FileService:
                 'error': str(e)
             }
     
+    async def spool_upload(self, upload, filename: str, content_type: str) -> Dict[str, Any]:
+        """Stream an upload to a temp file in chunks, hashing it on the fly
+        
+        `upload` is anything with an async `read(size)` (e.g. FastAPI's UploadFile).
+        An UploadFile has already been received in full by the framework, so the
+        size limit here only keeps oversized files out of the upload directory;
+        use spool_multipart_upload to reject them before the body is read.
+        """
+        # Validate file type before reading anything
+        if not self._is_supported_type(content_type, filename):
+            raise Exception(f"File type not supported. Supported types: TXT, PDF, DOCX")
+        
+        # Reject early when the client declared the size up front
+        declared_size = getattr(upload, 'size', None)
+        if declared_size is not None and declared_size > self.max_file_size:
+            raise Exception(f"File size exceeds maximum allowed size of {self.max_file_size // (1024*1024)}MB")
+        
+        fd, temp_path = tempfile.mkstemp(dir=self.upload_dir, suffix='.part')
+        os.close(fd)
+        
+        hasher = hashlib.sha256()
+        file_size = 0
+        
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                while True:
+                    chunk = await upload.read(self.upload_chunk_size)
+                    if not chunk:
+                        break
+                    
+                    file_size += len(chunk)
+                    if file_size > self.max_file_size:
+                        raise Exception(f"File size exceeds maximum allowed size of {self.max_file_size // (1024*1024)}MB")
+                    
+                    hasher.update(chunk)
+                    await f.write(chunk)
+        except Exception:
+            self.discard_spooled_upload(temp_path)
+            raise
+        
+        return {
+            'temp_path': temp_path,
+            'sha256': hasher.hexdigest(),
+            'file_size': file_size
+        }
+    
+    async def spool_multipart_upload(self, stream, content_type_header: str,
+                                     content_length: Optional[int] = None,
+                                     field_name: str = 'file') -> Dict[str, Any]:
+        """Stream the `field_name` file of a raw multipart/form-data body to a temp file
+        
+        `stream` is the request body as an async iterator of bytes (Starlette's
+        request.stream()), so nothing has been buffered yet: a declared
+        Content-Length over the limit is rejected without reading the body, the
+        file type is checked as soon as the part headers arrive, and the size
+        limit is enforced as bytes come in.
+        """
+        size_error = f"File size exceeds maximum allowed size of {self.max_file_size // (1024*1024)}MB"
+        if content_length is not None and content_length > self.max_file_size + MULTIPART_OVERHEAD_BYTES:
+            raise Exception(size_error)
+        
+        if not MULTIPART_AVAILABLE:
+            raise Exception("Streaming uploads require python-multipart")
+        
+        mime_type, options = parse_options_header(content_type_header or '')
+        boundary = options.get(b'boundary')
+        if mime_type != b'multipart/form-data' or not boundary:
+            raise Exception("Expected a multipart/form-data upload")
+        
+        collector = _MultipartFileCollector(field_name)
+        parser = MultipartParser(boundary, collector.callbacks)
+        
+        fd, temp_path = tempfile.mkstemp(dir=self.upload_dir, suffix='.part')
+        os.close(fd)
+        
+        hasher = hashlib.sha256()
+        body_size = 0
+        file_size = 0
+        type_checked = False
+        
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                async for data in stream:
+                    body_size += len(data)
+                    if body_size > self.max_file_size + MULTIPART_OVERHEAD_BYTES:
+                        raise Exception(size_error)
+                    
+                    parser.write(data)
+                    
+                    if collector.filename is not None and not type_checked:
+                        if not self._is_supported_type(collector.content_type, collector.filename):
+                            raise Exception(f"File type not supported. Supported types: TXT, PDF, DOCX")
+                        type_checked = True
+                    
+                    for chunk in collector.drain():
+                        file_size += len(chunk)
+                        if file_size > self.max_file_size:
+                            raise Exception(size_error)
+                        
+                        hasher.update(chunk)
+                        await f.write(chunk)
+                
+                parser.finalize()
+            
+            if collector.filename is None:
+                raise Exception(f"No '{field_name}' file in upload")
+            # A client that disconnects mid-upload leaves a truncated body the parser accepts as is
+            if not collector.complete:
+                raise Exception("Upload was incomplete")
+        except Exception:
+            self.discard_spooled_upload(temp_path)
+            raise
+        
+        return {
+            'temp_path': temp_path,
+            'sha256': hasher.hexdigest(),
+            'file_size': file_size,
+            'filename': collector.filename,
+            'content_type': collector.content_type
+        }
+    
+    def discard_spooled_upload(self, temp_path: str):
+        """Remove a spooled temp file that will not be kept"""
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+    
+    async def store_spooled_upload(self, spooled: Dict[str, Any], filename: str):
+        """Move a spooled upload into the upload tree under a new name, with its own retention
+        
+        Returns (safe_filename, file_path).
+        """
+        safe_filename = self._generate_safe_filename(filename)
+        file_path = self._sharded_path(safe_filename)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.replace(spooled['temp_path'], file_path)
+        await self._register_retention(file_path)
+        return safe_filename, file_path
+    
+    async def retain_upload(self, file_path: Optional[str], sha256: str) -> bool:
+        """Extend retention of a stored upload (and its page index) that is being reused
+        
+        Returns False if the file is gone, e.g. already swept.
+        """
+        if not file_path or not os.path.isfile(file_path):
+            return False
+        await self._register_retention(file_path)
+        index_dir = self._page_index_paths(sha256)[0]
+        if os.path.isdir(index_dir):
+            await self._register_retention(index_dir)
+        return True
+    
+    async def save_spooled_upload(self, spooled: Dict[str, Any], filename: str, content_type: str) -> Dict[str, Any]:
+        """Move a spooled upload into place and extract its text"""
+        safe_filename, file_path = await self.store_spooled_upload(spooled, filename)
+        
+        # Extract text content; PDFs go through the page index so page ranges stay cached on disk
+        extraction_complete = True
+        page_count = None
+        
+        if self._is_pdf(file_path, content_type):
+            extracted_text, page_count, extraction_complete = await self._extract_pdf_via_page_index(
+                file_path, spooled['sha256']
+            )
+        else:
+            extracted_text = await self.extract_text_from_file(file_path, content_type)
+        
+        validation = await self.validate_text_content(extracted_text or '')
+        
+        return {
+            'success': True,
+            'filename': safe_filename,
+            'original_filename': filename,
+            'file_path': file_path,
+            'file_size': spooled['file_size'],
+            'sha256': spooled['sha256'],
+            'content_type': content_type,
+            'extracted_text': extracted_text,
+            'extraction_failed': (extracted_text or '').startswith('Error extracting'),
+            'extraction_complete': extraction_complete,
+            'page_count': page_count,
+            'word_count': validation['stats']['word_count'],
+            'paragraph_count': validation['stats']['paragraph_count'],
+            'stats': validation['stats']
+        }
+    
+    async def save_upload_stream(self, upload, filename: str, content_type: str) -> Dict[str, Any]:
+        """Stream an upload to disk and return file info, without buffering it in memory"""
+        try:
+            spooled = await self.spool_upload(upload, filename, content_type)
+            return await self.save_spooled_upload(spooled, filename, content_type)
+            
+        except Exception as e:
+            logger.error(f"File upload failed: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
     def _is_supported_type(self, content_type: str, filename: str) -> bool:
         """Check if file type is supported"""
         # Check by content type
@@ -99,7 +443,57 @@ class FileService:
         
         return safe_name
     
-    async def extract_text_from_file(self, file_path: str, content_type: str) -> str:
+    def _sharded_path(self, filename: str) -> str:
+        """Path for a stored file: upload_dir/ab/cd/filename, keyed by a hash of the name"""
+        digest = hashlib.sha256(filename.encode('utf-8')).hexdigest()
+        return os.path.join(self.upload_dir, digest[:2], digest[2:4], filename)
+    
+    def _resolve_upload_path(self, filename: str) -> Optional[str]:
+        """Find a stored file, falling back to the old flat layout"""
+        for file_path in (self._sharded_path(filename), os.path.join(self.upload_dir, filename)):
+            if os.path.isfile(file_path):
+                return file_path
+        return None
+    
+    async def _register_retention(self, file_path: str):
+        try:
+            await asyncio.to_thread(self.retention_index.register, file_path, self.retention_days * 86400)
+        except Exception as e:
+            # A missing index row only means the file outlives its retention period
+            logger.error(f"Could not record retention for {file_path}: {e}")
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Lazily create the extraction process pool"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.extraction_workers,
+                initializer=extraction_worker.init_worker,
+                initargs=(self.extraction_memory_limit_mb,)
+            )
+        return self._executor
+    
+    async def _run_extraction_job(self, func, *args):
+        """Run an extraction job in the process pool with a per-job timeout"""
+        loop = asyncio.get_running_loop()
+        try:
+            # Workers enforce the timeout themselves; the outer wait is a backstop
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._get_executor(), func, *args, self.extraction_timeout),
+                timeout=self.extraction_timeout + 5
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. hit the memory cap); start a fresh pool for later jobs
+            self.shutdown()
+            raise Exception("Extraction worker crashed (document may exceed the memory limit)")
+    
+    def shutdown(self):
+        """Stop the extraction process pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def extract_text_from_file(self, file_path: str, content_type: str,
+                                     progress_callback=None) -> str:
         """Extract text content from uploaded file"""
         try:
             file_ext = Path(file_path).suffix.lower()
@@ -107,7 +501,7 @@ class FileService:
             if file_ext == '.txt' or content_type == 'text/plain':
                 return await self._extract_from_txt(file_path)
             elif file_ext == '.pdf' or content_type == 'application/pdf':
-                return await self._extract_from_pdf(file_path)
+                return await self._extract_from_pdf(file_path, progress_callback)
             elif file_ext == '.docx' or content_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
                 return await self._extract_from_docx(file_path)
             elif file_ext == '.doc' or content_type == 'application/msword':
@@ -120,67 +514,306 @@ class FileService:
             return f"Error extracting text: {str(e)}"
     
     async def _extract_from_txt(self, file_path: str) -> str:
-        """Extract text from TXT file"""
+        """Extract text from TXT file, reading it from disk once"""
+        if os.path.getsize(file_path) > self.txt_streaming_threshold:
+            return await asyncio.to_thread(self._decode_text_file_streaming, file_path)
+        
+        async with aiofiles.open(file_path, 'rb') as f:
+            data = await f.read()
+        
+        encoding = self._detect_text_encoding(data)
+        if encoding not in UTF8_ENCODINGS:
+            logger.info(f"Decoding TXT upload as {encoding}")
+        return data.decode(encoding, errors='replace')
+    
+    def _detect_text_encoding(self, sample: bytes, partial: bool = False) -> str:
+        """Pick an encoding for text bytes: BOM, then a fast UTF-8 check, then charset detection
+        
+        `partial` means the sample may end mid-character (e.g. the head of a large file).
+        The result is a canonical codec name (see canonical_encoding).
+        """
+        for bom, encoding in TEXT_BOMS:
+            if sample.startswith(bom):
+                return encoding
+        
+        # Fast path: most manuscripts are plain ASCII/UTF-8
+        if sample.isascii():
+            return 'utf-8'
         try:
-            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-            return content
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=not partial)
+            return 'utf-8'
         except UnicodeDecodeError:
-            # Try different encodings
-            for encoding in ['latin-1', 'cp1252', 'iso-8859-1']:
-                try:
-                    async with aiofiles.open(file_path, 'r', encoding=encoding) as f:
-                        content = await f.read()
-                    return content
-                except:
-                    continue
-            raise Exception("Could not decode text file")
-    
-    async def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file"""
+            pass
+        
+        if CHARSET_NORMALIZER_AVAILABLE:
+            best = detect_charset(sample).best()
+            if best and best.encoding:
+                return canonical_encoding(best.encoding)
+        
+        # cp1252 covers most legacy Western manuscripts; latin-1 accepts any byte sequence
         try:
-            text_content = []
+            sample.decode('cp1252')
+            return 'cp1252'
+        except UnicodeDecodeError:
+            return 'latin-1'
+    
+    def _decode_text_file_streaming(self, file_path: str) -> str:
+        """Decode a very large TXT file chunk by chunk with an incremental decoder"""
+        with open(file_path, 'rb') as f:
+            sample = f.read(self.charset_sample_size)
+            encoding = self._detect_text_encoding(sample, partial=True)
+            f.seek(0)
             
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text_content.append(page.extract_text())
+            try:
+                return self._decode_stream(f, encoding, errors='strict')
+            except UnicodeDecodeError as e:
+                # The head looked like UTF-8 but the body is not; detect again on the offending bytes
+                f.seek(max(0, f.tell() - self.upload_chunk_size))
+                fallback = self._detect_text_encoding(f.read(self.charset_sample_size), partial=True)
+                if fallback in UTF8_ENCODINGS:
+                    fallback = 'cp1252'
+                logger.info(f"TXT upload is not {encoding} ({e.reason}), re-decoding as {fallback}")
+                f.seek(0)
+                return self._decode_stream(f, fallback, errors='replace')
+    
+    def _decode_stream(self, f, encoding: str, errors: str) -> str:
+        decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        parts = []
+        while True:
+            chunk = f.read(self.upload_chunk_size)
+            if not chunk:
+                break
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b'', final=True))
+        return ''.join(parts)
+    
+    def _is_pdf(self, file_path: str, content_type: str) -> bool:
+        return Path(file_path).suffix.lower() == '.pdf' or content_type == 'application/pdf'
+    
+    def _submit_pdf_page_jobs(self, file_path: str, page_count: int) -> list:
+        """Fan page ranges of a PDF out across the process pool, returning futures in page order"""
+        return [
+            asyncio.ensure_future(
+                self._run_extraction_job(extraction_worker.extract_pdf_pages, file_path, start,
+                                         min(start + self.pdf_pages_per_job, page_count))
+            )
+            for start in range(0, page_count, self.pdf_pages_per_job)
+        ]
+    
+    async def _extract_from_pdf(self, file_path: str, progress_callback=None) -> str:
+        """Extract text from PDF file, fanning page ranges out across the process pool"""
+        try:
+            page_count = await self._run_extraction_job(extraction_worker.count_pdf_pages, file_path)
+            jobs = self._submit_pdf_page_jobs(file_path, page_count)
+            
+            pages_done = 0
+            try:
+                for finished in asyncio.as_completed(jobs):
+                    pages = await finished
+                    pages_done += len(pages)
+                    if progress_callback:
+                        await progress_callback(f"Extracted {pages_done}/{page_count} PDF pages",
+                                                int((pages_done / max(page_count, 1)) * 100))
+            except Exception:
+                for job in jobs:
+                    job.cancel()
+                raise
             
+            # Reassemble page ranges in document order
+            text_content = [page_text for job in jobs for page_text in job.result()]
             return '\n\n'.join(text_content)
             
         except Exception as e:
             logger.error(f"PDF extraction failed: {e}")
             return f"Error extracting PDF content: {str(e)}"
     
-    async def _extract_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file"""
+    async def _extract_pdf_via_page_index(self, file_path: str, sha256: str):
+        """Extract a PDF through its page index
+        
+        Returns (text, page_count, complete). PDFs above the lazy threshold return
+        only their first pages while the rest of the index builds in the background.
+        """
         try:
-            # Use mammoth for better formatting preservation
-            with open(file_path, "rb") as docx_file:
-                result = mammoth.extract_raw_text(docx_file)
+            index = await self._load_page_index(sha256)
+            if index and index['complete']:
+                # The index is shared by every upload of this content; each upload extends its retention
+                await self._register_retention(self._page_index_paths(sha256)[0])
+            else:
+                page_count = await self._run_extraction_job(extraction_worker.count_pdf_pages, file_path)
+                build = self.start_page_index_build(file_path, sha256, page_count)
+                
+                if page_count > self.lazy_pdf_page_threshold:
+                    # Errors in the background build are logged by build_page_index
+                    build.add_done_callback(lambda task: task.cancelled() or task.exception())
+                    preview = await self.get_page_range(sha256, 1, self.lazy_pdf_preview_pages, wait=True)
+                    if build.done():
+                        await build  # surface a build that failed before the preview was ready
+                    logger.info(f"Large PDF ({page_count} pages): returning first {preview['end_page']} pages, indexing the rest in background")
+                    return '\n\n'.join(preview['pages']), page_count, False
                 
-            if result.messages:
-                logger.warning(f"DOCX extraction warnings: {result.messages}")
+                index = await build
+            
+            text_range = await self.get_page_range(sha256, 1, index['page_count'])
+            return '\n\n'.join(text_range['pages']), index['page_count'], True
+            
+        except Exception as e:
+            logger.error(f"PDF extraction failed: {e}")
+            return f"Error extracting PDF content: {str(e)}", None, True
+    
+    def _page_index_paths(self, sha256: str):
+        index_dir = os.path.join(self.page_index_dir, sha256)
+        return index_dir, os.path.join(index_dir, 'pages.txt'), os.path.join(index_dir, 'index.json')
+    
+    async def _load_page_index(self, sha256: str) -> Optional[Dict[str, Any]]:
+        _, _, index_path = self._page_index_paths(sha256)
+        try:
+            async with aiofiles.open(index_path, 'r', encoding='utf-8') as f:
+                return json.loads(await f.read())
+        except FileNotFoundError:
+            return None
+    
+    async def _write_page_index(self, index_path: str, index: Dict[str, Any]):
+        # Write then rename so readers never see a half-written index
+        temp_path = index_path + '.tmp'
+        async with aiofiles.open(temp_path, 'w', encoding='utf-8') as f:
+            await f.write(json.dumps(index))
+        os.replace(temp_path, index_path)
+    
+    async def build_page_index(self, file_path: str, sha256: str, page_count: Optional[int] = None,
+                               progress_callback=None) -> Dict[str, Any]:
+        """Extract a PDF page by page into an on-disk page index
+        
+        Page text is appended to pages.txt in page order as ranges complete, and
+        index.json records the byte offset of every page, so early pages can be
+        read while later ones are still extracting.
+        """
+        index = await self._load_page_index(sha256)
+        if index and index['complete']:
+            return index
+        
+        return await self.start_page_index_build(file_path, sha256, page_count, progress_callback)
+    
+    def start_page_index_build(self, file_path: str, sha256: str, page_count: Optional[int] = None,
+                               progress_callback=None) -> asyncio.Future:
+        """Start building a page index in the background, or join the build already running"""
+        if sha256 in self._index_builds:
+            return self._index_builds[sha256]['task']
+        
+        # Register the build before it starts so get_page_range(wait=True) can follow it immediately
+        state = {'pages_ready': 0, 'complete': False, 'condition': asyncio.Condition()}
+        self._index_builds[sha256] = state
+        state['task'] = asyncio.ensure_future(
+            self._run_page_index_build(state, file_path, sha256, page_count, progress_callback)
+        )
+        return state['task']
+    
+    async def _run_page_index_build(self, state: Dict[str, Any], file_path: str, sha256: str,
+                                    page_count: Optional[int], progress_callback) -> Dict[str, Any]:
+        index_dir, pages_path, index_path = self._page_index_paths(sha256)
+        os.makedirs(index_dir, exist_ok=True)
+        # The sweeper removes the whole directory when it expires
+        await self._register_retention(index_dir)
+        jobs = []
+        
+        try:
+            if page_count is None:
+                page_count = await self._run_extraction_job(extraction_worker.count_pdf_pages, file_path)
+            
+            index = {'sha256': sha256, 'page_count': page_count, 'pages_ready': 0,
+                     'offsets': [0], 'complete': False}
+            await self._write_page_index(index_path, index)
+            
+            jobs = self._submit_pdf_page_jobs(file_path, page_count)
+            
+            async with aiofiles.open(pages_path, 'wb') as pages_file:
+                # Ranges finish out of order; append each one once everything before it is written
+                for job in jobs:
+                    for page_text in await job:
+                        encoded = (page_text or '').encode('utf-8')
+                        await pages_file.write(encoded)
+                        index['offsets'].append(index['offsets'][-1] + len(encoded))
+                    await pages_file.flush()
+                    
+                    index['pages_ready'] = len(index['offsets']) - 1
+                    index['complete'] = index['pages_ready'] >= page_count
+                    await self._write_page_index(index_path, index)
+                    
+                    async with state['condition']:
+                        state['pages_ready'] = index['pages_ready']
+                        state['condition'].notify_all()
+                    
+                    if progress_callback:
+                        await progress_callback(f"Indexed {index['pages_ready']}/{page_count} PDF pages",
+                                                int((index['pages_ready'] / max(page_count, 1)) * 100))
+            
+            return index
+            
+        except Exception as e:
+            logger.error(f"Page index build failed: {e}")
+            for job in jobs:
+                job.cancel()
+            raise
+            
+        finally:
+            async with state['condition']:
+                state['complete'] = True
+                state['condition'].notify_all()
+            self._index_builds.pop(sha256, None)
+    
+    async def get_page_range(self, sha256: str, start_page: int, end_page: int,
+                             wait: bool = False) -> Optional[Dict[str, Any]]:
+        """Return the text of pages start_page..end_page (1-based, inclusive) from the page index
+        
+        With wait=True and an index still building, waits until the range is extracted.
+        Otherwise returns whatever part of the range is ready.
+        """
+        state = self._index_builds.get(sha256)
+        if wait and state:
+            async with state['condition']:
+                await state['condition'].wait_for(
+                    lambda: state['pages_ready'] >= end_page or state['complete']
+                )
+        
+        index = await self._load_page_index(sha256)
+        if not index:
+            return None
+        
+        start_page = max(1, start_page)
+        end_page = min(end_page, index['page_count'])
+        last_ready = min(end_page, index['pages_ready'])
+        
+        pages = []
+        if last_ready >= start_page:
+            offsets = index['offsets']
+            _, pages_path, _ = self._page_index_paths(sha256)
+            async with aiofiles.open(pages_path, 'rb') as f:
+                await f.seek(offsets[start_page - 1])
+                data = await f.read(offsets[last_ready] - offsets[start_page - 1])
             
-            return result.value
+            base = offsets[start_page - 1]
+            pages = [
+                data[offsets[page - 1] - base:offsets[page] - base].decode('utf-8')
+                for page in range(start_page, last_ready + 1)
+            ]
+        
+        return {
+            'sha256': sha256,
+            'start_page': start_page,
+            'end_page': max(last_ready, start_page - 1),
+            'page_count': index['page_count'],
+            'pages_ready': index['pages_ready'],
+            'complete': last_ready >= end_page,
+            'pages': pages
+        }
+    
+    async def _extract_from_docx(self, file_path: str) -> str:
+        """Extract text from DOCX file"""
+        try:
+            return await self._run_extraction_job(extraction_worker.extract_docx_text, file_path)
             
         except Exception as e:
             logger.error(f"DOCX extraction failed: {e}")
-            # Fallback to python-docx
-            try:
-                doc = Document(file_path)
-                text_content = []
-                
-                for paragraph in doc.paragraphs:
-                    text_content.append(paragraph.text)
-                
-                return '\n\n'.join(text_content)
-                
-            except Exception as e2:
-                logger.error(f"DOCX fallback extraction failed: {e2}")
-                return f"Error extracting DOCX content: {str(e)}"
+            return f"Error extracting DOCX content: {str(e)}"
     
     async def _extract_from_doc(self, file_path: str) -> str:
         """Extract text from legacy DOC file"""
@@ -196,9 +829,10 @@ class FileService:
     async def delete_file(self, filename: str) -> bool:
         """Delete uploaded file"""
         try:
-            file_path = os.path.join(self.upload_dir, filename)
-            if os.path.exists(file_path):
+            file_path = self._resolve_upload_path(filename)
+            if file_path:
                 os.remove(file_path)
+                await asyncio.to_thread(self.retention_index.forget, [file_path])
                 return True
             return False
             
@@ -209,9 +843,9 @@ class FileService:
     async def get_file_info(self, filename: str) -> Optional[Dict[str, Any]]:
         """Get information about uploaded file"""
         try:
-            file_path = os.path.join(self.upload_dir, filename)
+            file_path = self._resolve_upload_path(filename)
             
-            if not os.path.exists(file_path):
+            if not file_path:
                 return None
             
             stat = os.stat(file_path)
@@ -242,22 +876,14 @@ class FileService:
     def cleanup_old_files(self, days_old: int = 7) -> int:
         """Clean up files older than specified days"""
         try:
-            import time
-            current_time = time.time()
-            cutoff_time = current_time - (days_old * 24 * 60 * 60)
-            
+            cutoff_time = time.time() - (days_old * 24 * 60 * 60)
             removed_count = 0
             
-            for filename in os.listdir(self.upload_dir):
-                file_path = os.path.join(self.upload_dir, filename)
-                
-                if os.path.isfile(file_path):
-                    file_time = os.path.getmtime(file_path)
-                    
-                    if file_time < cutoff_time:
-                        os.remove(file_path)
-                        removed_count += 1
-                        logger.info(f"Removed old file: {filename}")
+            while True:
+                paths = self.retention_index.created_before(cutoff_time, self.retention_sweep_batch)
+                if not paths:
+                    break
+                removed_count += self._remove_indexed_files(paths)
             
             return removed_count
             
@@ -265,17 +891,103 @@ class FileService:
             logger.error(f"Cleanup failed: {e}")
             return 0
     
+    def _remove_indexed_files(self, paths) -> int:
+        """Delete a batch of indexed files (or page index directories) and their index rows"""
+        removed_count = 0
+        for file_path in paths:
+            try:
+                if os.path.isdir(file_path):
+                    shutil.rmtree(file_path)
+                else:
+                    os.remove(file_path)
+                removed_count += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove expired file {file_path}: {e}")
+        
+        self.retention_index.forget(paths)
+        return removed_count
+    
+    def _backfill_legacy_uploads(self):
+        """Register files from the old flat layout in the retention index (runs once)"""
+        if self.retention_index.get_meta('legacy_backfill_done'):
+            return
+        
+        retention_seconds = self.retention_days * 86400
+        entries = []
+        with os.scandir(self.upload_dir) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith('retention.db'):
+                    mtime = entry.stat().st_mtime
+                    entries.append((entry.path, mtime, mtime + retention_seconds))
+        
+        self.retention_index.register_many(entries)
+        self.retention_index.set_meta('legacy_backfill_done', str(time.time()))
+        if entries:
+            logger.info(f"Registered {len(entries)} legacy uploads for retention")
+    
+    async def sweep_expired_files(self) -> int:
+        """Delete expired uploads in batches, yielding to the event loop between batches"""
+        removed_count = 0
+        now = time.time()
+        
+        while True:
+            paths = await asyncio.to_thread(self.retention_index.expired, now, self.retention_sweep_batch)
+            if not paths:
+                break
+            removed_count += await asyncio.to_thread(self._remove_indexed_files, paths)
+            await asyncio.sleep(0)
+        
+        if removed_count:
+            logger.info(f"Retention sweep removed {removed_count} expired uploads")
+        return removed_count
+    
+    async def _run_retention_sweeper(self):
+        try:
+            await asyncio.to_thread(self._backfill_legacy_uploads)
+        except Exception as e:
+            logger.error(f"Legacy upload backfill failed: {e}")
+        
+        while True:
+            try:
+                await self.sweep_expired_files()
+            except Exception as e:
+                logger.error(f"Retention sweep failed: {e}")
+            await asyncio.sleep(self.retention_sweep_interval)
+    
+    def start_retention_sweeper(self) -> asyncio.Task:
+        """Start the background retention sweeper (call from the app's startup)"""
+        if self._sweeper_task is None or self._sweeper_task.done():
+            self._sweeper_task = asyncio.create_task(self._run_retention_sweeper())
+        return self._sweeper_task
+    
+    async def stop_retention_sweeper(self):
+        """Cancel the background retention sweeper"""
+        if self._sweeper_task is not None:
+            self._sweeper_task.cancel()
+            try:
+                await self._sweeper_task
+            except asyncio.CancelledError:
+                pass
+            self._sweeper_task = None
+    
+    @staticmethod
+    def _text_stats(content: str) -> Dict[str, Any]:
+        """Text statistics plus the detected language; CPU-bound, so run off the event loop"""
+        stats = analyze_text(content)
+        language = identify_language(content)
+        stats['language'] = language['language']
+        stats['language_confidence'] = language['confidence']
+        return stats
+    
     async def validate_text_content(self, content: str) -> Dict[str, Any]:
         """Validate extracted text content"""
+        stats = await asyncio.to_thread(self._text_stats, content)
         validation_result = {
             'valid': True,
             'issues': [],
-            'stats': {
-                'character_count': len(content),
-                'word_count': len(content.split()),
-                'paragraph_count': len(content.split('\n\n')),
-                'line_count': len(content.split('\n'))
-            }
+            'stats': stats
         }
         
         # Check if content is too short
@@ -283,12 +995,11 @@ class FileService:
             validation_result['issues'].append("Content appears to be very short (less than 100 characters)")
         
         # Check if content is mostly non-text characters
-        alpha_chars = sum(1 for c in content if c.isalpha())
-        if alpha_chars / max(len(content), 1) < 0.5:
+        if stats['alpha_ratio'] < 0.5:
             validation_result['issues'].append("Content appears to contain mostly non-text characters")
         
         # Check for reasonable word count
-        word_count = validation_result['stats']['word_count']
+        word_count = stats['word_count']
         if word_count < 10:
             validation_result['issues'].append("Content has very few words, may not be suitable for book generation")
         
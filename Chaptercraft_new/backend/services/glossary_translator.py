@@ -0,0 +1,133 @@
+import os
+import re
+import json
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Built-in demo glossaries, extended or overridden by TRANSLATION_GLOSSARY_DIR/<lang>.json
+DEFAULT_GLOSSARIES = {
+    'fr': {
+        'hello': 'bonjour',
+        'world': 'monde',
+        'book': 'livre',
+        'story': 'histoire',
+        'chapter': 'chapitre'
+    },
+    'es': {
+        'hello': 'hola',
+        'world': 'mundo',
+        'book': 'libro',
+        'story': 'historia',
+        'chapter': 'capítulo'
+    },
+    'zh': {
+        'hello': '你好',
+        'world': '世界',
+        'book': '书',
+        'story': '故事',
+        'chapter': '章节'
+    },
+    'ja': {
+        'hello': 'こんにちは',
+        'world': '世界',
+        'book': '本',
+        'story': '物語',
+        'chapter': '章'
+    },
+    'hi': {
+        'hello': 'नमस्ते',
+        'world': 'दुनिया',
+        'book': 'किताब',
+        'story': 'कहानी',
+        'chapter': 'अध्याय'
+    }
+}
+
+
+def _trie_pattern(terms) -> str:
+    """Regex source matching any of `terms`, factored into a character trie
+
+    Shared prefixes are matched once, so the regex engine does work
+    proportional to the word at hand rather than the number of terms.
+    Spaces inside phrases match any run of whitespace.
+    """
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: dict) -> str:
+    branches = [(r'\s+' if char == ' ' else re.escape(char)) + _node_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # Greedy: the longer term is tried first
+        return ('(?:' + body + ')' if len(branches) == 1 and len(body) > 1 else body) + '?'
+    return body
+
+
+class GlossaryTranslator:
+    """Word-boundary glossary substitution in a single pass over the text.
+
+    All terms, including multi-word phrases, are compiled into one trie-shaped
+    regex anchored on word boundaries, so "book" never rewrites "bookkeeper",
+    the longest term wins, and the text is scanned once in the regex engine
+    regardless of glossary size. The case of the source (lower, Title or UPPER)
+    is carried over to the translation.
+    """
+
+    def __init__(self, glossary: Dict[str, str]):
+        self.glossary = {self._key(source): target for source, target in glossary.items() if source.strip()}
+        self.pattern = re.compile(r'(?<!\w)' + _trie_pattern(self.glossary) + r'(?!\w)', re.IGNORECASE)
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return ' '.join(text.lower().split())
+
+    def _replace(self, match) -> str:
+        source = match.group(0)
+        if source.islower():
+            return self.glossary.get(source) or self.glossary.get(self._key(source), source)
+
+        target = self.glossary.get(self._key(source))
+        if target is None:
+            return source
+        if len(source) > 1 and source.isupper():
+            return target.upper()
+        if source[0].isupper():
+            return target[:1].upper() + target[1:]
+        return target
+
+    def translate(self, text: str) -> str:
+        if not self.glossary:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+
+def load_glossaries(glossary_dir: Optional[str] = None) -> Dict[str, GlossaryTranslator]:
+    """Compiled translators per target language: the defaults plus any <lang>.json in `glossary_dir`"""
+    glossaries = {language: dict(entries) for language, entries in DEFAULT_GLOSSARIES.items()}
+
+    if glossary_dir and os.path.isdir(glossary_dir):
+        for filename in sorted(os.listdir(glossary_dir)):
+            language, ext = os.path.splitext(filename)
+            if ext != '.json':
+                continue
+            try:
+                with open(os.path.join(glossary_dir, filename), 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+                if not isinstance(entries, dict):
+                    raise ValueError("expected a JSON object of source -> target terms")
+                glossaries.setdefault(language, {}).update(entries)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping glossary {filename}: {e}")
+
+    return {language: GlossaryTranslator(entries) for language, entries in glossaries.items()}
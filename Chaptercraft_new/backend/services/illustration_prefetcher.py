@@ -0,0 +1,105 @@
+import re
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# "Page 3:" / "**Page 3:**" at the start of a line
+PAGE_HEADER_PATTERN = re.compile(r'^[ \t]*\**Page[ \t]+(\d+)[ \t]*:?\**', re.MULTILINE)
+
+
+class PageIllustrationPrefetcher:
+    """Start illustration jobs for story pages while the story text is still arriving.
+
+    Text is fed in as it is streamed or chunked. A "Page N:" block is final once the
+    next page header arrives (or the text ends), and its illustration job is queued
+    immediately so image latency overlaps text latency.
+    """
+
+    def __init__(self, generate_image: Callable[[str, int], Awaitable[str]],
+                 max_pages: int = 8, max_concurrency: int = 4):
+        self.generate_image = generate_image
+        self.max_pages = max_pages
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._text = ''
+        self._pending = ''
+        self._scan_from = 0
+        self._open_page: Optional[int] = None
+        self._open_page_start = 0
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    @property
+    def text(self) -> str:
+        """Full text received so far"""
+        return self._text + self._pending
+
+    def feed(self, chunk: str):
+        """Add streamed text and queue jobs for any pages that became final"""
+        if not chunk:
+            return
+
+        self._pending += chunk
+
+        # Only scan complete lines so a half-received header is never matched
+        last_newline = self._pending.rfind('\n')
+        if last_newline < 0:
+            return
+
+        self._text += self._pending[:last_newline + 1]
+        self._pending = self._pending[last_newline + 1:]
+        self._scan(self._text, len(self._text))
+
+    def finish(self):
+        """Mark the text as complete and queue the last open page"""
+        self._text += self._pending
+        self._pending = ''
+        text = self._text
+        self._scan(text, len(text))
+
+        if self._open_page is not None:
+            self._queue_page(self._open_page, text[self._open_page_start:])
+            self._open_page = None
+
+    def _scan(self, text: str, end: int):
+        for match in PAGE_HEADER_PATTERN.finditer(text, self._scan_from, end):
+            if self._open_page is not None:
+                self._queue_page(self._open_page, text[self._open_page_start:match.start()])
+
+            self._open_page = int(match.group(1))
+            self._open_page_start = match.start()
+
+        self._scan_from = end
+
+    def _queue_page(self, page_number: int, page_content: str):
+        if page_number > self.max_pages or page_number in self._tasks:
+            return
+
+        logger.info(f"🖼️ Page {page_number} finalized, queueing illustration")
+        self._tasks[page_number] = asyncio.create_task(self._run(page_number, page_content.strip()))
+
+    async def _run(self, page_number: int, page_content: str) -> str:
+        async with self._semaphore:
+            return await self.generate_image(page_content, page_number)
+
+    async def results(self) -> Dict[int, str]:
+        """Wait for all queued illustration jobs and return image URLs by page number"""
+        image_map = {}
+
+        for page_number, task in sorted(self._tasks.items()):
+            try:
+                image_url = await task
+            except Exception as e:
+                logger.error(f"Illustration failed for page {page_number}: {e}")
+                continue
+
+            if image_url:
+                image_map[page_number] = image_url
+
+        return image_map
+
+    def cancel(self):
+        """Cancel any illustration jobs that have not finished"""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
@@ -1,8 +1,10 @@
 import os
 import logging
 import asyncio
+import hashlib
+from collections import OrderedDict
 import fal_client
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,21 @@ class ImageService:
         if self.api_key:
             os.environ["FAL_KEY"] = self.api_key
         
+        # Cover variant generation settings
+        self.cover_variants = int(os.environ.get('COVER_VARIANTS_PER_CALL', '4'))
+        self.cover_steps = int(os.environ.get('COVER_INFERENCE_STEPS', '50'))
+        self.cover_draft_steps = int(os.environ.get('COVER_DRAFT_INFERENCE_STEPS', '12'))
+        self.cover_cache_size = int(os.environ.get('COVER_CACHE_MAX_ENTRIES', '256'))
+        if self.cover_cache_size < 1:
+            raise ValueError("COVER_CACHE_MAX_ENTRIES must be at least 1")
+        
+        # Cached cover candidates keyed by (user, title, genre, style, description hash, draft),
+        # so users never see each other's images. Each entry holds the generated variants
+        # and a cursor for paging through them.
+        self._cover_cache: "OrderedDict[Tuple[str, str, str, str, str, bool], Dict[str, Any]]" = OrderedDict()
+        # One lock per key while requests for it are in flight, with a count of those requests
+        self._cover_locks: Dict[Tuple[str, str, str, str, str, bool], Dict[str, Any]] = {}
+        
         # Cover art styles by genre
         self.genre_styles = {
             'ebook': {
@@ -121,9 +138,53 @@ Requirements:
         
         return prompt
     
+    def _cover_cache_key(self, user_id: Optional[str], title: str, genre: str, description: str,
+                         style: str, draft: bool) -> Tuple[str, str, str, str, str, bool]:
+        """Build the cache key for cover variants"""
+        description_hash = hashlib.sha256((description or '').strip().encode('utf-8')).hexdigest()[:16]
+        return (str(user_id or ''), title.strip().lower(), genre, style, description_hash, draft)
+    
+    def _next_cached_cover(self, key: Tuple[str, str, str, str, str, bool]) -> Optional[Dict[str, Any]]:
+        """Return the next unseen cached variant for a key, or None when exhausted"""
+        entry = self._cover_cache.get(key)
+        if not entry:
+            return None
+        
+        self._cover_cache.move_to_end(key)
+        if entry['cursor'] >= len(entry['variants']):
+            return None
+        
+        variant_index = entry['cursor']
+        entry['cursor'] += 1
+        return {
+            'image_url': entry['variants'][variant_index],
+            'variant_index': variant_index,
+            'variants': list(entry['variants']),
+            'prompt_used': entry['prompt']
+        }
+    
+    def _store_cover_variants(self, key: Tuple[str, str, str, str, str, bool], prompt: str,
+                              image_urls: List[str]):
+        """Append newly generated variants to the cache, evicting the oldest keys"""
+        entry = self._cover_cache.get(key)
+        if entry:
+            entry['variants'].extend(image_urls)
+            self._cover_cache.move_to_end(key)
+        else:
+            self._cover_cache[key] = {'prompt': prompt, 'variants': list(image_urls), 'cursor': 0}
+        
+        while len(self._cover_cache) > self.cover_cache_size:
+            self._cover_cache.popitem(last=False)
+    
     async def generate_cover_art(self, title: str, genre: str, description: str, 
-                                style: str = 'professional') -> Dict[str, Any]:
-        """Generate book cover art using Flux API"""
+                                style: str = 'professional', num_variants: Optional[int] = None,
+                                draft: bool = False, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Generate book cover art using Flux API
+        
+        Several variants are requested in one call and cached per user. Repeated calls
+        for the same cover page through the cached variants before paying for a new batch.
+        Draft mode uses fewer inference steps for fast previews.
+        """
         try:
             if not self.api_key:
                 raise Exception("FAL_KEY not configured")
@@ -131,33 +192,69 @@ Requirements:
             # Build optimized prompt
             prompt = self._build_cover_prompt(title, genre, description, style)
             
-            # Submit request to fal.ai
-            handler = await fal_client.submit_async(
-                "fal-ai/flux/dev",
-                arguments={
-                    "prompt": prompt,
-                    "image_size": "portrait_4_3",  # Good for book covers
-                    "num_inference_steps": 50,
-                    "guidance_scale": 7.5,
-                    "num_images": 1
-                }
-            )
+            key = self._cover_cache_key(user_id, title, genre, description, style, draft)
+            holder = self._cover_locks.setdefault(key, {'lock': asyncio.Lock(), 'waiters': 0})
+            holder['waiters'] += 1
             
-            # Get result
-            result = await handler.get()
-            
-            if result and 'images' in result and len(result['images']) > 0:
-                image_url = result['images'][0]['url']
-                
-                return {
-                    'success': True,
-                    'image_url': image_url,
-                    'prompt_used': prompt,
-                    'style': style,
-                    'genre': genre
-                }
-            else:
-                raise Exception("No images generated")
+            try:
+                async with holder['lock']:
+                    cached = self._next_cached_cover(key)
+                    if cached:
+                        logger.info(f"Serving cached cover variant {cached['variant_index'] + 1} for '{title}'")
+                        return {
+                            'success': True,
+                            'image_url': cached['image_url'],
+                            'variants': cached['variants'],
+                            'variant_index': cached['variant_index'],
+                            'cached': True,
+                            'draft': draft,
+                            'prompt_used': cached['prompt_used'],
+                            'style': style,
+                            'genre': genre
+                        }
+                    
+                    variants = max(1, min(num_variants or self.cover_variants, 4))
+                    
+                    # Submit request to fal.ai
+                    handler = await fal_client.submit_async(
+                        "fal-ai/flux/dev",
+                        arguments={
+                            "prompt": prompt,
+                            "image_size": "portrait_4_3",  # Good for book covers
+                            "num_inference_steps": self.cover_draft_steps if draft else self.cover_steps,
+                            "guidance_scale": 7.5,
+                            "num_images": variants
+                        }
+                    )
+                    
+                    # Get result
+                    result = await handler.get()
+                    
+                    if not (result and 'images' in result and len(result['images']) > 0):
+                        raise Exception("No images generated")
+                    
+                    image_urls = [image['url'] for image in result['images'] if image.get('url')]
+                    if not image_urls:
+                        raise Exception("No images generated")
+                    
+                    self._store_cover_variants(key, prompt, image_urls)
+                    cached = self._next_cached_cover(key)
+                    
+                    return {
+                        'success': True,
+                        'image_url': cached['image_url'],
+                        'variants': cached['variants'],
+                        'variant_index': cached['variant_index'],
+                        'cached': False,
+                        'draft': draft,
+                        'prompt_used': prompt,
+                        'style': style,
+                        'genre': genre
+                    }
+            finally:
+                holder['waiters'] -= 1
+                if not holder['waiters']:
+                    self._cover_locks.pop(key, None)
                 
         except Exception as e:
             logger.error(f"Cover art generation failed: {e}")
@@ -0,0 +1,310 @@
+import re
+import math
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable
+
+# Reference text for the Latin-script languages; character trigram profiles are built from it once
+LANGUAGE_SAMPLES = {
+    'en': (
+        "The old house stood at the end of the road, and nobody in the village could remember who had "
+        "built it. Every evening the children would walk past the gate and wonder what was hidden behind "
+        "the shuttered windows. One morning in early spring, a young woman arrived with a single suitcase "
+        "and a key that nobody knew existed. She opened the door as if she had always lived there. "
+        "\"I have been looking for this place for years,\" she told the baker, who was the first to ask. "
+        "Within a week the garden was full of flowers, the chimney was smoking, and the whole village was "
+        "talking about the stranger. What they did not know was that she had come to finish a story her "
+        "grandmother had started, a story about a letter that was never delivered and a promise that was "
+        "never kept. She worked through the night, writing by candlelight while the wind howled outside."
+    ),
+    'fr': (
+        "La vieille maison se trouvait au bout du chemin, et personne dans le village ne se souvenait de "
+        "celui qui l'avait construite. Chaque soir, les enfants passaient devant le portail en se demandant "
+        "ce qui se cachait derrière les volets fermés. Un matin, au début du printemps, une jeune femme est "
+        "arrivée avec une seule valise et une clé dont personne ne connaissait l'existence. Elle a ouvert la "
+        "porte comme si elle avait toujours vécu là. « Je cherche cet endroit depuis des années », dit-elle "
+        "au boulanger, qui fut le premier à poser la question. En une semaine, le jardin était plein de "
+        "fleurs, la cheminée fumait et tout le village parlait de l'étrangère. Ce qu'ils ne savaient pas, "
+        "c'est qu'elle était venue terminer une histoire que sa grand-mère avait commencée, l'histoire d'une "
+        "lettre jamais envoyée et d'une promesse jamais tenue. Elle travaillait toute la nuit à la bougie."
+    ),
+    'es': (
+        "La vieja casa estaba al final del camino, y nadie en el pueblo recordaba quién la había "
+        "construido. Todas las tardes los niños pasaban junto a la verja y se preguntaban qué se escondía "
+        "detrás de las ventanas cerradas. Una mañana, a principios de la primavera, llegó una joven con una "
+        "sola maleta y una llave cuya existencia nadie conocía. Abrió la puerta como si siempre hubiera "
+        "vivido allí. «Llevo años buscando este lugar», le dijo al panadero, que fue el primero en "
+        "preguntar. En una semana el jardín estaba lleno de flores, la chimenea echaba humo y todo el pueblo "
+        "hablaba de la forastera. Lo que no sabían era que había venido a terminar una historia que su "
+        "abuela había empezado, la historia de una carta que nunca fue entregada y de una promesa que nunca "
+        "se cumplió. Trabajaba durante toda la noche, escribiendo a la luz de una vela mientras el viento soplaba."
+    ),
+    'de': (
+        "Das alte Haus stand am Ende der Straße, und niemand im Dorf konnte sich erinnern, wer es gebaut "
+        "hatte. Jeden Abend gingen die Kinder am Tor vorbei und fragten sich, was sich hinter den "
+        "geschlossenen Fensterläden verbarg. Eines Morgens im frühen Frühling kam eine junge Frau mit einem "
+        "einzigen Koffer und einem Schlüssel, von dem niemand wusste. Sie öffnete die Tür, als hätte sie "
+        "schon immer dort gewohnt. „Ich suche diesen Ort seit Jahren“, sagte sie zum Bäcker, der als Erster "
+        "fragte. Innerhalb einer Woche war der Garten voller Blumen, der Schornstein rauchte, und das ganze "
+        "Dorf sprach über die Fremde. Was sie nicht wussten, war, dass sie gekommen war, um eine Geschichte "
+        "zu beenden, die ihre Großmutter begonnen hatte, die Geschichte eines Briefes, der nie zugestellt "
+        "wurde, und eines Versprechens, das nie gehalten wurde. Sie arbeitete die ganze Nacht bei Kerzenlicht."
+    ),
+    'it': (
+        "La vecchia casa si trovava in fondo alla strada, e nessuno nel paese ricordava chi l'avesse "
+        "costruita. Ogni sera i bambini passavano davanti al cancello e si chiedevano che cosa si "
+        "nascondesse dietro le persiane chiuse. Una mattina, all'inizio della primavera, arrivò una giovane "
+        "donna con una sola valigia e una chiave di cui nessuno conosceva l'esistenza. Aprì la porta come se "
+        "avesse sempre vissuto lì. «Cerco questo posto da anni», disse al fornaio, che fu il primo a "
+        "chiedere. In una settimana il giardino era pieno di fiori, il camino fumava e tutto il paese "
+        "parlava della straniera. Quello che non sapevano era che era venuta a finire una storia che sua "
+        "nonna aveva cominciato, la storia di una lettera mai consegnata e di una promessa mai mantenuta. "
+        "Lavorava tutta la notte, scrivendo alla luce di una candela mentre il vento ululava fuori."
+    ),
+    'pt': (
+        "A velha casa ficava no fim da estrada, e ninguém na aldeia se lembrava de quem a tinha "
+        "construído. Todas as tardes as crianças passavam pelo portão e perguntavam-se o que estaria "
+        "escondido atrás das janelas fechadas. Numa manhã, no início da primavera, chegou uma jovem com uma "
+        "única mala e uma chave cuja existência ninguém conhecia. Abriu a porta como se sempre tivesse "
+        "vivido ali. «Procuro este lugar há anos», disse ao padeiro, que foi o primeiro a perguntar. Em uma "
+        "semana o jardim estava cheio de flores, a chaminé fumegava e toda a aldeia falava da estrangeira. "
+        "O que não sabiam era que ela tinha vindo terminar uma história que a avó tinha começado, a "
+        "história de uma carta que nunca foi entregue e de uma promessa que nunca foi cumprida. Trabalhava "
+        "durante toda a noite, escrevendo à luz de uma vela enquanto o vento uivava lá fora."
+    ),
+    'nl': (
+        "Het oude huis stond aan het einde van de weg, en niemand in het dorp wist nog wie het had "
+        "gebouwd. Elke avond liepen de kinderen langs het hek en vroegen zich af wat er achter de gesloten "
+        "luiken verborgen zat. Op een ochtend in het vroege voorjaar kwam er een jonge vrouw aan met één "
+        "koffer en een sleutel waarvan niemand het bestaan kende. Ze opende de deur alsof ze er altijd had "
+        "gewoond. \"Ik zoek deze plek al jaren,\" zei ze tegen de bakker, die als eerste iets vroeg. Binnen "
+        "een week stond de tuin vol bloemen, rookte de schoorsteen en sprak het hele dorp over de vreemdelinge. "
+        "Wat ze niet wisten, was dat ze gekomen was om een verhaal af te maken dat haar grootmoeder was "
+        "begonnen, het verhaal van een brief die nooit werd bezorgd en een belofte die nooit werd nagekomen. "
+        "Ze werkte de hele nacht door bij kaarslicht terwijl buiten de wind huilde."
+    ),
+}
+
+# Frequent words per language; their trigrams round out the samples' profiles for short, everyday text
+LANGUAGE_COMMON_WORDS = {
+    'en': (
+        "the of and to a in is it you that he was for on are with as I his they be at one have this from "
+        "or had by not word but what some we can out other were all there when up use your how said an "
+        "each she which do their time if will way about many then them write would like so these her long "
+        "make thing see him two has look more day could go come did number sound no most people my over "
+        "know water than call first who may down side been now find any new work part take get place made "
+        "live where after back little only round man year came show every good me give our under name "
+        "very through just form sentence great think say help low line differ turn cause much mean before "
+        "move right boy old too same tell does set three want air well also play small end put home read "
+        "hand large add even land here must big high such follow act why ask men change went light kind "
+        "off need house picture try us again animal point mother world near build self earth father today "
+        "hello yes thank please sorry"
+    ),
+    'fr': (
+        "le la les de des du un une et à au aux il elle ils elles on nous vous je tu me te se moi toi lui "
+        "leur être est sont était été avoir a ont avait eu ne pas que qui quoi dont où ce cet cette ces "
+        "son sa ses mon ma mes ton ta tes notre votre dans en pour par sur sous avec sans chez entre vers "
+        "plus moins très bien aussi encore toujours jamais déjà alors mais ou donc car si comme quand "
+        "parce tout tous toute toutes rien faire fait dire dit pouvoir peut aller va voir vouloir veut "
+        "venir prendre donner savoir falloir faut parler trouver passer rester penser croire homme femme "
+        "enfant jour nuit temps monde vie main chose maison eau tête yeux porte pays ville année fois "
+        "grand petit bon nouveau vieux deux premier même autre quelque chaque bonjour merci oui non "
+        "aujourd'hui demain hier ici là maintenant comment pourquoi voici"
+    ),
+    'de': (
+        "der die das den dem des ein eine einer einem einen und oder aber denn doch sondern in im an am "
+        "auf aus bei mit nach von vor zu zum zur über unter zwischen durch für gegen ohne um bis ist sind "
+        "war waren wird werden wurde hat haben hatte sein ich du er sie es wir ihr mich dich sich uns "
+        "euch mein dein sein unser nicht kein keine auch noch schon nur sehr so wie als wenn dass weil ob "
+        "was wer wo warum wann hier dort jetzt heute morgen immer nie wieder ganz alle viele etwas nichts "
+        "man kann muss will soll darf mag gehen kommen sehen sagen machen geben wissen nehmen finden "
+        "denken stehen liegen bleiben heißen glauben arbeiten spielen leben Zeit Jahr Tag Nacht Haus Mann "
+        "Frau Kind Welt Leben Hand Auge Weg Wasser Stadt Land Buch gut neu groß klein alt lang zwei erste "
+        "andere hallo danke bitte ja nein"
+    ),
+    'es': (
+        "de la el los las del al un una unos unas y o pero que en a por para con sin sobre entre hasta "
+        "desde contra se no es son era fue ser estar está están estaba ha han había hay haber tener tiene "
+        "yo tú él ella nosotros ellos ellas usted me te le nos les lo mi mis tu tus su sus este esta "
+        "estos estas ese esa eso esto aquí allí ahora siempre nunca ya también muy más menos mucho poco "
+        "todo todos nada algo alguien cuando donde como porque qué quién cuál cómo dónde hacer decir ir "
+        "ver dar saber querer llegar pasar deber poner parecer quedar creer hablar llevar dejar seguir "
+        "encontrar llamar venir pensar salir volver tomar conocer vivir sentir casa tiempo día año vida "
+        "hombre mujer niño mundo agua noche mañana tarde ciudad país libro bueno grande pequeño nuevo dos "
+        "primero otro mismo hola gracias sí hoy ayer"
+    ),
+    'it': (
+        "di a da in con su per tra fra il lo la i gli le un uno una del della dei degli delle al alla nel "
+        "nella sul sulla e o ma che non se come quando dove perché chi cosa quale è sono era erano essere "
+        "stato ha hanno ho hai aveva avere io tu lui lei noi voi loro mi ti si ci vi ne mio mia tuo tua "
+        "suo sua nostro questo questa quello quella qui qua lì là ora adesso sempre mai già anche ancora "
+        "molto poco più meno tutto tutti niente qualcosa bene male fare dire andare vedere dare sapere "
+        "volere venire stare potere dovere pensare parlare trovare sentire lasciare prendere guardare "
+        "tornare mettere capire conoscere vivere casa tempo giorno anno vita uomo donna bambino mondo "
+        "acqua notte mattina sera città paese libro grande piccolo nuovo buono due primo altro stesso "
+        "ciao grazie sì oggi ieri domani"
+    ),
+    'pt': (
+        "de do da dos das em no na nos nas a o as os ao à aos um uma uns umas e ou mas que por pelo pela "
+        "para com sem sobre entre até desde não é são era eram foi ser estar está estão estava tem têm "
+        "tinha ter há eu tu ele ela nós vós eles elas você vocês me te se lhe nos lhes meu minha teu tua "
+        "seu sua nosso nossa este esta isto esse essa isso aquele aquela aqui ali agora sempre nunca já "
+        "também ainda muito pouco mais menos tudo todos nada algo alguém quando onde como porque quem "
+        "qual fazer dizer ir ver dar saber querer chegar passar dever ficar pensar falar levar deixar "
+        "encontrar chamar vir sair voltar tomar conhecer viver sentir casa tempo dia ano vida homem "
+        "mulher criança mundo água noite manhã tarde cidade país livro bom grande pequeno novo dois "
+        "primeiro outro mesmo então coisa olá obrigado sim hoje ontem amanhã"
+    ),
+    'nl': (
+        "de het een en of maar want dus dat die dit deze wat wie waar waarom hoe wanneer in op aan uit "
+        "bij met van voor na naar door over onder tussen tegen zonder om tot is zijn was waren wordt "
+        "worden werd heeft hebben had ik jij je hij zij ze wij we jullie u mij me hem haar ons hun mijn "
+        "jouw zijn onze niet geen ook nog al wel zo heel erg veel weinig meer minder alles niets iets "
+        "iemand niemand nu hier daar altijd nooit vandaag morgen gisteren kan moet wil zal mag gaan komen "
+        "zien zeggen maken geven weten nemen vinden denken staan liggen blijven heten geloven werken "
+        "spelen lopen kijken wonen huis tijd dag jaar leven man vrouw kind wereld water nacht ochtend "
+        "avond stad land boek goed groot klein nieuw oud twee eerste ander hallo dank alsjeblieft ja nee"
+    ),
+}
+
+# Unicode ranges of scripts that identify a language (or narrow it down) on their own
+SCRIPT_RANGES = [
+    (0x3040, 0x30FF, 'kana'),
+    (0x3400, 0x4DBF, 'han'),
+    (0x4E00, 0x9FFF, 'han'),
+    (0xF900, 0xFAFF, 'han'),
+    (0x1100, 0x11FF, 'hangul'),
+    (0xAC00, 0xD7AF, 'hangul'),
+    (0x0900, 0x097F, 'devanagari'),
+    (0x0400, 0x04FF, 'cyrillic'),
+    (0x0600, 0x06FF, 'arabic'),
+    (0x0590, 0x05FF, 'hebrew'),
+    (0x0370, 0x03FF, 'greek'),
+    (0x0E00, 0x0E7F, 'thai'),
+]
+SCRIPT_PATTERNS = {}
+for _low, _high, _script in SCRIPT_RANGES:
+    SCRIPT_PATTERNS.setdefault(_script, []).append(f"\\u{_low:04x}-\\u{_high:04x}")
+SCRIPT_PATTERNS = {script: re.compile(f"[{''.join(ranges)}]") for script, ranges in SCRIPT_PATTERNS.items()}
+
+SCRIPT_LANGUAGES = {
+    'hangul': 'ko', 'devanagari': 'hi', 'cyrillic': 'ru', 'arabic': 'ar',
+    'hebrew': 'he', 'greek': 'el', 'thai': 'th'
+}
+
+NGRAM_SIZE = 3
+DEFAULT_SAMPLE_CHARS = 1000
+# Scales mean trigram log-likelihoods into confidences; calibrated so clear text scores above 0.9
+CONFIDENCE_SHARPNESS = 12.0
+# Below this many trigrams (about one short sentence) confidence is scaled down; with the shipped
+# profiles, everyday sentences of that length clear translation's 0.6 routing threshold
+MIN_RELIABLE_NGRAMS = 25
+
+NON_LETTER_PATTERN = re.compile(r"[\W\d_]+")
+
+
+def _ngrams(text: str) -> Counter:
+    """Character trigrams of the lowercased letters, words separated (and padded) by one space"""
+    normalized = f" {' '.join(NON_LETTER_PATTERN.sub(' ', text.lower()).split())} "
+    return Counter([normalized[i:i + NGRAM_SIZE] for i in range(len(normalized) - NGRAM_SIZE + 1)])
+
+
+@lru_cache(maxsize=1)
+def _profiles() -> Dict[str, Any]:
+    """Add-one smoothed trigram log-probabilities per language, built once
+
+    Stored as the gain over the unseen-trigram log-probability, so scoring only
+    has to visit the trigrams a profile actually contains.
+    """
+    profiles = {}
+    for language, sample in LANGUAGE_SAMPLES.items():
+        counts = _ngrams(sample) + _ngrams(LANGUAGE_COMMON_WORDS.get(language, ''))
+        denominator = sum(counts.values()) + len(counts) + 1
+        unseen = math.log(1 / denominator)
+        gains = {ngram: math.log((count + 1) / denominator) - unseen for ngram, count in counts.items()}
+        profiles[language] = (gains, unseen)
+    return profiles
+
+
+def _sample(text: str, sample_chars: int) -> str:
+    """Up to `sample_chars` of text from three windows, skipping the usual front and back matter"""
+    if len(text) <= sample_chars:
+        return text
+    window = sample_chars // 3
+    starts = (int(len(text) * position) for position in (0.2, 0.5, 0.8))
+    return ' '.join(text[start:start + window] for start in starts)
+
+
+def _script_counts(text: str) -> Counter:
+    """Letters per script; anything outside SCRIPT_RANGES counts as Latin"""
+    letters = len(NON_LETTER_PATTERN.sub('', text))
+    if text.isascii():
+        return Counter({'latin': letters}) if letters else Counter()
+
+    counts = Counter()
+    for script, pattern in SCRIPT_PATTERNS.items():
+        found = len(pattern.findall(text))
+        if found:
+            counts[script] = found
+    # Script ranges also hold a few digits and punctuation marks
+    latin = letters - sum(counts.values())
+    if latin > 0:
+        counts['latin'] = latin
+    return counts
+
+
+def _softmax(scores: Dict[str, float]) -> Dict[str, float]:
+    top = max(scores.values())
+    weights = {language: math.exp((score - top) * CONFIDENCE_SHARPNESS) for language, score in scores.items()}
+    total = sum(weights.values())
+    return {language: weight / total for language, weight in weights.items()}
+
+
+def _ranked(scores: Dict[str, float], script: str, scale: float = 1.0) -> Dict[str, Any]:
+    language = max(scores, key=scores.get)
+    return {
+        'language': language,
+        'confidence': round(scores[language] * scale, 3),
+        'scores': {lang: round(score * scale, 3) for lang, score in
+                   sorted(scores.items(), key=lambda item: item[1], reverse=True)},
+        'script': script
+    }
+
+
+def identify_language(text: str, sample_chars: int = DEFAULT_SAMPLE_CHARS,
+                      candidates: Iterable[str] = None) -> Dict[str, Any]:
+    """Identify the language of `text` from a sample of it
+
+    Non-Latin scripts decide on their own (kana means Japanese, Han without kana
+    Chinese, Devanagari Hindi, ...). Latin-script text is scored against the
+    character trigram profiles; `scores` holds a confidence per candidate.
+    Returns {'language', 'confidence', 'scores', 'script'}.
+    """
+    sample = _sample(text or '', sample_chars)
+    scripts = _script_counts(sample)
+    letters = sum(scripts.values())
+    if not letters:
+        return {'language': 'en', 'confidence': 0.0, 'scores': {}, 'script': None}
+
+    script, script_count = scripts.most_common(1)[0]
+    if script in ('han', 'kana'):
+        cjk = scripts['han'] + scripts['kana']
+        # Japanese mixes kana into Han text; Chinese has none
+        japanese = min(1.0, scripts['kana'] / (cjk * 0.1)) if cjk else 0.0
+        return _ranked({'ja': japanese, 'zh': 1.0 - japanese}, 'cjk', cjk / letters)
+    if script in SCRIPT_LANGUAGES:
+        return _ranked({SCRIPT_LANGUAGES[script]: 1.0}, script, script_count / letters)
+
+    profiles = _profiles()
+    languages = [language for language in (candidates or profiles) if language in profiles] or list(profiles)
+    counts = _ngrams(sample)
+    total = sum(counts.values())
+    if not total:
+        return {'language': 'en', 'confidence': 0.0, 'scores': {}, 'script': 'latin'}
+
+    scores = {}
+    for language in languages:
+        gains, unseen = profiles[language]
+        scores[language] = unseen + sum(counts[ngram] * gains[ngram] for ngram in counts.keys() & gains.keys()) / total
+
+    return _ranked(_softmax(scores), 'latin', min(1.0, total / MIN_RELIABLE_NGRAMS) * script_count / letters)
@@ -7,6 +7,8 @@ import asyncio
 from dashscope import Generation, ImageSynthesis
 import dashscope
 
+from .structure_index import StructureIndex
+
 logger = logging.getLogger(__name__)
 
 class QwenService:
@@ -252,17 +254,15 @@ Create a beautiful, engaging illustration that brings this story scene to life."
         pages = []
         
         # First try to split by obvious page breaks
-        if "Page " in story_text:
-            raw_pages = story_text.split("Page ")[1:]  # Skip content before first page
-            for page in raw_pages:
-                # Clean up page content
-                page_content = page.split("\n\n")[0] if "\n\n" in page else page
-                page_content = page_content.strip()
+        structure = StructureIndex.build(story_text)
+        if structure.page_starts:
+            for page in structure.page_sections(story_text):
+                page_content = page['content']
                 if page_content and len(page_content) > 20:  # Minimum content length
                     pages.append(page_content)
         else:
             # Split by paragraphs and group them
-            paragraphs = [p.strip() for p in story_text.split("\n\n") if p.strip()]
+            paragraphs = [story_text[start:end] for start, end in structure.spans('paragraph')]
             
             # Group paragraphs into pages (aim for 50-100 words per page)
             current_page = ""
@@ -0,0 +1,87 @@
+import os
+import time
+import sqlite3
+import logging
+from contextlib import closing
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionIndex:
+    """SQLite index of stored files and when they expire.
+
+    Expired files are found with an indexed range query, so sweeping never has
+    to list or stat the upload tree. Calls are blocking; run them in a thread.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_retention (
+                    path TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_retention_expires ON file_retention(expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_file_retention_created ON file_retention(created_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS retention_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def register(self, path: str, retention_seconds: float, created_at: Optional[float] = None):
+        """Record a file and its expiry (re-registering extends it)"""
+        created_at = created_at if created_at is not None else time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO file_retention (path, created_at, expires_at) VALUES (?, ?, ?)",
+                (path, created_at, created_at + retention_seconds)
+            )
+
+    def register_many(self, entries: List[Tuple[str, float, float]]):
+        """Record (path, created_at, expires_at) rows in one transaction"""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO file_retention (path, created_at, expires_at) VALUES (?, ?, ?)",
+                entries
+            )
+
+    def forget(self, paths: List[str]):
+        """Drop index rows for files that were removed"""
+        if not paths:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM file_retention WHERE path = ?", [(path,) for path in paths])
+
+    def expired(self, now: float, limit: int) -> List[str]:
+        """Oldest expired paths, at most `limit`"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT path FROM file_retention WHERE expires_at <= ? ORDER BY expires_at LIMIT ?",
+                (now, limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def created_before(self, cutoff: float, limit: int) -> List[str]:
+        """Paths stored before `cutoff`, at most `limit`"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT path FROM file_retention WHERE created_at < ? ORDER BY created_at LIMIT ?",
+                (cutoff, limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM retention_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO retention_meta (key, value) VALUES (?, ?)", (key, value))
@@ -0,0 +1,150 @@
+import re
+import math
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+# Terminal punctuation, any closing quotes/brackets, then whitespace or end of text
+SENTENCE_END_PATTERN = re.compile(r'[.!?…]+["\')\]}’”»]*(?=\s|$)')
+
+# Words that end in a period without ending the sentence (compared lowercased, without the period)
+ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'mt', 'ft', 'rev', 'hon',
+    'capt', 'cpt', 'col', 'gen', 'lt', 'sgt', 'cmdr', 'adm', 'gov', 'sen', 'rep', 'pres',
+    'vs', 'etc', 'e.g', 'i.e', 'cf', 'al', 'approx', 'dept', 'est', 'fig', 'vol', 'no',
+    'inc', 'ltd', 'co', 'corp', 'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep',
+    'sept', 'oct', 'nov', 'dec', 'a.m', 'p.m', 'u.s', 'u.k',
+})
+
+# Provider tokens are roughly four characters of English text
+CHARS_PER_TOKEN = 4
+
+Measure = Callable[[int, int], float]
+
+
+def iter_sentence_spans(text: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) offsets of the sentences in text[start:end]
+
+    Runs in linear time: each candidate terminator is checked by looking back at
+    the word it ends and forward at the next character only. A period does not
+    end a sentence after a known abbreviation or a single-letter initial, or when
+    the next word starts in lowercase.
+    """
+    end = len(text) if end is None else end
+    sentence_start = _skip_space(text, start, end)
+
+    for match in SENTENCE_END_PATTERN.finditer(text, sentence_start, end):
+        if not _is_boundary(text, match, end):
+            continue
+
+        yield sentence_start, match.end()
+        sentence_start = _skip_space(text, match.end(), end)
+
+    if sentence_start < end:
+        sentence_end = end
+        while sentence_end > sentence_start and text[sentence_end - 1].isspace():
+            sentence_end -= 1
+        yield sentence_start, sentence_end
+
+
+def _skip_space(text: str, position: int, end: int) -> int:
+    while position < end and text[position].isspace():
+        position += 1
+    return position
+
+
+def _is_boundary(text: str, match, end: int) -> bool:
+    punctuation = match.group(0)
+    if not punctuation.startswith('.') or punctuation.startswith('..'):
+        # ?, ! and ellipses end a sentence unless the next word continues it ("Look!" she said)
+        return _next_word_starts_sentence(text, match.end(), end)
+
+    word_start = match.start()
+    while word_start > 0 and not text[word_start - 1].isspace() and text[word_start - 1] not in '"\'(“‘':
+        word_start -= 1
+    word = text[word_start:match.start()]
+
+    if word.lower() in ABBREVIATIONS:
+        return False
+    # Initials such as "J. R. R. Tolkien"
+    if len(word) == 1 and word.isupper():
+        return False
+
+    return _next_word_starts_sentence(text, match.end(), end)
+
+
+def _next_word_starts_sentence(text: str, position: int, end: int) -> bool:
+    position = _skip_space(text, position, end)
+    if position >= end:
+        return True
+    return not text[position].islower()
+
+
+def segment_sentences(text: str) -> List[str]:
+    """Split text into sentences"""
+    return [text[start:end] for start, end in iter_sentence_spans(text)]
+
+
+def char_measure(start: int, end: int) -> float:
+    return end - start
+
+
+def audio_seconds_measure(seconds_per_char: float, speed: float = 1.0) -> Measure:
+    """Estimated narration seconds for a span of text"""
+    return lambda start, end: (end - start) * seconds_per_char / speed
+
+
+def token_measure(text: str, token_counter: Optional[Callable[[str], int]] = None) -> Measure:
+    """Provider tokens for a span, using `token_counter` when the provider exposes one"""
+    if token_counter is None:
+        return lambda start, end: math.ceil((end - start) / CHARS_PER_TOKEN)
+    return lambda start, end: token_counter(text[start:end])
+
+
+def pack_spans(spans: Sequence[Tuple[int, int]], limit: float,
+               measure: Measure = char_measure, text: Optional[str] = None) -> List[Tuple[int, int]]:
+    """Group consecutive spans into chunks whose measured size stays within `limit`
+
+    Each span is measured once, together with the gap before it, so packing is
+    linear in the number of spans. A span that exceeds the limit on its own is
+    cut into pieces of at most equal size; given the `text` the spans index, each
+    cut moves back to the last whitespace so words stay whole.
+    """
+    chunks = []
+    chunk_start = chunk_end = None
+    chunk_cost = 0.0
+
+    for start, end in spans:
+        if chunk_start is not None:
+            added = measure(chunk_end, end)
+            if chunk_cost + added <= limit:
+                chunk_end = end
+                chunk_cost += added
+                continue
+            chunks.append((chunk_start, chunk_end))
+
+        cost = measure(start, end)
+        if cost > limit:
+            size = math.ceil((end - start) / math.ceil(cost / limit))
+            while end - start > size:
+                cut = _word_cut(text, start, start + size)
+                chunks.append((start, cut))
+                start = cut if text is None else _skip_space(text, cut, end)
+            cost = measure(start, end)
+
+        chunk_start, chunk_end, chunk_cost = start, end, cost
+
+    if chunk_start is not None:
+        chunks.append((chunk_start, chunk_end))
+
+    return chunks
+
+
+def _word_cut(text: Optional[str], start: int, cut: int) -> int:
+    """Move `cut` back to the whitespace before the word it falls in; a piece with no whitespace is hard-cut"""
+    if text is None:
+        return cut
+    position = cut
+    while position > start and not text[position].isspace():
+        position -= 1
+    while position > start and text[position - 1].isspace():
+        position -= 1
+    return position if position > start else cut
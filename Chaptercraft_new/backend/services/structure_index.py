@@ -0,0 +1,228 @@
+import re
+import hashlib
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from .illustration_prefetcher import PAGE_HEADER_PATTERN
+from .sentence_segmenter import Measure, char_measure, iter_sentence_spans, pack_spans
+
+# Bump when the boundary rules change so stored indexes are rebuilt
+STRUCTURE_INDEX_VERSION = 2
+
+# "Chapter 3", "CHAPTER THREE: The Farm", "Prologue", "Part II", or a markdown heading
+CHAPTER_HEADING_PATTERN = re.compile(
+    r'^[ \t]*(?:#{1,3}[ \t]+\S[^\n]{0,100}|(?:chapter|prologue|epilogue|part)\b[^\n]{0,80})[ \t]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+PARAGRAPH_BREAK_PATTERN = re.compile(r'\n[ \t]*\n\s*')
+
+
+class StructureIndex:
+    """Chapter, page, paragraph and sentence boundaries of one manuscript version.
+
+    Boundaries are stored as parallel offset arrays into the text, built in one
+    pass. Chunkers pack whole units into spans instead of re-splitting the text
+    with their own heuristics, and the index is stored with the project so
+    later stages reuse it.
+    """
+
+    def __init__(self, length: int, content_sha256: str,
+                 chapter_starts=(), chapter_titles=(),
+                 page_starts=(), page_numbers=(),
+                 paragraph_starts=(), paragraph_ends=(),
+                 sentence_starts=(), sentence_ends=(),
+                 version: int = STRUCTURE_INDEX_VERSION):
+        self.length = length
+        self.content_sha256 = content_sha256
+        self.version = version
+        self.chapter_starts = array('I', chapter_starts)
+        self.chapter_titles = list(chapter_titles)
+        self.page_starts = array('I', page_starts)
+        self.page_numbers = array('I', page_numbers)
+        self.paragraph_starts = array('I', paragraph_starts)
+        self.paragraph_ends = array('I', paragraph_ends)
+        self.sentence_starts = array('I', sentence_starts)
+        self.sentence_ends = array('I', sentence_ends)
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def build(cls, text: str) -> 'StructureIndex':
+        """Scan the text once per boundary type and record offsets"""
+        index = cls(len(text), cls.content_hash(text))
+
+        for match in CHAPTER_HEADING_PATTERN.finditer(text):
+            index.chapter_starts.append(match.start())
+            index.chapter_titles.append(match.group(0).strip().lstrip('#').strip())
+
+        for match in PAGE_HEADER_PATTERN.finditer(text):
+            index.page_starts.append(match.start())
+            index.page_numbers.append(int(match.group(1)))
+
+        for start, end in cls._paragraph_spans(text):
+            index.paragraph_starts.append(start)
+            index.paragraph_ends.append(end)
+
+            # Sentences never cross a paragraph boundary
+            for sentence_start, sentence_end in iter_sentence_spans(text, start, end):
+                index.sentence_starts.append(sentence_start)
+                index.sentence_ends.append(sentence_end)
+
+        return index
+
+    @staticmethod
+    def _paragraph_spans(text: str):
+        """Blocks separated by blank lines, with surrounding whitespace trimmed"""
+        block_start = 0
+        for separator in PARAGRAPH_BREAK_PATTERN.finditer(text):
+            yield from StructureIndex._trimmed(text, block_start, separator.start())
+            block_start = separator.end()
+        yield from StructureIndex._trimmed(text, block_start, len(text))
+
+    @staticmethod
+    def _trimmed(text: str, start: int, end: int):
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            yield start, end
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'length': self.length,
+            'content_sha256': self.content_sha256,
+            'chapter_starts': self.chapter_starts.tolist(),
+            'chapter_titles': self.chapter_titles,
+            'page_starts': self.page_starts.tolist(),
+            'page_numbers': self.page_numbers.tolist(),
+            'paragraph_starts': self.paragraph_starts.tolist(),
+            'paragraph_ends': self.paragraph_ends.tolist(),
+            'sentence_starts': self.sentence_starts.tolist(),
+            'sentence_ends': self.sentence_ends.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StructureIndex':
+        return cls(
+            data['length'], data['content_sha256'],
+            data.get('chapter_starts', ()), data.get('chapter_titles', ()),
+            data.get('page_starts', ()), data.get('page_numbers', ()),
+            data.get('paragraph_starts', ()), data.get('paragraph_ends', ()),
+            data.get('sentence_starts', ()), data.get('sentence_ends', ()),
+            version=data.get('version', 0)
+        )
+
+    def matches(self, text: str) -> bool:
+        """True if this index was built from exactly this text with the current rules"""
+        return (self.version == STRUCTURE_INDEX_VERSION and self.length == len(text)
+                and self.content_sha256 == self.content_hash(text))
+
+    def spans(self, unit: str) -> List[Tuple[int, int]]:
+        """(start, end) offsets of every chapter, page, paragraph or sentence
+
+        Chapters and pages start at their heading, so they line up with
+        `chapter_titles` / `page_numbers`; text before the first heading is
+        `front_matter(unit)`.
+        """
+        if unit == 'sentence':
+            return list(zip(self.sentence_starts, self.sentence_ends))
+        if unit == 'paragraph':
+            return list(zip(self.paragraph_starts, self.paragraph_ends))
+        if unit == 'page':
+            starts = self.page_starts
+        elif unit == 'chapter':
+            starts = self.chapter_starts
+        else:
+            raise ValueError(f"Unknown structure unit: {unit}")
+
+        ends = list(starts[1:]) + [self.length]
+        return list(zip(starts, ends))
+
+    def front_matter(self, unit: str = 'chapter') -> Optional[Tuple[int, int]]:
+        """(start, end) of the text before the first chapter heading or page marker, if any"""
+        if unit == 'page':
+            starts = self.page_starts
+        elif unit == 'chapter':
+            starts = self.chapter_starts
+        else:
+            raise ValueError(f"Front matter is only defined for chapters and pages, not {unit}")
+
+        end = starts[0] if starts else self.length
+        return (0, end) if end > 0 else None
+
+    def chunk_spans(self, unit: str = 'sentence', limit: float = 5000,
+                    measure: Measure = char_measure, text: Optional[str] = None) -> List[Tuple[int, int]]:
+        """Pack consecutive whole units into spans whose measured size is at most `limit`
+
+        `measure(start, end)` sizes a span of the text: characters by default, or
+        estimated audio seconds / provider tokens (see sentence_segmenter). A unit
+        over the limit is split at its sentence boundaries and, failing that, cut
+        (between words when the indexed `text` is given).
+        """
+        return pack_spans(list(self._units_within(unit, limit, measure)), limit, measure, text)
+
+    def segment_spans(self, unit: str = 'paragraph', limit: float = 5000,
+                      measure: Measure = char_measure, text: Optional[str] = None) -> List[Tuple[int, int]]:
+        """Every unit as its own span; a unit over `limit` is split into its sentences (and cut if still too long)"""
+        segments = []
+        for start, end in self._units_within(unit, limit, measure):
+            if measure(start, end) > limit:
+                segments.extend(pack_spans([(start, end)], limit, measure, text))
+            else:
+                segments.append((start, end))
+        return segments
+
+    def paragraph_at(self, offset: int) -> Optional[int]:
+        """Index of the paragraph starting at or before `offset`"""
+        position = bisect_right(self.paragraph_starts, offset) - 1
+        return position if position >= 0 else None
+
+    def _units_within(self, unit: str, limit: float, measure: Measure):
+        units = self.spans(unit)
+        if unit in ('chapter', 'page'):
+            front_matter = self.front_matter(unit)
+            if front_matter:
+                units.insert(0, front_matter)
+        for start, end in units:
+            if unit != 'sentence' and measure(start, end) > limit:
+                yield from self._sentences_between(start, end)
+            else:
+                yield start, end
+
+    def _sentences_between(self, start: int, end: int):
+        first = bisect_right(self.sentence_starts, start - 1)
+        last = bisect_right(self.sentence_starts, end - 1)
+        for i in range(first, last):
+            yield self.sentence_starts[i], min(self.sentence_ends[i], end)
+
+    def chunk_text(self, text: str, unit: str = 'sentence', limit: float = 5000,
+                   measure: Measure = char_measure) -> List[str]:
+        """Chunk strings for `text` (the text this index was built from)"""
+        chunks = []
+        for start, end in self.chunk_spans(unit, limit, measure, text):
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+        return chunks
+
+    def page_sections(self, text: str) -> List[Dict[str, Any]]:
+        """Story pages as {'page_number', 'content'} with the "Page N:" header removed"""
+        pages = []
+        for (start, end), page_number in zip(self.spans('page'), self.page_numbers):
+            header = PAGE_HEADER_PATTERN.match(text, start)
+            body_start = header.end() if header else start
+            pages.append({
+                'page_number': page_number,
+                'content': text[body_start:end].strip()
+            })
+        return pages
+
+    def chapter_at(self, offset: int) -> Optional[int]:
+        """Index of the chapter containing `offset`, or None before the first heading"""
+        position = bisect_right(self.chapter_starts, offset) - 1
+        return position if position >= 0 else None
@@ -0,0 +1,105 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import unicodedata
+from contextlib import closing
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_segment(text: str) -> str:
+    """Canonical form of a source segment: NFC, whitespace runs collapsed, trimmed"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def segment_key(text: str, source_language: str, target_language: str, provider: str) -> str:
+    """Translation memory key: the normalized segment plus the language pair and provider"""
+    digest = hashlib.sha256()
+    digest.update(f"{provider}\0{source_language}\0{target_language}\0".encode('utf-8'))
+    digest.update(normalize_segment(text).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class TranslationMemory:
+    """SQLite store of translated paragraphs and sentences, shared across projects and revisions.
+
+    Entries are evicted least recently used first once there are more than
+    `max_entries`. Calls are blocking; run them in a thread.
+    """
+
+    # Keys per SELECT, below SQLite's bound-parameter limit
+    LOOKUP_BATCH_SIZE = 500
+
+    def __init__(self, db_path: str, max_entries: int):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS translation_memory (
+                    segment_key TEXT PRIMARY KEY,
+                    translated_text TEXT NOT NULL,
+                    source_chars INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_translation_memory_last_used ON translation_memory(last_used_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Translations for the keys that are in memory, marking them used"""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with closing(self._connect()) as conn, conn:
+            for i in range(0, len(unique_keys), self.LOOKUP_BATCH_SIZE):
+                batch = unique_keys[i:i + self.LOOKUP_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                found.update(conn.execute(
+                    f"SELECT segment_key, translated_text FROM translation_memory WHERE segment_key IN ({placeholders})",
+                    batch
+                ).fetchall())
+
+            now = time.time()
+            conn.executemany(
+                "UPDATE translation_memory SET last_used_at = ? WHERE segment_key = ?",
+                [(now, key) for key in found]
+            )
+        return found
+
+    def put_many(self, entries: List[Tuple[str, str, int]]):
+        """Store (segment_key, translated_text, source_chars) rows"""
+        if not entries:
+            return
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                """INSERT OR REPLACE INTO translation_memory
+                   (segment_key, translated_text, source_chars, created_at, last_used_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                [(key, text, chars, now, now) for key, text, chars in entries]
+            )
+
+    def evict(self) -> int:
+        """Drop the least recently used entries over max_entries"""
+        with closing(self._connect()) as conn, conn:
+            excess = conn.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0] - self.max_entries
+            if excess <= 0:
+                return 0
+            conn.execute(
+                """DELETE FROM translation_memory WHERE segment_key IN
+                   (SELECT segment_key FROM translation_memory ORDER BY last_used_at LIMIT ?)""",
+                (excess,)
+            )
+
+        logger.info(f"Evicted {excess} translation memory entries")
+        return excess
@@ -3,6 +3,13 @@ import logging
 import deepl
 from typing import Optional, Dict, Any, List
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .structure_index import StructureIndex
+from .rate_limiter import AsyncRateLimiter
+from .translation_memory import TranslationMemory, segment_key
+from .glossary_translator import load_glossaries
+from .language_id import identify_language
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +24,33 @@ class TranslationService:
             except Exception as e:
                 logger.warning(f"DeepL translator initialization failed: {e}")
         
+        # The DeepL SDK is synchronous; requests run on a bounded pool, within the API rate limit
+        self.translation_concurrency = int(os.environ.get('TRANSLATION_CONCURRENCY', '4'))
+        self.translation_executor = ThreadPoolExecutor(
+            max_workers=self.translation_concurrency, thread_name_prefix='deepl'
+        )
+        self.translation_rate_limiter = AsyncRateLimiter(
+            rate=float(os.environ.get('TRANSLATION_REQUESTS_PER_SECOND', '5')),
+            burst=self.translation_concurrency
+        )
+        
+        # DeepL accepts up to 50 texts per request; the request body is capped at 128 KiB
+        self.batch_max_texts = int(os.environ.get('TRANSLATION_BATCH_MAX_TEXTS', '50'))
+        self.batch_max_chars = int(os.environ.get('TRANSLATION_BATCH_MAX_CHARS', '30000'))
+        
+        # Paragraphs (sentences for long ones) are translated once and remembered across projects
+        self.segment_max_chars = 4000
+        self.translation_memory = TranslationMemory(
+            os.environ.get('TRANSLATION_MEMORY_PATH', '/app/translation_memory/translation_memory.db'),
+            max_entries=int(os.environ.get('TRANSLATION_MEMORY_MAX_ENTRIES', '500000'))
+        )
+        
+        # Offline/mock translation: compiled glossaries per target language
+        self.glossary_translators = load_glossaries(os.environ.get('TRANSLATION_GLOSSARY_DIR'))
+        
+        # Detected source languages below this confidence are left to the provider's auto-detection
+        self.language_routing_min_confidence = float(os.environ.get('LANGUAGE_ROUTING_MIN_CONFIDENCE', '0.6'))
+        
         # Language mappings
         self.supported_languages = {
             'en': 'EN',
@@ -52,11 +86,8 @@ class TranslationService:
             source_lang = self.supported_languages.get(source_language) if source_language else None
             
             # Perform translation
-            result = self.translator.translate_text(
-                text,
-                target_lang=target_lang,
-                source_lang=source_lang
-            )
+            await self.translation_rate_limiter.acquire()
+            result = await self._run_deepl(text, target_lang, source_lang)
             
             return {
                 'success': True,
@@ -72,6 +103,14 @@ class TranslationService:
             logger.error(f"Translation failed: {e}")
             return await self._mock_translation(text, target_language, source_language)
     
+    async def _run_deepl(self, texts, target_lang: str, source_lang: Optional[str]):
+        """Call the synchronous DeepL SDK on the translation pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.translation_executor,
+            lambda: self.translator.translate_text(texts, target_lang=target_lang, source_lang=source_lang)
+        )
+    
     async def _handle_hindi_translation(self, text: str, source_language: Optional[str]) -> Dict[str, Any]:
         """Handle Hindi translation (not supported by DeepL)"""
         logger.warning("Hindi translation requested but not supported by DeepL")
@@ -93,50 +132,9 @@ class TranslationService:
         """Provide mock translation for development/fallback"""
         logger.info(f"Using mock translation service for {target_language}")
         
-        # Simple mock translations for common phrases
-        mock_translations = {
-            'fr': {
-                'hello': 'bonjour',
-                'world': 'monde',
-                'book': 'livre',
-                'story': 'histoire',
-                'chapter': 'chapitre'
-            },
-            'es': {
-                'hello': 'hola',
-                'world': 'mundo', 
-                'book': 'libro',
-                'story': 'historia',
-                'chapter': 'capítulo'
-            },
-            'zh': {
-                'hello': '你好',
-                'world': '世界',
-                'book': '书',
-                'story': '故事',
-                'chapter': '章节'
-            },
-            'ja': {
-                'hello': 'こんにちは',
-                'world': '世界',
-                'book': '本',
-                'story': '物語', 
-                'chapter': '章'
-            },
-            'hi': {
-                'hello': 'नमस्ते',
-                'world': 'दुनिया',
-                'book': 'किताब',
-                'story': 'कहानी',
-                'chapter': 'अध्याय'
-            }
-        }
-        
-        # Attempt simple word replacement for demo
-        translated_text = text.lower()
-        if target_language in mock_translations:
-            for en_word, translated_word in mock_translations[target_language].items():
-                translated_text = translated_text.replace(en_word, translated_word)
+        # Whole-word glossary substitution in one pass over the text
+        glossary_translator = self.glossary_translators.get(target_language)
+        translated_text = glossary_translator.translate(text) if glossary_translator else text
         
         return {
             'success': True,
@@ -151,46 +149,19 @@ class TranslationService:
     
     async def translate_book_content(self, content: str, target_language: str,
                                    source_language: Optional[str] = None,
-                                   progress_callback=None) -> Dict[str, Any]:
-        """Translate entire book content with progress tracking"""
+                                   progress_callback=None,
+                                   structure_index: Optional[StructureIndex] = None) -> Dict[str, Any]:
+        """Translate entire book content with progress tracking
+        
+        The book is split into paragraphs (long ones into sentences). Segments found
+        in the translation memory are reused; only the misses are sent upstream,
+        packed into multi-text DeepL requests that run concurrently (bounded by
+        TRANSLATION_CONCURRENCY and the request rate limit). Translations are
+        reassembled in book order.
+        """
         try:
-            # Chunk content for translation
-            chunks = self._chunk_content(content)
-            total_chunks = len(chunks)
-            
-            translated_chunks = []
-            
-            for i, chunk in enumerate(chunks):
-                if progress_callback:
-                    await progress_callback(f"Translating chunk {i+1}/{total_chunks}", 
-                                          int((i / total_chunks) * 100))
-                
-                # Translate chunk
-                result = await self.translate_text(chunk, target_language, source_language)
-                
-                if result['success']:
-                    translated_chunks.append(result['translated_text'])
-                else:
-                    translated_chunks.append(chunk)  # Keep original if translation fails
-                
-                # Small delay to respect rate limits
-                await asyncio.sleep(0.1)
-            
-            # Combine translated chunks
-            translated_content = '\n\n'.join(translated_chunks)
-            
-            if progress_callback:
-                await progress_callback("Translation completed", 100)
-            
-            return {
-                'success': True,
-                'original_content': content,
-                'translated_content': translated_content,
-                'source_language': source_language or 'auto',
-                'target_language': target_language,
-                'chunks_processed': total_chunks,
-                'service': 'deepl' if self.translator else 'mock'
-            }
+            segmentation = await self.segment_book(content, source_language, structure_index)
+            return await self._translate_segmentation(segmentation, target_language, progress_callback)
             
         except Exception as e:
             logger.error(f"Book content translation failed: {e}")
@@ -201,49 +172,234 @@ class TranslationService:
                 'translated_content': content  # Return original on failure
             }
     
-    def _chunk_content(self, content: str, max_chunk_size: int = 4000) -> List[str]:
-        """Chunk content for translation while preserving structure"""
-        # Split by paragraphs first
-        paragraphs = content.split('\n\n')
-        chunks = []
-        current_chunk = ''
-        
-        for paragraph in paragraphs:
-            if len(current_chunk) + len(paragraph) + 2 <= max_chunk_size:
-                if current_chunk:
-                    current_chunk += '\n\n' + paragraph
-                else:
-                    current_chunk = paragraph
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = paragraph
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        return chunks
+    async def translate_book_variants(self, content: str, target_languages: List[str],
+                                      source_language: Optional[str] = None,
+                                      progress_callback=None,
+                                      structure_index: Optional[StructureIndex] = None,
+                                      variant_callback=None) -> Dict[str, Dict[str, Any]]:
+        """Translate one book into several languages, segmenting and detecting the source once
+        
+        Variants are translated concurrently and share the request pool and rate
+        limiter, so N languages cost N translation passes but one segmentation.
+        `progress_callback(language, message, percent)` reports each variant's own
+        progress, and `variant_callback(language, result)` is awaited as soon as each
+        variant is done.
+        """
+        segmentation = await self.segment_book(content, source_language, structure_index)
+        target_languages = list(dict.fromkeys(target_languages))
+        
+        async def translate_variant(language: str):
+            async def variant_progress(message: str, percent: int):
+                if progress_callback:
+                    await progress_callback(language, message, percent)
+            
+            try:
+                return language, await self._translate_segmentation(segmentation, language, variant_progress)
+            except Exception as e:
+                logger.error(f"Translation to {language} failed: {e}")
+                return language, {
+                    'success': False,
+                    'error': str(e),
+                    'target_language': language,
+                    'original_content': content,
+                    'translated_content': content
+                }
+        
+        results = {}
+        tasks = [asyncio.create_task(translate_variant(language)) for language in target_languages]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                language, result = await next_done
+                results[language] = result
+                if variant_callback:
+                    await variant_callback(language, result)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
+        return {language: results[language] for language in target_languages}
+    
+    async def segment_book(self, content: str, source_language: Optional[str] = None,
+                           structure_index: Optional[StructureIndex] = None) -> Dict[str, Any]:
+        """Detect the source language and split the book into translation memory segments"""
+        # Route with the detected source language: DeepL gets an explicit source_lang,
+        # and a book already in the target language is not sent at all
+        if not source_language:
+            detected = identify_language(content)
+            if detected['confidence'] >= self.language_routing_min_confidence:
+                source_language = detected['language']
+                logger.info(f"Detected source language {source_language} ({detected['confidence']:.2f})")
+        
+        structure = structure_index
+        if structure is None or not structure.matches(content):
+            structure = await asyncio.to_thread(StructureIndex.build, content)
+        spans = structure.segment_spans('paragraph', self.segment_max_chars, text=content)
+        
+        return {
+            'content': content,
+            'source_language': source_language,
+            'structure': structure,
+            'spans': spans,
+            'segments': [content[start:end] for start, end in spans]
+        }
     
-    async def detect_language(self, text: str) -> Dict[str, Any]:
-        """Detect the language of text"""
+    async def _translate_segmentation(self, segmentation: Dict[str, Any], target_language: str,
+                                      progress_callback=None) -> Dict[str, Any]:
+        """Translate a segmented book into one language, through the translation memory"""
+        content = segmentation['content']
+        source_language = segmentation['source_language']
+        structure, spans, segments = segmentation['structure'], segmentation['spans'], segmentation['segments']
+        
+        if source_language == target_language:
+            return {
+                'success': True,
+                'original_content': content,
+                'translated_content': content,
+                'source_language': source_language,
+                'target_language': target_language,
+                'chunks_processed': 0,
+                'skipped': True,
+                'service': 'none'
+            }
+        
+        total_segments = len(segments)
+        
+        provider = 'deepl' if self.translator else 'mock'
+        keys = [segment_key(segment, source_language or 'auto', target_language, provider) for segment in segments]
+        remembered = await asyncio.to_thread(self.translation_memory.get_many, keys)
+        translated_segments: List[Optional[str]] = [remembered.get(key) for key in keys]
+        
+        # Each distinct missing segment is sent once, however often it repeats
+        missing: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            if translated_segments[i] is None:
+                missing.setdefault(key, []).append(i)
+        to_send = [indexes[0] for indexes in missing.values()]
+        
+        detected_languages = []
+        done_count = total_segments - sum(len(indexes) for indexes in missing.values())
+        characters_sent = 0
+        semaphore = asyncio.Semaphore(self.translation_concurrency)
+        
+        async def translate_batch(batch: List[int]):
+            async with semaphore:
+                texts = [segments[i] for i in batch]
+                return batch, await self._translate_batch(texts, target_language, source_language)
+        
+        batches = [[to_send[i] for i in batch] for batch in self._batch_chunks([segments[i] for i in to_send])]
+        tasks = [asyncio.create_task(translate_batch(batch)) for batch in batches]
         try:
-            # Simple language detection using character patterns
-            # In production, you might use langdetect or similar
-            
-            # Check for common patterns
-            if any(char in text for char in '你好世界中文'):
-                return {'language': 'zh', 'confidence': 0.9}
-            elif any(char in text for char in 'こんにちは日本語'):
-                return {'language': 'ja', 'confidence': 0.9}
-            elif any(char in text for char in 'नमस्ते हिंदी'):
-                return {'language': 'hi', 'confidence': 0.9}
-            elif any(word in text.lower() for word in ['le', 'la', 'des', 'français']):
-                return {'language': 'fr', 'confidence': 0.7}
-            elif any(word in text.lower() for word in ['el', 'la', 'los', 'español']):
-                return {'language': 'es', 'confidence': 0.7}
-            else:
-                return {'language': 'en', 'confidence': 0.8}  # Default to English
+            for next_done in asyncio.as_completed(tasks):
+                batch, results = await next_done
+                learned = []
+                for i, result in zip(batch, results):
+                    characters_sent += len(segments[i])
+                    duplicates = missing[keys[i]]
+                    for j in duplicates:
+                        # Keep original if translation fails
+                        translated_segments[j] = result['translated_text'] if result['success'] else segments[j]
+                    done_count += len(duplicates)
+                    
+                    if result['success']:
+                        detected_languages.append(result['source_language'])
+                        # Fallback (mock) output is never remembered as a provider translation
+                        if result.get('service') == provider:
+                            learned.append((keys[i], result['translated_text'], len(segments[i])))
                 
+                await asyncio.to_thread(self.translation_memory.put_many, learned)
+                if progress_callback:
+                    await progress_callback(f"Translated {done_count}/{total_segments} segments",
+                                          int((done_count / total_segments) * 100))
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
+        await asyncio.to_thread(self.translation_memory.evict)
+        
+        # Paragraphs are separated by blank lines, sentences of a split paragraph by a space
+        parts = []
+        for i, ((start, _), translated) in enumerate(zip(spans, translated_segments)):
+            if i:
+                same_paragraph = structure.paragraph_at(start) == structure.paragraph_at(spans[i - 1][0])
+                parts.append(' ' if same_paragraph else '\n\n')
+            parts.append(translated)
+        translated_content = ''.join(parts)
+        
+        if not source_language and detected_languages:
+            source_language = max(set(detected_languages), key=detected_languages.count)
+        
+        total_characters = sum(len(segment) for segment in segments)
+        memory_stats = {
+            'segments': total_segments,
+            'hits': total_segments - len(to_send),
+            'hit_ratio': round((total_segments - len(to_send)) / total_segments, 4) if total_segments else 0.0,
+            'characters_sent': characters_sent,
+            'characters_saved': total_characters - characters_sent
+        }
+        logger.info(f"Translation memory: {memory_stats['hits']}/{total_segments} segments reused, "
+                    f"{memory_stats['characters_saved']} characters saved")
+        
+        if progress_callback:
+            await progress_callback("Translation completed", 100)
+        
+        return {
+            'success': True,
+            'original_content': content,
+            'translated_content': translated_content,
+            'source_language': source_language or 'auto',
+            'target_language': target_language,
+            'chunks_processed': total_segments,
+            'translation_memory': memory_stats,
+            'service': provider
+        }
+    
+    def _batch_chunks(self, chunks: List[str]) -> List[List[int]]:
+        """Group consecutive chunk indexes into requests within the text and size limits"""
+        batches = []
+        batch, batch_chars = [], 0
+        for i, chunk in enumerate(chunks):
+            if batch and (len(batch) >= self.batch_max_texts or batch_chars + len(chunk) > self.batch_max_chars):
+                batches.append(batch)
+                batch, batch_chars = [], 0
+            batch.append(i)
+            batch_chars += len(chunk)
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    async def _translate_batch(self, texts: List[str], target_language: str,
+                               source_language: Optional[str]) -> List[Dict[str, Any]]:
+        """Translate several texts in one DeepL request, one result per text"""
+        if not self.translator or target_language == 'hi':
+            return [await self.translate_text(text, target_language, source_language) for text in texts]
+        
+        try:
+            target_lang = self.supported_languages.get(target_language, target_language.upper())
+            source_lang = self.supported_languages.get(source_language) if source_language else None
+            
+            await self.translation_rate_limiter.acquire()
+            results = await self._run_deepl(texts, target_lang, source_lang)
+            
+            return [{
+                'success': True,
+                'original_text': text,
+                'translated_text': result.text,
+                'source_language': result.detected_source_language.lower(),
+                'target_language': target_language,
+                'confidence': 0.95,
+                'service': 'deepl'
+            } for text, result in zip(texts, results)]
+            
+        except Exception as e:
+            logger.error(f"Batch translation of {len(texts)} chunks failed: {e}")
+            return [await self._mock_translation(text, target_language, source_language) for text in texts]
+    
+    async def detect_language(self, text: str) -> Dict[str, Any]:
+        """Detect the language of text (character n-gram identifier, on a sample of the text)"""
+        try:
+            return identify_language(text)
         except Exception as e:
             logger.error(f"Language detection failed: {e}")
             return {'language': 'en', 'confidence': 0.5}
@@ -266,7 +422,9 @@ class TranslationService:
             if not self.translator:
                 return {'configured': False, 'usage': None}
             
-            usage = self.translator.get_usage()
+            usage = await asyncio.get_running_loop().run_in_executor(
+                self.translation_executor, self.translator.get_usage
+            )
             return {
                 'configured': True,
                 'character_count': usage.character.count,
@@ -62,10 +62,74 @@ CREATE TABLE IF NOT EXISTS public.file_uploads (
     content_type TEXT NOT NULL,
     extracted_text TEXT,
     word_count INTEGER DEFAULT 0,
+    paragraph_count INTEGER DEFAULT 0,
+    stats JSONB DEFAULT '{}'::jsonb,
+    sha256 TEXT,
     upload_path TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Extraction cache columns for databases created before content-hash dedupe
+ALTER TABLE public.file_uploads ADD COLUMN IF NOT EXISTS paragraph_count INTEGER DEFAULT 0;
+ALTER TABLE public.file_uploads ADD COLUMN IF NOT EXISTS stats JSONB DEFAULT '{}'::jsonb;
+ALTER TABLE public.file_uploads ADD COLUMN IF NOT EXISTS sha256 TEXT;
+-- Extractions from older extractor versions (0 = before versioning) are never reused
+ALTER TABLE public.file_uploads ADD COLUMN IF NOT EXISTS extractor_version INTEGER DEFAULT 0;
+
+-- Book bodies live in project_content_chunks; the projects row keeps version pointers and lengths
+ALTER TABLE public.projects ADD COLUMN IF NOT EXISTS content_version INTEGER;
+ALTER TABLE public.projects ADD COLUMN IF NOT EXISTS content_length INTEGER DEFAULT 0;
+ALTER TABLE public.projects ADD COLUMN IF NOT EXISTS generated_content_version INTEGER;
+ALTER TABLE public.projects ADD COLUMN IF NOT EXISTS generated_content_length INTEGER DEFAULT 0;
+
+-- Manuscript ("content") and generated book ("generated") text, split into ordered chunks per version
+CREATE TABLE IF NOT EXISTS public.project_content_chunks (
+    project_id UUID REFERENCES public.projects(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL CHECK (kind IN ('content', 'generated')),
+    version INTEGER NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (project_id, kind, version, chunk_index)
+);
+
+-- Dashboard listing: keyset pagination on (created_at, id) per user
+CREATE INDEX IF NOT EXISTS idx_projects_user_created ON public.projects(user_id, created_at DESC, id DESC);
+
+-- Repeat uploads are looked up by content hash
+CREATE INDEX IF NOT EXISTS idx_file_uploads_sha256 ON public.file_uploads(sha256, created_at DESC);
+
+-- Chapter/page/paragraph/sentence offsets for the current version of a project's text
+CREATE TABLE IF NOT EXISTS public.project_structure_index (
+    project_id UUID REFERENCES public.projects(id) ON DELETE CASCADE PRIMARY KEY,
+    content_sha256 TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    index_data JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Translated variants of a project, one row per target language
+CREATE TABLE IF NOT EXISTS public.project_translations (
+    project_id UUID REFERENCES public.projects(id) ON DELETE CASCADE,
+    language TEXT NOT NULL,
+    source_language TEXT,
+    translated_content TEXT NOT NULL DEFAULT '',
+    service TEXT,
+    stats JSONB DEFAULT '{}'::jsonb,
+    -- Job status of the latest translation run for this language
+    status TEXT DEFAULT 'completed' CHECK (status IN ('processing', 'completed', 'failed')),
+    progress INTEGER DEFAULT 0,
+    error_message TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (project_id, language)
+);
+
+-- Per-language job status for translation tables created before it was tracked here
+ALTER TABLE public.project_translations ALTER COLUMN translated_content SET DEFAULT '';
+ALTER TABLE public.project_translations ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'completed' CHECK (status IN ('processing', 'completed', 'failed'));
+ALTER TABLE public.project_translations ADD COLUMN IF NOT EXISTS progress INTEGER DEFAULT 0;
+ALTER TABLE public.project_translations ADD COLUMN IF NOT EXISTS error_message TEXT;
+
 -- Subscription plans table
 CREATE TABLE IF NOT EXISTS public.subscription_plans (
     id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
@@ -125,6 +189,9 @@ ALTER TABLE public.projects ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.file_uploads ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.user_subscriptions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.processing_jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.project_structure_index ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.project_translations ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.project_content_chunks ENABLE ROW LEVEL SECURITY;
 
 -- Create RLS policies
 -- Users can only see their own data
@@ -149,6 +216,18 @@ CREATE POLICY "Users can insert own subscriptions" ON public.user_subscriptions
 CREATE POLICY "Users can see own jobs" ON public.processing_jobs 
 FOR SELECT USING (auth.uid() = (SELECT user_id FROM public.projects WHERE id = project_id));
 
+-- Structure index policies
+CREATE POLICY "Users can see own structure indexes" ON public.project_structure_index
+FOR SELECT USING (auth.uid() = (SELECT user_id FROM public.projects WHERE id = project_id));
+
+-- Translation policies
+CREATE POLICY "Users can see own translations" ON public.project_translations
+FOR SELECT USING (auth.uid() = (SELECT user_id FROM public.projects WHERE id = project_id));
+
+-- Content chunk policies
+CREATE POLICY "Users can see own project content" ON public.project_content_chunks
+FOR SELECT USING (auth.uid() = (SELECT user_id FROM public.projects WHERE id = project_id));
+
 -- Create functions and triggers for updated_at
 CREATE OR REPLACE FUNCTION public.handle_updated_at()
 RETURNS TRIGGER AS $$
@@ -4,10 +4,14 @@ import axios from 'axios';
 import { toast } from 'sonner';
 import { UserContext } from '../App';
 
+const PAGE_SIZE = 24;
+
 function Dashboard() {
   const { user } = useContext(UserContext);
   const [projects, setProjects] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [stats, setStats] = useState({
     total: 0,
     completed: 0,
@@ -22,18 +26,18 @@ function Dashboard() {
 
   const fetchProjects = async () => {
     try {
-      const response = await axios.get('/api/projects');
-      const projectList = response.data;
+      const response = await axios.get('/api/projects/summary', { params: { limit: PAGE_SIZE } });
+      const { projects: projectList, next_cursor, status_counts, total } = response.data;
       
       setProjects(projectList);
+      setNextCursor(next_cursor);
       
-      // Calculate stats
-      const stats = {
-        total: projectList.length,
-        completed: projectList.filter(p => p.status === 'completed').length,
-        processing: projectList.filter(p => p.status === 'processing').length
-      };
-      setStats(stats);
+      // Stats come from server-side counts, not just the loaded page
+      setStats({
+        total: total || 0,
+        completed: status_counts?.completed || 0,
+        processing: status_counts?.processing || 0
+      });
       
     } catch (error) {
       console.error('Failed to fetch projects:', error);
@@ -43,6 +47,22 @@ function Dashboard() {
     }
   };
 
+  const loadMoreProjects = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await axios.get('/api/projects/summary', {
+        params: { limit: PAGE_SIZE, cursor: nextCursor }
+      });
+      setProjects([...projects, ...response.data.projects]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Failed to fetch projects:', error);
+      toast.error('Failed to load projects');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDeleteProject = async (projectId) => {
     if (!window.confirm('Are you sure you want to delete this project?')) {
       return;
@@ -121,6 +141,19 @@ function Dashboard() {
             ))}
           </div>
         )}
+        
+        {nextCursor && (
+          <div className="flex justify-center mt-6">
+            <button
+              onClick={loadMoreProjects}
+              disabled={loadingMore}
+              className="bg-white border border-gray-300 hover:bg-gray-50 text-gray-700 px-6 py-2 rounded-lg font-medium transition-colors disabled:opacity-50"
+              data-testid="load-more-projects-btn"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
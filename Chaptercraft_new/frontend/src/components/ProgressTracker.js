@@ -1,10 +1,13 @@
 import React, { useState, useEffect } from 'react';
-import { useParams, useNavigate } from 'react-router-dom';
+import { useParams, useNavigate, useSearchParams } from 'react-router-dom';
 import axios from 'axios';
 import { toast } from 'sonner';
 
 function ProgressTracker() {
   const { projectId } = useParams();
+  // Audiobook and translation jobs are tracked on their own job row, not the project's status
+  const [searchParams] = useSearchParams();
+  const jobId = searchParams.get('job');
   const navigate = useNavigate();
   const [progress, setProgress] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -16,11 +19,13 @@ function ProgressTracker() {
       const interval = setInterval(fetchProgress, 2000);
       return () => clearInterval(interval);
     }
-  }, [projectId]);
+  }, [projectId, jobId]);
 
   const fetchProgress = async () => {
     try {
-      const response = await axios.get(`/api/progress/${projectId}`);
+      const response = await axios.get(`/api/progress/${projectId}`, {
+        params: jobId ? { job_id: jobId } : {}
+      });
       setProgress(response.data);
       setError(null);
       
@@ -214,7 +214,7 @@ function ProjectEditor() {
       });
       
       toast.success('Audiobook generation started! Check progress in dashboard.');
-      navigate(`/progress/${projectId}`);
+      navigate(`/progress/${projectId}?job=${response.data.job_id}`);
       
     } catch (error) {
       const message = error.response?.data?.detail || 'Failed to generate audiobook';
@@ -0,0 +1,42 @@
+import json
+
+from services.glossary_translator import GlossaryTranslator, load_glossaries
+
+
+def test_longest_match_wins():
+    translator = GlossaryTranslator({'book': 'livre', 'book club': 'club de lecture', 'club': 'cercle'})
+    assert translator.translate("The book club met.") == "The club de lecture met."
+    assert translator.translate("A book and a club.") == "A livre and a cercle."
+
+
+def test_phrase_matches_any_whitespace():
+    translator = GlossaryTranslator({'book club': 'club de lecture'})
+    assert translator.translate("book\n  club") == "club de lecture"
+
+
+def test_word_boundaries():
+    translator = GlossaryTranslator({'book': 'livre'})
+    assert translator.translate("bookkeeper notebook book.") == "bookkeeper notebook livre."
+
+
+def test_case_is_carried_over():
+    translator = GlossaryTranslator({'hello': 'bonjour'})
+    assert translator.translate("hello Hello HELLO") == "bonjour Bonjour BONJOUR"
+
+
+def test_empty_glossary_returns_text():
+    assert GlossaryTranslator({}).translate("unchanged") == "unchanged"
+
+
+def test_load_glossaries_merges_directory(tmp_path):
+    (tmp_path / 'fr.json').write_text(json.dumps({'book': 'bouquin', 'dragon': 'dragon rouge'}), encoding='utf-8')
+    (tmp_path / 'de.json').write_text(json.dumps({'book': 'Buch'}), encoding='utf-8')
+    (tmp_path / 'es.json').write_text('["not", "a", "mapping"]', encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('ignored', encoding='utf-8')
+
+    translators = load_glossaries(str(tmp_path))
+
+    assert translators['fr'].translate("hello book dragon") == "bonjour bouquin dragon rouge"
+    assert translators['de'].translate("book") == "Buch"
+    # The malformed file is skipped and the defaults remain
+    assert translators['es'].translate("book") == "libro"
@@ -0,0 +1,60 @@
+import pytest
+
+from services.language_id import identify_language
+
+LATIN_TEXTS = {
+    'en': "The fishermen returned late that night, tired and hungry, and told everyone about the storm "
+          "that had nearly sunk their boat near the rocks beyond the harbour.",
+    'fr': "Les pêcheurs sont rentrés tard cette nuit-là, fatigués et affamés, et ont raconté à tout le "
+          "monde la tempête qui avait failli couler leur bateau près des rochers.",
+    'de': "Die Fischer kamen in jener Nacht spät zurück, müde und hungrig, und erzählten allen von dem "
+          "Sturm, der ihr Boot beinahe an den Felsen hinter dem Hafen versenkt hätte.",
+}
+
+
+@pytest.mark.parametrize('language', sorted(LATIN_TEXTS))
+def test_latin_languages(language):
+    result = identify_language(LATIN_TEXTS[language])
+    assert result['language'] == language
+    assert result['script'] == 'latin'
+    assert result['confidence'] > 0.5
+
+
+def test_chinese():
+    result = identify_language("渔夫们那天晚上很晚才回来，又累又饿，向大家讲述了那场差点把他们的船打沉的暴风雨。")
+    assert result['language'] == 'zh'
+    assert result['script'] == 'cjk'
+
+
+def test_japanese():
+    result = identify_language("漁師たちはその夜遅く帰ってきて、疲れて空腹のまま、船を沈めかけた嵐のことを皆に話した。")
+    assert result['language'] == 'ja'
+    assert result['script'] == 'cjk'
+
+
+def test_candidates_restrict_choice():
+    result = identify_language(LATIN_TEXTS['fr'], candidates=['en', 'de'])
+    assert result['language'] in ('en', 'de')
+    assert set(result['scores']) == {'en', 'de'}
+
+
+def test_text_without_letters():
+    assert identify_language("12345 !!! ...") == {'language': 'en', 'confidence': 0.0, 'scores': {}, 'script': None}
+
+
+@pytest.mark.parametrize('text, language', [
+    ("This is a plain English sentence.", 'en'),
+    ("Hello, how are you today?", 'en'),
+    ("Nous sommes allés au parc après l'école.", 'fr'),
+    ("Die Kinder spielten im Garten.", 'de'),
+])
+def test_short_sentences_clear_routing_threshold(text, language):
+    # Translation routes on the detected source language at LANGUAGE_ROUTING_MIN_CONFIDENCE (0.6 by default)
+    result = identify_language(text)
+    assert result['language'] == language
+    assert result['confidence'] >= 0.6
+
+
+def test_long_text_is_sampled():
+    result = identify_language(" ".join([LATIN_TEXTS['de']] * 200), sample_chars=600)
+    assert result['language'] == 'de' and result['confidence'] > 0.9
@@ -0,0 +1,64 @@
+from services.sentence_segmenter import char_measure, iter_sentence_spans, pack_spans, segment_sentences
+
+
+def test_abbreviation_does_not_split():
+    assert segment_sentences("Mr. Smith went home. He slept.") == ["Mr. Smith went home.", "He slept."]
+
+
+def test_initials_do_not_split():
+    assert segment_sentences("J. R. R. Tolkien wrote it. Then he rested.") == [
+        "J. R. R. Tolkien wrote it.", "Then he rested."]
+
+
+def test_lowercase_continuation_does_not_split():
+    assert segment_sentences('"Look!" she said. It was gone.') == ['"Look!" she said.', "It was gone."]
+
+
+def test_closing_quote_stays_with_sentence():
+    assert segment_sentences('He said "Stop." Nobody did.') == ['He said "Stop."', "Nobody did."]
+
+
+def test_trailing_text_without_terminator():
+    assert segment_sentences("One. Two  \n") == ["One.", "Two"]
+
+
+def test_spans_respect_bounds():
+    text = "Skip this. Keep one. Keep two. Skip that."
+    start, end = text.index("Keep"), text.index(" Skip that")
+    assert [text[s:e] for s, e in iter_sentence_spans(text, start, end)] == ["Keep one.", "Keep two."]
+
+
+def test_packed_spans_never_exceed_limit():
+    text = " ".join(f"Sentence number {i} is {'very ' * (i % 7)}short." for i in range(200))
+    text += " " + "x" * 500 + "."
+    spans = list(iter_sentence_spans(text))
+    for limit in (40, 97, 250):
+        chunks = pack_spans(spans, limit)
+        assert all(char_measure(start, end) <= limit for start, end in chunks)
+        assert chunks[0][0] == spans[0][0] and chunks[-1][1] == spans[-1][1]
+        # Chunks are contiguous and in order, so no text is dropped
+        assert all(prev[1] <= nxt[0] for prev, nxt in zip(chunks, chunks[1:]))
+
+
+def test_pack_spans_groups_small_sentences():
+    text = "A b. C d. E f."
+    assert pack_spans(list(iter_sentence_spans(text)), 9) == [(0, 9), (10, 14)]
+
+
+def test_over_long_sentence_is_cut_between_words():
+    text = "Intro. " + " ".join(f"Word{i:03d}" for i in range(150)) + " end."
+    spans = list(iter_sentence_spans(text))
+    chunks = pack_spans(spans, 50, text=text)
+    long_start, long_end = spans[1]
+    pieces = [(start, end) for start, end in chunks if start >= long_start]
+    assert len(pieces) > 1 and pieces[-1][1] == long_end
+    for start, end in pieces:
+        assert end - start <= 50
+        assert start == long_start or text[start - 1].isspace()
+        assert end == long_end or text[end].isspace()
+        assert not text[start].isspace() and not text[end - 1].isspace()
+
+
+def test_cut_without_whitespace_is_hard():
+    text = "x" * 120
+    assert pack_spans([(0, 120)], 50, text=text) == [(0, 40), (40, 80), (80, 120)]
@@ -0,0 +1,29 @@
+from services.structure_index import StructureIndex
+
+TEXT = (
+    "A Note to the Reader\n\nThis book was written over many summers.\n\n"
+    "Chapter 1: The Farm\n\nThe sisters arrived at dawn. They met the horse.\n\n"
+    "Chapter 2: The Storm\n\nRain fell all night. Nobody slept.\n"
+)
+
+
+def test_front_matter_before_first_heading():
+    structure = StructureIndex.build(TEXT)
+    start, end = structure.front_matter('chapter')
+    assert TEXT[start:end].strip() == "A Note to the Reader\n\nThis book was written over many summers."
+    assert structure.chapter_at(start) is None
+    assert [TEXT[s:e].split('\n')[0] for s, e in structure.spans('chapter')] == [
+        "Chapter 1: The Farm", "Chapter 2: The Storm"]
+
+
+def test_chapter_chunks_keep_front_matter():
+    structure = StructureIndex.build(TEXT)
+    chunks = structure.chunk_text(TEXT, 'chapter', limit=80)
+    assert chunks[0].startswith("A Note to the Reader")
+    assert "".join(TEXT[s:e] for s, e in structure.segment_spans('chapter', limit=1000)) == TEXT
+
+
+def test_no_front_matter():
+    structure = StructureIndex.build("Chapter 1\n\nOnly text.")
+    assert structure.front_matter('chapter') is None
+    assert structure.front_matter('page') == (0, len("Chapter 1\n\nOnly text."))